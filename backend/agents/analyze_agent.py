@@ -2,7 +2,7 @@
 RIFT 2026 — Analyze Agent  (v2 — "Scan & Trace" approach)
 
 NEW APPROACH:
-  1. py_compile every .py file in the repo to find ALL syntax errors directly
+  1. Compile every .py file in the repo (in memory) to find ALL syntax errors directly
   2. Parse test output for runtime errors (NameError, TypeError, etc.)
   3. For NameErrors / ImportErrors, trace through imports to the real source
   4. Deduplicate and return the combined list
@@ -10,37 +10,236 @@ NEW APPROACH:
 This replaces the old regex-only approach which couldn't trace errors to their
 actual root cause file.
 """
+import ast
 import logging
 import os
-import py_compile
 import re
 import subprocess
 import sys
+import threading
 from pathlib import Path
+from typing import Callable, NamedTuple
+from weakref import WeakKeyDictionary
 
 from models import BugType, ErrorInfo
+from services.cancellation import CancelToken
+from services.compile_service import compile_service
+from services.file_index import file_index_service
+from services.module_index import module_index_service
+from services.pytest_output import PytestOutputParser, parse_pytest_output
+from services.run_scheduler import run_scheduler
+from services.snippet_service import snippet_service
+from services.test_reports import test_report_service
 
 logger = logging.getLogger("rift.analyze_agent")
 
 
+def _find_unused_imports(tree: ast.AST) -> list[tuple[int, str]]:
+    """
+    One linear AST pass: collect every import binding and every name use,
+    then return (line, imported name) for the first unused binding of each
+    import statement, in line order.
+
+    Counts as a use: any loaded/deleted Name (so `os.path.join` uses `os`),
+    names inside string annotations, `cast("T", ...)` and
+    `TypeVar(bound="T")` (how TYPE_CHECKING-only imports are referenced),
+    and string entries of `__all__` (re-exports). Docstrings, comments and
+    other string literals never count.
+    """
+    imports: list[tuple[int, int, list[tuple[str, str]]]] = []
+    used: set[str] = set()
+    type_strings: list[str] = []
+
+    def _collect_strings(node: ast.AST) -> None:
+        for sub in ast.walk(node):
+            if isinstance(sub, ast.Constant) and isinstance(sub.value, str):
+                type_strings.append(sub.value)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if not isinstance(node.ctx, ast.Store):
+                used.add(node.id)
+        elif isinstance(node, ast.Import):
+            bindings = [(a.asname or a.name.split(".")[0], a.name) for a in node.names]
+            imports.append((node.lineno, node.col_offset, bindings))
+        elif isinstance(node, ast.ImportFrom):
+            if node.module == "__future__":
+                continue
+            bindings = [(a.asname or a.name, a.name) for a in node.names if a.name != "*"]
+            imports.append((node.lineno, node.col_offset, bindings))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.returns is not None:
+                _collect_strings(node.returns)
+        elif isinstance(node, ast.arg):
+            if node.annotation is not None:
+                _collect_strings(node.annotation)
+        elif isinstance(node, ast.AnnAssign):
+            _collect_strings(node.annotation)
+            if isinstance(node.target, ast.Name) and node.target.id == "__all__" and node.value:
+                used.update(_string_items(node.value))
+        elif isinstance(node, (ast.Assign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(t, ast.Name) and t.id == "__all__" for t in targets):
+                used.update(_string_items(node.value))
+        elif isinstance(node, ast.Call):
+            func = node.func
+            func_name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")
+            if func_name == "cast" and node.args:
+                _collect_strings(node.args[0])
+            elif func_name == "TypeVar":
+                for kw in node.keywords:
+                    if kw.arg == "bound":
+                        _collect_strings(kw.value)
+            elif (
+                func_name in ("extend", "append")
+                and isinstance(func, ast.Attribute)
+                and isinstance(func.value, ast.Name)
+                and func.value.id == "__all__"
+            ):
+                for arg in node.args:
+                    used.update(_string_items(arg))
+
+    # Forward references / TYPE_CHECKING imports used only as strings
+    for text in type_strings:
+        try:
+            expr = ast.parse(text.strip(), mode="eval")
+        except SyntaxError:
+            continue
+        used.update(n.id for n in ast.walk(expr) if isinstance(n, ast.Name))
+
+    unused: list[tuple[int, str]] = []
+    reported_lines: set[int] = set()
+    for line_num, _, bindings in sorted(imports, key=lambda i: (i[0], i[1])):
+        if line_num in reported_lines:
+            continue  # Only report one unused per line
+        for bound, original in bindings:
+            if bound not in used:
+                unused.append((line_num, original))
+                reported_lines.add(line_num)
+                break
+    return unused
+
+
+def _string_items(node: ast.AST) -> list[str]:
+    """String elements of a list/tuple literal (e.g. an __all__ value)."""
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [
+            e.value for e in node.elts
+            if isinstance(e, ast.Constant) and isinstance(e.value, str)
+        ]
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    return []
+
+
+# Volatile parts of an error message that differ between failing tests
+# with the same cause (values, addresses, counts)
+_VOLATILE = [
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "0x?"),
+    (re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[-+]?\d+)?\b"), "<N>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def _message_template(message: str) -> str:
+    """Normalize an error message so failures with one cause compare equal."""
+    template = message.strip()
+    for pattern, repl in _VOLATILE:
+        template = pattern.sub(repl, template)
+    return template
+
+
+# Import failures whose message alone identifies the cause
+_MISSING_IMPORT = re.compile(r"No module named|cannot import name")
+
+
+def _is_test_file(path: str) -> bool:
+    """Whether a repo-relative path is a test module (a call site, not a cause)."""
+    parts = path.replace("\\", "/").split("/")
+    name = parts[-1]
+    return (
+        name.startswith("test_") or name.endswith("_test.py") or name == "conftest.py"
+        or ".test." in name or ".spec." in name
+        or any(p in ("test", "tests", "__tests__") for p in parts[:-1])
+    )
+
+
+def _cluster_failures(
+    failures: list[tuple[ErrorInfo, ErrorInfo | None]],
+) -> list[tuple[ErrorInfo, ErrorInfo | None]]:
+    """
+    Group (failure, traced root cause) pairs by exception type, message
+    template and source frame, and return one pair per cluster — the first
+    failure seen, with occurrences set to the cluster size.
+
+    The source frame is the traced root cause if there is one, else the
+    failure's own location — failures are only merged across call sites
+    when they share a cause. The exception is a missing module / name
+    reported from a test file: its message names the cause exactly, so
+    the same import failing in 200 test files is one cluster.
+    """
+    clusters: dict[tuple, tuple[ErrorInfo, ErrorInfo | None]] = {}
+    for err, root in failures:
+        err_type = err.message.partition(":")[0].strip()
+        if root is not None:
+            frame = (root.file, root.line_number)
+        elif _MISSING_IMPORT.search(err.message) and _is_test_file(err.file):
+            frame = None
+        else:
+            frame = (err.file, err.line_number)
+        key = (err_type, _message_template(err.message), frame)
+        cluster = clusters.get(key)
+        if cluster is None:
+            clusters[key] = (err.model_copy(update={"occurrences": err.occurrences}), root)
+        else:
+            cluster[0].occurrences += err.occurrences
+    return [
+        (rep, root.model_copy(update={"occurrences": rep.occurrences}) if root else None)
+        for rep, root in clusters.values()
+    ]
+
+
+class _FileScan(NamedTuple):
+    """Per-file scan results for one content version."""
+    digest: str
+    syntax: list[ErrorInfo]
+    lint: list[ErrorInfo]
+
+
 class AnalyzeAgent:
     """Agent that finds ALL errors in a repo — syntax scan + test output parsing."""
 
+    def __init__(self):
+        # Per-file results, kept for as long as the run's file index lives
+        self._file_scans: WeakKeyDictionary = WeakKeyDictionary()
+
     def run(
-        self, stdout: str, stderr: str, framework: str, repo_path: str
+        self, stdout: str, stderr: str, framework: str, repo_path: str,
+        runtime_errors: list[ErrorInfo] | None = None,
+        cancel: CancelToken | None = None,
     ) -> list[ErrorInfo]:
         """
         Analyze the repo for errors using a multi-strategy approach.
 
-        Strategy 1: py_compile scan (catches ALL syntax errors instantly)
+        Strategy 1: compile scan (catches ALL syntax errors instantly)
         Strategy 2: Parse test output for runtime errors
-        Strategy 3: Trace NameErrors/ImportErrors to their root cause
+        Strategy 3: Trace NameErrors/ImportErrors to their root cause, then
+                    cluster failures sharing one cause (see _cluster_failures)
+
+        The result is ordered by occurrences (failures fixed per heal).
+
+        runtime_errors: strategy 2 results already produced while the suite
+        ran (see IncrementalAnalyzer); the output is then not parsed again.
+        cancel: run CancelToken; stops the wait for an analysis slot.
         """
         errors: list[ErrorInfo] = []
         seen = set()  # (file, line_number) dedup
 
-        # ========== STRATEGY 1: py_compile every .py file ==========
-        syntax_errors = self._scan_all_syntax(repo_path)
+        # ========== STRATEGY 1: compile every .py file ==========
+        # (strategy 4's per-file lint runs in the same incremental pass)
+        # The CPU-heavy part, so it counts against the analysis stage limit
+        with run_scheduler.stage("analysis", cancel):
+            syntax_errors, lint_errors = self._scan_files(repo_path)
         for err in syntax_errors:
             key = (err.file, err.line_number)
             if key not in seen:
@@ -52,29 +251,64 @@ class AnalyzeAgent:
         combined = stdout + "\n" + stderr
         is_python = framework in ("pytest", "unittest", "unknown")
 
-        if is_python:
+        # Structured report (JUnit XML / jest JSON) first — exact per-test
+        # records; fall back to regex-parsing the console output
+        report = test_report_service.load(repo_path, framework)
+        if report is not None and report.failures:
+            runtime_errors = self._errors_from_failures(report.failures, repo_path)
+        elif runtime_errors is not None:
+            logger.info(f"  Using {len(runtime_errors)} failure(s) analyzed during the test run")
+        elif is_python:
             runtime_errors = self._parse_pytest_output(combined, repo_path)
         else:
             runtime_errors = self._parse_js_output(combined, repo_path)
 
-        for err in runtime_errors:
+        # ========== STRATEGY 3: Trace NameError / ImportError to root cause ==========
+        # Runs before clustering, so failures traced to one cause merge.
+        # The result depends only on the failing file and message.
+        traces: dict[tuple[str, str], ErrorInfo | None] = {}
+
+        def trace(err: ErrorInfo) -> ErrorInfo | None:
+            key = (err.file, err.message)
+            if key not in traces:
+                traces[key] = self._trace_to_root_cause(err, repo_path)
+            return traces[key]
+
+        # Collapse failures sharing one (traced) root cause
+        clustered = _cluster_failures([(err, trace(err)) for err in runtime_errors])
+        if len(clustered) < len(runtime_errors):
+            logger.info(
+                f"  [CLUSTER] {len(runtime_errors)} failure(s) → {len(clustered)} cluster(s)"
+            )
+
+        roots: dict[tuple[str, int], ErrorInfo] = {}
+        for err, root in clustered:
+            if root is not None:
+                key = (root.file, root.line_number)
+                if key in roots:
+                    roots[key].occurrences += root.occurrences
+                else:
+                    roots[key] = root
             key = (err.file, err.line_number)
             if key not in seen:
                 seen.add(key)
                 errors.append(err)
                 logger.info(f"  [TEST] {err.bug_type}: {err.file}:{err.line_number} — {err.message[:80]}")
 
-        # ========== STRATEGY 3: Trace NameError / ImportError to root cause ==========
         traced_errors = []
-        for err in list(errors):
-            root = self._trace_to_root_cause(err, repo_path, seen)
-            if root and (root.file, root.line_number) not in seen:
-                seen.add((root.file, root.line_number))
-                traced_errors.append(root)
-                logger.info(f"  [TRACE] {root.bug_type}: {root.file}:{root.line_number} — {root.message[:80]}")
+        scanned = {(e.file, e.line_number): i for i, e in enumerate(errors)}
+        for key, root in roots.items():
+            if key in scanned:
+                # Already reported (e.g. by the syntax scan); it accounts for
+                # the traced failures. Copy — scan results are cached per file
+                i = scanned[key]
+                errors[i] = errors[i].model_copy(update={"occurrences": root.occurrences})
+                continue
+            seen.add(key)
+            traced_errors.append(root)
+            logger.info(f"  [TRACE] {root.bug_type}: {root.file}:{root.line_number} — {root.message[:80]}")
 
         # ========== STRATEGY 4: Lint scan (unused imports) ==========
-        lint_errors = self._scan_unused_imports(repo_path)
         for err in lint_errors:
             key = (err.file, err.line_number)
             if key not in seen:
@@ -82,185 +316,120 @@ class AnalyzeAgent:
                 errors.append(err)
                 logger.info(f"  [LINT] {err.bug_type}: {err.file}:{err.line_number} — {err.message[:80]}")
 
-        # Put traced (root cause) errors FIRST so they get fixed first
-        final = traced_errors + errors
+        # Most failures first; at equal counts traced (root cause) errors
+        # come first so they get fixed first (sorted() is stable)
+        final = sorted(traced_errors + errors, key=lambda e: -e.occurrences)
 
         logger.info(f"Analyze complete: {len(final)} total error(s)")
         return final
 
-    # ==================== STRATEGY 1: Full syntax scan ====================
+    # ==================== STRATEGIES 1 + 4: Per-file scans ====================
 
-    def _scan_all_syntax(self, repo_path: str) -> list[ErrorInfo]:
-        """py_compile every .py file in the repo tree."""
-        errors = []
-        repo = Path(repo_path)
+    def _scan_files(self, repo_path: str) -> tuple[list[ErrorInfo], list[ErrorInfo]]:
+        """
+        Run the per-file scans (syntax + unused imports) for every .py file.
 
-        for py_file in repo.rglob("*.py"):
-            # Skip hidden dirs, __pycache__, venv, node_modules
-            parts = py_file.relative_to(repo).parts
-            if any(p.startswith(".") or p in ("__pycache__", "venv", ".venv", "node_modules", ".git") for p in parts):
-                continue
+        Results are kept per file across healing iterations and only files
+        whose content hash changed since the last scan are re-scanned. The
+        merged lists are in file order — identical to a full scan.
+
+        Returns: (syntax_errors, lint_errors)
+        """
+        index = file_index_service.get(repo_path)
+        cache = self._file_scans.setdefault(index, {})
 
+        # The index already skips hidden dirs, __pycache__, venv, node_modules
+        entries = index.files(".py")
+        live = {entry.rel_path for entry in entries}
+        for rel_path in [r for r in cache if r not in live]:
+            del cache[rel_path]  # file was deleted
+
+        dirty = []
+        for entry in entries:
             try:
-                py_compile.compile(str(py_file), doraise=True)
-            except py_compile.PyCompileError as e:
-                line_num = self._extract_line_from_compile_error(e)
-                rel_path = str(py_file.relative_to(repo)).replace("\\", "/")
-                snippet = self._read_snippet(py_file, line_num)
-
-                # Extract the actual error message
-                err_str = str(e)
-                msg = self._clean_compile_error_msg(err_str)
-
-                # Subclassify: indentation vs syntax
-                bug_type = BugType.SYNTAX
-                if "indent" in msg.lower() or "IndentationError" in err_str:
-                    bug_type = BugType.INDENTATION
-                elif "TabError" in err_str:
-                    bug_type = BugType.INDENTATION
-
-                errors.append(ErrorInfo(
-                    file=rel_path,
-                    line_number=line_num,
-                    bug_type=bug_type,
-                    message=msg,
-                    code_snippet=snippet,
-                ))
+                digest = entry.digest
             except Exception:
-                pass  # Ignore files that can't be read
+                cache.pop(entry.rel_path, None)  # can't be read
+                continue
+            scan = cache.get(entry.rel_path)
+            if scan is None or scan.digest != digest:
+                dirty.append(entry)
+
+        # Large batches are sharded across a process pool; results keep file order
+        results = compile_service.check_entries(dirty) if dirty else []
+        for entry, result in zip(dirty, results):
+            if result is None:
+                cache.pop(entry.rel_path, None)
+                continue
+            cache[entry.rel_path] = _FileScan(
+                digest=entry.digest,
+                syntax=self._syntax_errors_for(repo_path, entry, result),
+                lint=self._unused_imports_for(repo_path, entry, result),
+            )
 
-        return errors
+        logger.info(f"Per-file scan: {len(dirty)}/{len(entries)} file(s) re-scanned")
 
-    def _extract_line_from_compile_error(self, e: py_compile.PyCompileError) -> int:
-        """Extract line number from a PyCompileError."""
-        if hasattr(e, 'exc_value') and hasattr(e.exc_value, 'lineno') and e.exc_value.lineno:
-            return e.exc_value.lineno
-        match = re.search(r'line\s+(\d+)', str(e))
-        return int(match.group(1)) if match else 1
-
-    def _clean_compile_error_msg(self, err_str: str) -> str:
-        """Extract a clean error message from PyCompileError string."""
-        match = re.search(r'((?:Syntax|Indentation|Tab)Error:\s*.+?)(?:\s*\(|$)', err_str)
-        if match:
-            return match.group(1).strip()
-        lines = err_str.strip().splitlines()
-        for line in reversed(lines):
-            line = line.strip()
-            if line and not line.startswith("File") and not line.startswith("Sorry"):
-                return line
-        return "SyntaxError"
+        syntax_errors: list[ErrorInfo] = []
+        lint_errors: list[ErrorInfo] = []
+        for entry in entries:
+            scan = cache.get(entry.rel_path)
+            if scan is not None:
+                syntax_errors.extend(scan.syntax)
+                lint_errors.extend(scan.lint)
+        return syntax_errors, lint_errors
 
-    # ==================== STRATEGY 2: Test output parsing ====================
+    def _scan_all_syntax(self, repo_path: str) -> list[ErrorInfo]:
+        """Compile every .py file in the repo tree (in memory, cached by hash)."""
+        return self._scan_files(repo_path)[0]
 
-    def _parse_pytest_output(self, text: str, repo_path: str) -> list[ErrorInfo]:
-        """Parse pytest output for runtime errors (not syntax — those are caught by scan)."""
-        errors = []
+    def _syntax_errors_for(self, repo_path: str, entry, result) -> list[ErrorInfo]:
+        """STRATEGY 1 for one file: report its compile error, if any."""
+        if result.ok:
+            return []
 
-        # Pattern 1: pytest FAILURES block
-        failure_blocks = re.split(r'_{5,}\s+(\w+)\s+_{5,}', text)
-
-        for block in failure_blocks:
-            # Find error lines (E   ErrorType: message)
-            err_match = re.search(r'E\s+(\w+(?:Error|Exception)):\s*(.+)', block)
-            
-            # Also catch bare assertion failures: "E       assert 120 == 80"
-            assert_match = None
-            if not err_match:
-                assert_match = re.search(r'E\s+(assert\s+.+)', block)
-            
-            if not err_match and not assert_match:
-                continue
+        rel_path = entry.rel_path
+        line_num = result.lineno
 
-            if err_match:
-                err_type = err_match.group(1)
-                err_msg = err_match.group(2).strip()
-                full_msg = f"{err_type}: {err_msg}"
-            else:
-                err_type = "AssertionError"
-                err_msg = assert_match.group(1).strip()
-                full_msg = f"AssertionError: {err_msg}"
-
-            # Skip SyntaxError — already caught by py_compile scan
-            # BUT: if py_compile missed it (e.g. dynamic exec), we MUST catch it here.
-            # The 'seen' set logic handles dedup if py_compile already caught it.
-            pass
-
-            # Find file:line references
-            frame_refs = re.findall(r'([\w\\/._-]+\.py):(\d+):', block)
-            if not frame_refs:
-                continue
+        # Subclassify: indentation vs syntax
+        bug_type = BugType.INDENTATION if result.is_indentation else BugType.SYNTAX
 
-            # Use the LAST file:line before the E line (deepest frame)
-            file_path, line_num = frame_refs[-1]
-            file_path = file_path.replace("\\", "/")
-            line_num = int(line_num)
+        return [ErrorInfo(
+            file=rel_path,
+            line_number=line_num,
+            bug_type=bug_type,
+            message=result.message,
+            code_snippet=self._read_snippet(repo_path, rel_path, line_num),
+        )]
 
-            file_path = self._relativize(file_path, repo_path)
+    # ==================== STRATEGY 2: Test output parsing ====================
 
-            if "site-packages" in file_path or "lib/python" in file_path.lower():
-                continue
+    def _parse_pytest_output(self, text: str, repo_path: str) -> list[ErrorInfo]:
+        """Parse pytest output for runtime errors (not syntax — those are caught by scan).
 
-            bug_type = self._classify_runtime_error(err_type, full_msg)
+        One linear pass (see services/pytest_output.py): failure sections
+        first, then FAILED summary lines, then plain tracebacks.
+        """
+        return self._errors_from_failures(parse_pytest_output(text), repo_path)
+
+    def _errors_from_failures(self, failures, repo_path: str) -> list[ErrorInfo]:
+        """Convert parsed / structured-report failure records into ErrorInfo objects."""
+        errors = []
+        for failure in failures:
+            file_path = self._relativize(failure.file, repo_path)
+            if not file_path or "site-packages" in file_path or "node_modules" in file_path:
+                continue
+            if "lib/python" in file_path.lower():
+                continue
 
+            full_msg = f"{failure.error_type}: {failure.message}"
+            line_num = failure.line_number
             errors.append(ErrorInfo(
                 file=file_path,
                 line_number=line_num,
-                bug_type=bug_type,
+                bug_type=self._classify_runtime_error(failure.error_type, full_msg),
                 message=full_msg,
-                code_snippet=self._read_snippet(Path(repo_path) / file_path, line_num),
+                code_snippet=self._read_snippet(repo_path, file_path, line_num) if line_num > 0 else "",
             ))
-
-        # Pattern 2: Short summary — FAILED tests/file.py::test - Error: msg
-        if not errors:
-            for match in re.finditer(
-                r'FAILED\s+([\w/\\._-]+\.py)::\w+\s*-\s*(\w+(?:Error|Exception)):\s*(.+)',
-                text
-            ):
-                file_path = match.group(1).replace("\\", "/")
-                err_type = match.group(2)
-                err_msg = match.group(3).strip()
-
-                # if err_type in ("SyntaxError", "IndentationError"):
-                #     continue
-
-                file_path = self._relativize(file_path, repo_path)
-                bug_type = self._classify_runtime_error(err_type, f"{err_type}: {err_msg}")
-
-                errors.append(ErrorInfo(
-                    file=file_path,
-                    line_number=0,
-                    bug_type=bug_type,
-                    message=f"{err_type}: {err_msg}",
-                    code_snippet="",
-                ))
-
-        # Pattern 3: Generic Python traceback (File "X", line N)
-        if not errors:
-            for match in re.finditer(
-                r'File\s+"([^"]+)",\s+line\s+(\d+).*?\n\s*(\w+(?:Error|Exception)):\s*(.+)',
-                text, re.DOTALL
-            ):
-                file_path = match.group(1).replace("\\", "/")
-                line_num = int(match.group(2))
-                err_type = match.group(3)
-                err_msg = match.group(4).strip()
-
-                if "site-packages" in file_path:
-                    continue
-                # if err_type in ("SyntaxError", "IndentationError"):
-                #     continue
-
-                file_path = self._relativize(file_path, repo_path)
-                bug_type = self._classify_runtime_error(err_type, f"{err_type}: {err_msg}")
-
-                errors.append(ErrorInfo(
-                    file=file_path,
-                    line_number=line_num,
-                    bug_type=bug_type,
-                    message=f"{err_type}: {err_msg}",
-                    code_snippet="",
-                ))
-
         return errors
 
     def _parse_js_output(self, text: str, repo_path: str) -> list[ErrorInfo]:
@@ -275,6 +444,7 @@ class AnalyzeAgent:
             errors.append(ErrorInfo(
                 file=file_path, line_number=line_num,
                 bug_type=BugType.LOGIC, message="Test failure",
+                code_snippet=self._read_snippet(repo_path, file_path, line_num),
             ))
 
         for match in re.finditer(r'([\w/\\._-]+\.(?:js|ts)):(\d+):\d+:\s*(.+)', text):
@@ -284,6 +454,7 @@ class AnalyzeAgent:
             errors.append(ErrorInfo(
                 file=file_path, line_number=line_num,
                 bug_type=BugType.LINTING, message=msg,
+                code_snippet=self._read_snippet(repo_path, file_path, line_num),
             ))
 
         return errors
@@ -308,9 +479,7 @@ class AnalyzeAgent:
 
     # ==================== STRATEGY 3: Root cause tracing ====================
 
-    def _trace_to_root_cause(
-        self, err: ErrorInfo, repo_path: str, seen: set
-    ) -> ErrorInfo | None:
+    def _trace_to_root_cause(self, err: ErrorInfo, repo_path: str) -> ErrorInfo | None:
         """For NameError/ImportError, trace to the actual broken source file."""
 
         msg = err.message
@@ -332,9 +501,8 @@ class AnalyzeAgent:
                 return None
             undefined_name = name_match.group(1)
 
-            try:
-                source = (Path(repo_path) / err.file).read_text(encoding="utf-8", errors="replace")
-            except Exception:
+            source = file_index_service.get(repo_path).read_text(err.file)
+            if source is None:
                 return None
 
             import_pat = re.compile(
@@ -357,155 +525,71 @@ class AnalyzeAgent:
         if not module_name:
             return None
 
-        source_file = self._resolve_module(module_name, repo_path)
+        source_file = module_index_service.resolve(repo_path, module_name)
         if not source_file:
             return None
 
         # Check if this source file has a syntax error
+        entry = file_index_service.get(repo_path).get(source_file)
+        if entry is None:
+            return None
         try:
-            py_compile.compile(str(source_file), doraise=True)
+            result = compile_service.check_entry(entry)
+        except Exception:
+            return None
+        if result.ok:
             return None  # No syntax error — can't trace further
-        except py_compile.PyCompileError as e:
-            line_num = self._extract_line_from_compile_error(e)
-            rel_path = str(source_file.relative_to(Path(repo_path))).replace("\\", "/")
-
-            # Already found by scan?
-            if (rel_path, line_num) in seen:
-                return None
 
-            msg_clean = self._clean_compile_error_msg(str(e))
-            snippet = self._read_snippet(source_file, line_num)
+        rel_path = entry.rel_path
+        line_num = result.lineno
 
-            bug_type = BugType.SYNTAX
-            if "indent" in msg_clean.lower():
-                bug_type = BugType.INDENTATION
-
-            return ErrorInfo(
-                file=rel_path,
-                line_number=line_num,
-                bug_type=bug_type,
-                message=msg_clean,
-                code_snippet=snippet,
-            )
+        return ErrorInfo(
+            file=rel_path,
+            line_number=line_num,
+            bug_type=BugType.INDENTATION if result.is_indentation else BugType.SYNTAX,
+            message=result.message,
+            code_snippet=self._read_snippet(repo_path, rel_path, line_num),
+        )
 
     # ==================== STRATEGY 4: Unused import scan ====================
 
     def _scan_unused_imports(self, repo_path: str) -> list[ErrorInfo]:
         """Scan all .py files for unused imports (LINTING errors)."""
-        errors = []
-        repo = Path(repo_path)
+        return self._scan_files(repo_path)[1]
 
-        for py_file in repo.rglob("*.py"):
-            parts = py_file.relative_to(repo).parts
-            if any(p.startswith(".") or p in ("__pycache__", "venv", ".venv", "node_modules", ".git") for p in parts):
-                continue
-            # Skip test files — we only lint source files
-            if py_file.name.startswith("test_") or py_file.name.endswith("_test.py"):
-                continue
-            # Skip __init__.py — imports there are often re-exports
-            if py_file.name == "__init__.py":
-                continue
+    def _unused_imports_for(self, repo_path: str, entry, result) -> list[ErrorInfo]:
+        """STRATEGY 4 for one file: report unused imports (LINTING errors)."""
+        errors = []
+        # Skip test files — we only lint source files
+        if entry.name.startswith("test_") or entry.name.endswith("_test.py"):
+            return errors
+        # Skip __init__.py — imports there are often re-exports
+        if entry.name == "__init__.py":
+            return errors
 
-            try:
-                source = py_file.read_text(encoding="utf-8", errors="replace")
-            except Exception:
-                continue
+        # No point linting broken syntax
+        if not result.ok:
+            return errors
 
-            # First check the file compiles — no point linting broken syntax
-            try:
-                py_compile.compile(str(py_file), doraise=True)
-            except py_compile.PyCompileError:
-                continue
+        try:
+            tree = ast.parse(entry.data, filename=str(entry.path))
+        except Exception:
+            return errors
 
-            lines = source.splitlines()
-            rel_path = str(py_file.relative_to(repo)).replace("\\", "/")
-
-            for i, line in enumerate(lines, 1):
-                stripped = line.strip()
-                if not stripped or stripped.startswith("#"):
-                    continue
-
-                # Match: import X  or  import X as Y
-                m_import = re.match(r'^import\s+(\w+)(?:\s+as\s+(\w+))?\s*$', stripped)
-                if m_import:
-                    module = m_import.group(1)
-                    alias = m_import.group(2) or module
-                    # Check if the alias is used anywhere else in the file
-                    usage_pat = re.compile(r'\b' + re.escape(alias) + r'\b')
-                    used = False
-                    for j, other_line in enumerate(lines, 1):
-                        if j == i:
-                            continue
-                        ol = other_line.strip()
-                        if ol.startswith("#"):
-                            continue
-                        if usage_pat.search(ol):
-                            used = True
-                            break
-                    if not used:
-                        errors.append(ErrorInfo(
-                            file=rel_path,
-                            line_number=i,
-                            bug_type=BugType.LINTING,
-                            message=f"Unused import '{module}'",
-                            code_snippet=self._read_snippet(py_file, i),
-                        ))
-                        continue
-
-                # Match: from X import Y, Z
-                m_from = re.match(r'^from\s+\S+\s+import\s+(.+)$', stripped)
-                if m_from:
-                    names_str = m_from.group(1)
-                    # Parse individual names (handle 'as' aliases)
-                    for part in names_str.split(","):
-                        part = part.strip()
-                        if not part:
-                            continue
-                        as_match = re.match(r'(\w+)\s+as\s+(\w+)', part)
-                        if as_match:
-                            original_name = as_match.group(1)
-                            alias = as_match.group(2)
-                        else:
-                            original_name = part.split()[0]
-                            alias = original_name
-                        # Check if alias used elsewhere
-                        usage_pat = re.compile(r'\b' + re.escape(alias) + r'\b')
-                        used = False
-                        for j, other_line in enumerate(lines, 1):
-                            if j == i:
-                                continue
-                            ol = other_line.strip()
-                            if ol.startswith("#"):
-                                continue
-                            if usage_pat.search(ol):
-                                used = True
-                                break
-                        if not used:
-                            errors.append(ErrorInfo(
-                                file=rel_path,
-                                line_number=i,
-                                bug_type=BugType.LINTING,
-                                message=f"Unused import '{original_name}'",
-                                code_snippet=self._read_snippet(py_file, i),
-                            ))
-                            break  # Only report one unused per line
+        rel_path = entry.rel_path
+        for line_num, name in _find_unused_imports(tree):
+            errors.append(ErrorInfo(
+                file=rel_path,
+                line_number=line_num,
+                bug_type=BugType.LINTING,
+                message=f"Unused import '{name}'",
+                code_snippet=self._read_snippet(repo_path, rel_path, line_num),
+            ))
 
         return errors
 
     # ==================== Helpers ====================
 
-    def _resolve_module(self, module_name: str, repo_path: str) -> Path | None:
-        """Resolve a Python module name to a file path within the repo."""
-        parts = module_name.replace(".", "/")
-        candidates = [
-            Path(repo_path) / f"{parts}.py",
-            Path(repo_path) / parts / "__init__.py",
-        ]
-        for c in candidates:
-            if c.exists():
-                return c
-        return None
-
     def _relativize(self, file_path: str, repo_path: str) -> str:
         """Convert to repo-relative path."""
         try:
@@ -520,21 +604,81 @@ class AnalyzeAgent:
         except Exception:
             return file_path
 
-    def _read_snippet(self, file_path: Path, line_num: int, context: int = 3) -> str:
-        """Read source lines around the error."""
-        try:
-            if not file_path.exists():
-                return ""
-            lines = file_path.read_text(encoding="utf-8", errors="replace").splitlines()
-            start = max(0, line_num - context - 1)
-            end = min(len(lines), line_num + context)
-            result = []
-            for i in range(start, end):
-                marker = ">>>" if i == line_num - 1 else "   "
-                result.append(f"{marker} {i + 1}: {lines[i]}")
-            return "\n".join(result)
-        except Exception:
-            return ""
+    def _read_snippet(self, repo_path: str, file_path: str, line_num: int, context: int = 3) -> str:
+        """Source lines around the error (cached line offsets, O(context))."""
+        return snippet_service.snippet(repo_path, file_path, line_num, context)
+
+class IncrementalAnalyzer:
+    """
+    Strategy 2 while the suite is still running: sandbox output lines are
+    fed to the streaming parser, and each failure is classified (with its
+    snippet) and reported to on_error the moment its section completes.
+
+    Files are only healed once the run is over (tests are still reading
+    them), but by then the runtime errors are ready — close() returns
+    them for AnalyzeAgent.run(runtime_errors=...).
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        on_error: Callable[[ErrorInfo], None] | None = None,
+        agent: AnalyzeAgent | None = None,
+    ):
+        self.repo_path = repo_path
+        self._agent = agent or analyze_agent
+        self._on_error = on_error
+        # id(TestFailure) -> converted ErrorInfo list (empty if filtered out)
+        self._converted: dict[int, list[ErrorInfo]] = {}
+        self._lock = threading.Lock()
+        self._parser = PytestOutputParser(on_failure=self._handle_failure)
+        self._lines = 0  # non-blank lines fed
+
+    def feed_line(self, line: str) -> None:
+        """Sandbox on_line callback."""
+        with self._lock:
+            if line.strip():
+                self._lines += 1
+            self._parser.feed_line(line)
+
+    def _handle_failure(self, failure) -> None:
+        errors = self._agent._errors_from_failures([failure], self.repo_path)
+        self._converted[id(failure)] = errors
+        # FAILED summary lines / tracebacks restate failure sections when
+        # those exist — only surface them live if no section has been seen
+        sections = self._parser.sections
+        if sections and failure is not sections[-1]:
+            return
+        for err in errors:
+            logger.info(f"  [LIVE] {err.bug_type}: {err.file}:{err.line_number} — {err.message[:80]}")
+            if self._on_error is not None:
+                try:
+                    self._on_error(err)
+                except Exception as e:
+                    logger.warning(f"on_error callback failed: {e}")
+
+    def close(self, output: str | None = None) -> list[ErrorInfo] | None:
+        """
+        Runtime errors for the finished run, same precedence as
+        _parse_pytest_output.
+
+        output: the run's captured stdout + stderr. None is returned — so
+        AnalyzeAgent.run() parses the output itself — when the stream
+        delivered nothing or fewer lines than were captured (a broken log
+        stream / exec), since the errors would then be incomplete.
+        """
+        with self._lock:
+            failures = self._parser.close()
+            fed = self._lines
+        captured = sum(1 for line in output.splitlines() if line.strip()) if output is not None else fed
+        if fed == 0 or fed < captured:
+            if captured:
+                logger.warning(f"Output stream incomplete ({fed}/{captured} lines) — parsing the captured output")
+            return None
+        errors: list[ErrorInfo] = []
+        for failure in failures:
+            errors.extend(self._converted.get(id(failure), []))
+        return errors
 
 
 # Singleton
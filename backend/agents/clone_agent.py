@@ -8,7 +8,10 @@ import shutil
 from pathlib import Path
 
 from config import CLONE_DIR
+from services.cancellation import CancelToken
 from services.git_service import git_service
+from services.run_scheduler import run_scheduler
+from services.workspace_manager import workspace_manager
 
 logger = logging.getLogger("rift.clone_agent")
 
@@ -16,20 +19,34 @@ logger = logging.getLogger("rift.clone_agent")
 class CloneAgent:
     """Agent responsible for cloning the target repository."""
 
-    def run(self, repo_url: str, team_name: str) -> str:
+    def run(
+        self,
+        repo_url: str,
+        team_name: str,
+        clone_mode: str = "full",
+        sparse_paths: list[str] | None = None,
+        run_id: str | None = None,
+        cancel: CancelToken | None = None,
+    ) -> str:
         """
-        Clone the repo into CLONE_DIR/<team_name_sanitized>.
+        Clone the repo into <run workspace>/<team_name_sanitized>, or
+        CLONE_DIR/<team_name_sanitized> when no run ID is given.
 
         Args:
             repo_url: GitHub repo URL.
             team_name: Team name (used for folder naming).
+            clone_mode: "full" or "partial" (blobless, for huge repos).
+            sparse_paths: Partial clones only: directories to check out.
+            run_id: Pipeline run ID; gives the run its own workspace.
+            cancel: Run CancelToken; stops the wait for a clone slot.
 
         Returns:
             Absolute path to the cloned repo.
         """
         # Sanitize folder name
         folder_name = team_name.strip().replace(" ", "_").upper()
-        dest = CLONE_DIR / folder_name
+        parent = workspace_manager.allocate(run_id) if run_id else CLONE_DIR
+        dest = parent / folder_name
 
         # Clean up any previous clone — robust for Windows file locks
         if dest.exists():
@@ -40,7 +57,8 @@ class CloneAgent:
         dest.parent.mkdir(parents=True, exist_ok=True)
 
         logger.info(f"Cloning {repo_url} → {dest}")
-        git_service.clone_repo(repo_url, str(dest))
+        with run_scheduler.stage("clone", cancel):
+            git_service.clone_repo(repo_url, str(dest), mode=clone_mode, sparse_paths=sparse_paths)
 
         logger.info(f"Clone complete: {dest}")
         return str(dest)
@@ -4,15 +4,40 @@ RIFT 2026 — Discover Agent
 Scans the cloned repo to detect project type, test framework,
 installs dependencies, and runs the test suite inside a Docker sandbox.
 """
+import json
 import logging
 import os
+from dataclasses import dataclass
 from pathlib import Path
-
-from models import TestOutput
+from typing import Callable
+
+from agents.analyze_agent import IncrementalAnalyzer
+from config import (
+    ENV_MOUNT,
+    INSTALL_STAMP,
+    JEST_REPORT,
+    JUNIT_REPORT,
+    LIVE_PLUGIN,
+    PYTEST_WORKER,
+    PYTEST_WORKER_ENABLED,
+    REPORT_DIR,
+)
+from models import ErrorInfo, TestOutput
+from services.cancellation import CancelToken
 from services.docker_service import docker_service
+from services.env_cache import EnvHandle, env_cache
+from services.file_index import file_index_service
+from services.test_reports import test_report_service
 
 logger = logging.getLogger("rift.discover_agent")
 
+# The install stamp is written as pending before the sandbox run; this
+# command, chained (&&) to the install, promotes it once the install succeeded
+PENDING_STAMP = f"{INSTALL_STAMP}.pending"
+COMMIT_STAMP = (
+    f'python -c "import os; os.replace(\\"{PENDING_STAMP}\\", \\"{INSTALL_STAMP}\\")"'
+)
+
 
 # --- Framework detection patterns ---
 
@@ -32,35 +57,119 @@ NODE_TEST_PATTERNS = [
 ]
 
 
+@dataclass
+class TestPlan:
+    """What discovery found out about a repo (no sandbox involved)."""
+    project_type: str
+    framework: str
+    manifest_hash: str | None  # hash of the dependency manifests, if any
+
+
 class DiscoverAgent:
     """Agent that discovers project type, installs deps, and runs tests."""
 
-    def run(self, repo_path: str) -> TestOutput:
+    def run(
+        self,
+        repo_path: str,
+        on_error: Callable[[ErrorInfo], None] | None = None,
+        reinstall: bool = True,
+        cancel: CancelToken | None = None,
+    ) -> TestOutput:
         """
         Discover and execute the test suite.
 
+        Args:
+            reinstall: Install dependencies even if the environment was
+                already prepared for the same manifests (see execute).
+            cancel: Run CancelToken; cancelling stops the sandbox and
+                raises RunCancelled.
+
         Returns:
             TestOutput with stdout, stderr, exit_code, and parsed pass/fail counts.
         """
-        logger.info(f"Discovering project at {repo_path}")
+        return self.execute(repo_path, self.prepare(repo_path), on_error, reinstall, cancel)
 
+    def prepare(self, repo_path: str) -> TestPlan:
+        """Detect project type, test framework and manifest hash."""
+        logger.info(f"Discovering project at {repo_path}")
         project_type = self._detect_project_type(repo_path)
         framework = self._detect_test_framework(repo_path, project_type)
-        commands = self._build_commands(repo_path, project_type, framework)
-
+        try:
+            manifest_hash = env_cache.manifest_hash(repo_path, project_type)
+        except OSError:
+            manifest_hash = None
         logger.info(f"Project: {project_type}, Framework: {framework}")
+        return TestPlan(project_type, framework, manifest_hash)
+
+    def execute(
+        self,
+        repo_path: str,
+        plan: TestPlan,
+        on_error: Callable[[ErrorInfo], None] | None = None,
+        reinstall: bool = True,
+        cancel: CancelToken | None = None,
+    ) -> TestOutput:
+        """
+        Run the test suite in the sandbox.
+
+        Dependencies are installed into (or reused from) a cached
+        environment keyed by the repo's manifest hash. With
+        reinstall=False the install step is skipped entirely when the
+        last install in this checkout ran against the same manifests and
+        the same still-usable environment — only the tests run.
+
+        Python output is streamed into an IncrementalAnalyzer, so failures
+        are classified (and reported through on_error) while later tests
+        are still running.
+        """
+        docker = docker_service.is_docker_available
+        # A local editable install links the shared env to this workspace:
+        # hold the env exclusively so concurrent runs don't re-point it
+        exclusive = (
+            not docker and plan.project_type == "python"
+            and self._python_install(repo_path)[1]
+        )
+        env = env_cache.acquire(
+            repo_path, plan.project_type, docker, exclusive=exclusive, cancel=cancel
+        )
+        stamp = {
+            "manifest_hash": plan.manifest_hash,
+            "env": env.key if env else None,
+        }
+        install = reinstall or not self._is_prepared(repo_path, stamp, env, docker)
+        commands = self._build_commands(
+            repo_path, plan.project_type, plan.framework, env, install=install
+        )
+        framework = plan.framework
+
         logger.info(f"Commands: {commands}")
 
-        # Run in sandbox
-        result = docker_service.run_sandbox(repo_path, commands)
+        # Run in sandbox (stale structured reports removed first)
+        test_report_service.clear(repo_path)
+        if install:
+            # Written up front (the warm pytest worker keys its state on it),
+            # but only trusted once the install chain has promoted it
+            pending = any(cmd.endswith(COMMIT_STAMP) for cmd in commands)
+            self._write_stamp(repo_path, stamp, pending=pending)
+        analyzer = None
+        if framework in ("pytest", "unittest", "unknown"):
+            analyzer = IncrementalAnalyzer(repo_path, on_error=on_error)
+        try:
+            result = docker_service.run_sandbox(
+                repo_path, commands, on_line=analyzer.feed_line if analyzer else None,
+                env=env, cancel=cancel,
+            )
+        finally:
+            if env is not None:
+                env_cache.release(env)
 
         stdout = result.get("stdout", "")
         stderr = result.get("stderr", "")
         exit_code = result.get("exit_code", -1)
 
-        # Parse test counts from output
+        # Parse test counts (structured report first, then output regexes)
         passed, failed, total = self._parse_test_counts(
-            stdout, stderr, framework
+            stdout, stderr, framework, repo_path
         )
 
         output = TestOutput(
@@ -71,6 +180,7 @@ class DiscoverAgent:
             failed=failed,
             total=total,
             framework=framework,
+            runtime_errors=analyzer.close(stdout + "\n" + stderr) if analyzer else None,
         )
 
         logger.info(
@@ -80,6 +190,40 @@ class DiscoverAgent:
 
     # ---- Internal helpers ----
 
+    def _is_prepared(
+        self, repo_path: str, stamp: dict, env: EnvHandle | None, docker: bool
+    ) -> bool:
+        """Whether the dependencies installed earlier are still valid and reachable."""
+        try:
+            previous = json.loads((Path(repo_path) / INSTALL_STAMP).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if previous != stamp:
+            logger.info("Dependency manifests or environment changed — reinstalling")
+            return False
+        if env is not None:
+            # An editable link in a shared local env may have been re-pointed
+            # at another run's workspace since — always re-link it
+            return env.ready and not env.exclusive
+        # Without a cache entry Docker installs into the container itself,
+        # which survives between calls only while it is pooled
+        return not docker or docker_service.has_warm_sandbox(repo_path)
+
+    def _write_stamp(self, repo_path: str, stamp: dict, pending: bool = False) -> None:
+        """
+        Record the install about to run. pending: the install can fail, so
+        drop the current stamp and leave it to COMMIT_STAMP to install the
+        new one.
+        """
+        path = Path(repo_path) / INSTALL_STAMP
+        try:
+            if pending:
+                path.unlink(missing_ok=True)
+                path = Path(repo_path) / PENDING_STAMP
+            path.write_text(json.dumps(stamp), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Could not write install stamp: {e}")
+
     def _detect_project_type(self, repo_path: str) -> str:
         """Detect if Python or Node project."""
         p = Path(repo_path)
@@ -96,10 +240,11 @@ class DiscoverAgent:
             return "node"
 
         # Fallback: check for .py or .js files
-        py_files = list(p.rglob("*.py"))
-        js_files = list(p.rglob("*.js")) + list(p.rglob("*.ts"))
+        index = file_index_service.get(repo_path)
+        py_count = index.count(".py")
+        js_count = index.count(".js", ".ts")
 
-        if len(py_files) >= len(js_files):
+        if py_count >= js_count:
             return "python"
         return "node"
 
@@ -123,14 +268,16 @@ class DiscoverAgent:
                 if "pytest" in content.lower():
                     return "pytest"
 
+            index = file_index_service.get(repo_path)
+
             # Check for conftest.py (pytest marker)
-            if list(p.rglob("conftest.py")):
+            py_entries = index.files(".py")
+            if any(e.name == "conftest.py" for e in py_entries):
                 return "pytest"
 
             # Check for unittest-style test files
-            for test_file in p.rglob("test_*.py"):
-                content = test_file.read_text(encoding="utf-8", errors="replace")
-                if "unittest" in content:
+            for entry in py_entries:
+                if entry.name.startswith("test_") and "unittest" in entry.text:
                     return "unittest"
 
             return "pytest"  # default for Python
@@ -138,7 +285,6 @@ class DiscoverAgent:
         elif project_type == "node":
             pkg_json = p / "package.json"
             if pkg_json.exists():
-                import json
                 try:
                     pkg = json.loads(pkg_json.read_text(encoding="utf-8"))
                     dev_deps = pkg.get("devDependencies", {})
@@ -169,43 +315,106 @@ class DiscoverAgent:
         return "unknown"
 
     def _build_commands(
-        self, repo_path: str, project_type: str, framework: str
+        self, repo_path: str, project_type: str, framework: str,
+        env: EnvHandle | None = None,
+        install: bool = True,
     ) -> list[str]:
-        """Build install + test commands."""
+        """
+        Build install + test commands (test commands only if not install).
+
+        With a cached environment the install step is skipped when the
+        environment is ready, and otherwise marks it ready on success.
+        """
         commands = []
 
         if project_type == "python":
-            # Install deps
-            p = Path(repo_path)
-            if (p / "requirements.txt").exists():
-                commands.append("pip install -r requirements.txt")
-            elif (p / "Pipfile").exists():
-                commands.append("pip install pipenv && pipenv install --dev")
-            elif (p / "pyproject.toml").exists():
-                commands.append("pip install -e '.[dev,test]' 2>/dev/null || pip install -e .")
-            elif (p / "setup.py").exists():
-                commands.append("pip install -e .")
-
-            # Run tests
+            if install:
+                commands.extend(self._commit_stamp(self._python_install_commands(repo_path, env)))
+
+            # Run tests (pytest also writes a JUnit XML report for the agents
+            # and prints each failure as soon as it happens). The warm worker
+            # takes the same arguments as `python -m pytest`.
+            pytest_exe = (
+                f"python {REPORT_DIR}/{PYTEST_WORKER}.py" if PYTEST_WORKER_ENABLED
+                else "python -m pytest"
+            )
+            pytest_cmd = (
+                f"{pytest_exe} -p {LIVE_PLUGIN} -v --tb=short "
+                f"--junitxml={JUNIT_REPORT} -o junit_family=xunit1 2>&1"
+            )
             if framework == "pytest":
-                commands.append("python -m pytest -v --tb=short 2>&1")
+                commands.append(pytest_cmd)
             elif framework == "unittest":
                 commands.append("python -m unittest discover -v 2>&1")
             else:
-                commands.append("python -m pytest -v --tb=short 2>&1")
+                commands.append(pytest_cmd)
 
         elif project_type == "node":
-            commands.append("npm install")
-            commands.append("npm test 2>&1")
+            if install and env is None:
+                commands.extend(self._commit_stamp(["npm install"]))
+            elif install and not env.ready:
+                commands.extend(self._commit_stamp([f"npm install && {env.ready_command()}"]))
+            if framework == "jest":
+                commands.append(f"npm test -- --json --outputFile={JEST_REPORT} 2>&1")
+            else:
+                commands.append("npm test 2>&1")
 
         return commands
 
+    @staticmethod
+    def _commit_stamp(install_commands: list[str]) -> list[str]:
+        """Chain COMMIT_STAMP to the last install command (run only if it succeeds)."""
+        if not install_commands:
+            return []
+        return install_commands[:-1] + [f"{install_commands[-1]} && {COMMIT_STAMP}"]
+
+    def _python_install(self, repo_path: str) -> tuple[str | None, bool]:
+        """Install command for a Python project, and whether it installs the project editable."""
+        p = Path(repo_path)
+        if (p / "requirements.txt").exists():
+            return "pip install -r requirements.txt", False
+        if (p / "Pipfile").exists():
+            return "pip install pipenv && pipenv install --dev", False
+        if (p / "pyproject.toml").exists():
+            return 'pip install -e ".[dev,test]" 2>/dev/null || pip install -e .', True
+        if (p / "setup.py").exists():
+            return "pip install -e .", True
+        return None, False
+
+    def _python_install_commands(self, repo_path: str, env: EnvHandle | None) -> list[str]:
+        """Dependency install commands for a Python project."""
+        install, editable = self._python_install(repo_path)
+        if install is None:
+            return []
+        if env is None:
+            return [install]
+        if env.ready:
+            # Dependencies are cached; only re-link the project itself
+            return ["pip install --no-deps -e ."] if editable else []
+
+        commands = []
+        if docker_service.is_docker_available:
+            # The venv lives in the mounted cache entry and must be built by
+            # the image's interpreter (python3, so bash does not hash
+            # "python" before the venv exists)
+            venv = f"{ENV_MOUNT}/venv"
+            commands.append(
+                f"[ -x {venv}/bin/python ] || python3 -m venv --system-site-packages {venv}"
+            )
+        commands.append(f"({install}) && {env.ready_command()}")
+        return commands
+
     def _parse_test_counts(
-        self, stdout: str, stderr: str, framework: str
+        self, stdout: str, stderr: str, framework: str, repo_path: str | None = None
     ) -> tuple[int, int, int]:
-        """Parse pass/fail/total counts from test output."""
+        """Parse pass/fail/total counts — structured report first, then output."""
         import re
 
+        if repo_path:
+            report = test_report_service.load(repo_path, framework)
+            if report is not None and report.total > 0:
+                return report.passed, report.failed, report.total
+
         combined = stdout + "\n" + stderr
         passed = 0
         failed = 0
@@ -4,8 +4,8 @@ RIFT 2026 — Heal Agent  (v2 — "Fix & Verify" approach)
 NEW APPROACH:
   1. Read the broken file and understand the error context
   2. Apply a targeted fix based on error type
-  3. VERIFY with py_compile that the fix actually works
-  4. If verification fails, revert and try an alternative fix
+  3. VERIFY in memory (compile service) that the fix actually works
+  4. Only write the file once a candidate verifies; otherwise try an alternative fix
   5. NEVER comment out imports — fix the actual source problem
 
 Key principles:
@@ -16,7 +16,6 @@ Key principles:
 """
 import logging
 import os
-import py_compile
 import re
 import difflib
 from pathlib import Path
@@ -24,6 +23,10 @@ from pathlib import Path
 from git import Repo
 
 from models import BugType, ErrorInfo, Fix, FixStatus
+from services.compile_service import compile_service
+from services.file_index import file_index_service
+from services.module_index import module_index_service
+from services.symbol_table import symbol_table_service
 from services.git_service import git_service
 from utils import format_branch_name, format_commit_message
 
@@ -105,9 +108,8 @@ class HealAgent:
             logger.warning(f"File not found: {error.file}")
             return None
 
-        try:
-            original_content = file_path.read_text(encoding="utf-8", errors="replace")
-        except Exception:
+        original_content = file_index_service.get(repo_path).read_text(error.file)
+        if original_content is None:
             return None
 
         lines = original_content.splitlines(keepends=True)
@@ -135,11 +137,10 @@ class HealAgent:
                     target_rel, target_line_str, target_code = parts[0], parts[1], parts[2]
                     target_line = int(target_line_str)
                     
-                    target_path = Path(repo_path) / target_rel
-                    target_content = target_path.read_text(encoding="utf-8", errors="replace")
+                    target_content = file_index_service.get(repo_path).read_text(target_rel)
                     target_lines_list = target_content.splitlines(keepends=True)
                     target_lines_list[target_line - 1] = target_code + "\n"
-                    target_path.write_text("".join(target_lines_list), encoding="utf-8")
+                    self._write_file(repo_path, target_rel, "".join(target_lines_list))
                     
                     return Fix(
                         file=target_rel,
@@ -157,16 +158,14 @@ class HealAgent:
             if fixed_line.rstrip() == original_line.rstrip():
                 continue  # No-op, skip
 
-            # Apply and verify
+            # Build candidate and verify it in memory before touching disk
             new_lines = list(lines)
             new_lines[error.line_number - 1] = fixed_line if fixed_line.endswith("\n") else fixed_line + "\n"
             new_content = "".join(new_lines)
 
-            file_path.write_text(new_content, encoding="utf-8")
-
-            # Verify with py_compile (for Python files)
             if file_path.suffix == ".py":
-                if self._verify_syntax(file_path):
+                if self._verify_syntax(new_content, str(file_path)):
+                    self._write_file(repo_path, error.file, new_content)
                     logger.info(f"  [{strategy_name}] Fix verified for {error.file}:{error.line_number}")
                     return Fix(
                         file=error.file,
@@ -177,12 +176,11 @@ class HealAgent:
                         status=FixStatus.PENDING,
                     )
                 else:
-                    # Revert — this fix didn't work
-                    file_path.write_text(original_content, encoding="utf-8")
-                    logger.info(f"  [{strategy_name}] Fix FAILED verification, reverting")
+                    logger.info(f"  [{strategy_name}] Fix FAILED verification, discarding")
                     continue
             else:
-                # Non-Python: apply without py_compile verification
+                # Non-Python: apply without compile verification
+                self._write_file(repo_path, error.file, new_content)
                 return Fix(
                     file=error.file,
                     bug_type=error.bug_type,
@@ -192,8 +190,7 @@ class HealAgent:
                     status=FixStatus.PENDING,
                 )
 
-        # All strategies failed — revert to original
-        file_path.write_text(original_content, encoding="utf-8")
+        # All strategies failed — nothing was written, file is untouched
         logger.warning(f"All fix strategies failed for {error.file}:{error.line_number}")
         return None
 
@@ -246,15 +243,19 @@ class HealAgent:
         else:
             return common
 
+    def _write_file(self, repo_path: str, rel_path: str, content: str) -> None:
+        """Write a file and refresh it in the run's file index."""
+        (Path(repo_path) / rel_path).write_text(content, encoding="utf-8")
+        file_index_service.refresh(repo_path, [rel_path])
+
     # ==================== Verification ====================
 
-    def _verify_syntax(self, file_path: Path) -> bool:
-        """Check if a Python file compiles without syntax errors."""
+    def _verify_syntax(self, source: str, filename: str) -> bool:
+        """Check if Python source compiles (in memory, cached by content hash)."""
         try:
-            py_compile.compile(str(file_path), doraise=True)
-            return True
-        except py_compile.PyCompileError:
-            return False
+            # Hashed as UTF-8 bytes — the same bytes _write_file produces, so
+            # the next analyze scan of this version is a cache hit
+            return compile_service.check(source, filename).ok
         except Exception:
             return False
 
@@ -481,71 +482,49 @@ class HealAgent:
         if not func_name:
             return None
 
-        # Search ALL source files (non-test) in the repo for this function
-        repo = Path(repo_path)
-
-        target_file = None
-        func_line_idx = -1
-        func_end_idx = -1
-        src_lines = []
-
-        for py_file in sorted(repo.rglob("*.py")):
-            rel = str(py_file.relative_to(repo)).replace("\\", "/")
-            if "test" in rel.lower() or "__pycache__" in rel or ".venv" in rel or "node_modules" in rel:
-                continue
-            try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
-                file_lines = content.splitlines(keepends=False)
-                for i, sl in enumerate(file_lines):
-                    if re.match(rf'^\s*def\s+{re.escape(func_name)}\s*\(', sl):
-                        target_file = py_file
-                        func_line_idx = i
-                        src_lines = file_lines
-                        # Find end of function (next def or end of file)
-                        indent = len(sl) - len(sl.lstrip())
-                        for k in range(i + 1, len(file_lines)):
-                            stripped = file_lines[k].strip()
-                            if stripped and not stripped.startswith('#') and not stripped.startswith('"""'):
-                                line_indent = len(file_lines[k]) - len(file_lines[k].lstrip())
-                                if line_indent <= indent and stripped:
-                                    func_end_idx = k
-                                    break
-                        if func_end_idx == -1:
-                            func_end_idx = len(file_lines)
-                        break
-            except Exception:
-                continue
-            if target_file:
-                break
+        # Look the function up in the repo symbol table (non-test files only)
+        symbol = next(
+            (
+                sym for sym in symbol_table_service.get(repo_path).lookup(func_name, kind="function")
+                if "test" not in sym.file.lower()
+            ),
+            None,
+        )
+        if symbol is None:
+            return None
 
-        if not target_file or func_line_idx == -1:
+        target_file = symbol.file
+        src_text = file_index_service.get(repo_path).read_text(target_file)
+        if src_text is None:
             return None
+        src_lines = src_text.splitlines(keepends=False)
+        # 0-based [first body line, end of function) from the AST positions
+        body_start_idx = symbol.body_lineno - 1
+        func_end_idx = min(symbol.end_lineno, len(src_lines))
 
         # Scan function body for arithmetic operator and try flipping
         # PRIORITIZE return lines over assignment lines to avoid flipping the wrong operator
         op_pairs = [(' + ', ' - '), (' - ', ' + '), (' * ', ' / '), (' / ', ' * ')]
 
         # Pass 1: Check return statements first (most likely location of wrong operator)
-        for body_idx in range(func_line_idx + 1, func_end_idx):
+        for body_idx in range(body_start_idx, func_end_idx):
             body_line = src_lines[body_idx]
             if 'return' not in body_line:
                 continue
             for old_op, new_op in op_pairs:
                 if old_op in body_line:
                     fixed_line = body_line.replace(old_op, new_op, 1)
-                    target_rel = str(target_file.relative_to(repo_path)).replace("\\", "/")
-                    return f"__CROSSFILE__ {target_rel}|||{body_idx + 1}|||{fixed_line}"
+                    return f"__CROSSFILE__ {target_file}|||{body_idx + 1}|||{fixed_line}"
 
         # Pass 2: Fall back to assignment lines only if no return line had operators
-        for body_idx in range(func_line_idx + 1, func_end_idx):
+        for body_idx in range(body_start_idx, func_end_idx):
             body_line = src_lines[body_idx]
             if 'return' in body_line or '=' not in body_line:
                 continue
             for old_op, new_op in op_pairs:
                 if old_op in body_line:
                     fixed_line = body_line.replace(old_op, new_op, 1)
-                    target_rel = str(target_file.relative_to(repo_path)).replace("\\", "/")
-                    return f"__CROSSFILE__ {target_rel}|||{body_idx + 1}|||{fixed_line}"
+                    return f"__CROSSFILE__ {target_file}|||{body_idx + 1}|||{fixed_line}"
 
         return None
 
@@ -560,7 +539,7 @@ class HealAgent:
             if error.line_number < 1 or error.line_number > len(lines):
                 return False
             lines[error.line_number - 1] = fix.fixed_code + "\n"
-            file_path.write_text("".join(lines), encoding="utf-8")
+            self._write_file(repo_path, error.file, "".join(lines))
             return True
         except Exception as e:
             logger.error(f"Failed to apply fix to {error.file}: {e}")
@@ -580,18 +559,13 @@ class HealAgent:
         broken_name = m.group(1)
         module_name = m.group(2)
 
-        # Resolve module path
-        try:
-            parts = module_name.replace(".", "/")
-            source_file = Path(repo_path) / f"{parts}.py"
-            if not source_file.exists():
-                source_file = Path(repo_path) / parts / "__init__.py"
-            
-            if not source_file.exists():
-                return None
-                
-            source_code = source_file.read_text(encoding="utf-8", errors="replace")
-        except Exception:
+        # Resolve module path (src/ layouts, configured package dirs, ...)
+        source_file = module_index_service.resolve(repo_path, module_name)
+        if not source_file:
+            return None
+
+        source_code = file_index_service.get(repo_path).read_text(source_file)
+        if source_code is None:
             return None
 
         # Find exported names in source
@@ -669,24 +643,18 @@ class HealAgent:
                     fixed_line = line.rstrip() + f' as {undefined_name}'
                     return f"__CROSSFILE__ {error_file_rel}|||{i + 1}|||{fixed_line}"
         
-        # Case 3: Name not found in imports at all — try to find it in source files
-        repo = Path(repo_path)
-        for py_file in sorted(repo.rglob("*.py")):
-            rel = str(py_file.relative_to(repo)).replace("\\", "/")
-            if "test" in rel.lower() or "__pycache__" in rel:
+        # Case 3: Name not found in imports at all — look up a top-level definition
+        for symbol in symbol_table_service.get(repo_path).lookup(undefined_name, top_level=True):
+            rel = symbol.file
+            if "test" in rel.lower():
                 continue
-            try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
-                if re.search(rf'^(def|class)\s+{re.escape(undefined_name)}\s*[\(:]', content, re.MULTILINE):
-                    module_path = rel.replace('/', '.').replace('.py', '')
-                    import_line = f'from {module_path} import {undefined_name}'
-                    # Prepend import to the error file — replace line 1 with import + original line 1
-                    first_line = lines[0].rstrip() if lines else ''
-                    combined = import_line + '\n' + first_line
-                    return f"__CROSSFILE__ {error_file_rel}|||1|||{combined}"
-            except Exception:
-                continue
-        
+            module_path = rel.replace('/', '.').replace('.py', '')
+            import_line = f'from {module_path} import {undefined_name}'
+            # Prepend import to the error file — replace line 1 with import + original line 1
+            first_line = lines[0].rstrip() if lines else ''
+            combined = import_line + '\n' + first_line
+            return f"__CROSSFILE__ {error_file_rel}|||1|||{combined}"
+
         return None
 
 
@@ -731,33 +699,35 @@ class HealAgent:
         if "none" not in msg:
             return None
         
-        # 2. Search ALL .py source files for functions with exec() that lack return
-        repo = Path(repo_path)
-        
-        for py_file in sorted(repo.rglob("*.py")):
+        # 2. Search source functions (symbol table) for exec() calls that lack return
+        index = file_index_service.get(repo_path)
+        for symbol in symbol_table_service.get(repo_path).functions_with_exec():
             # Skip test files — we want source files
-            rel = str(py_file.relative_to(repo)).replace("\\", "/")
-            if "test" in rel.lower() or "__pycache__" in rel or ".venv" in rel or "node_modules" in rel:
+            rel = symbol.file
+            if "test" in rel.lower():
                 continue
-            
-            try:
-                content = py_file.read_text(encoding="utf-8", errors="replace")
-            except Exception:
+
+            content = index.read_text(rel)
+            if content is None:
                 continue
-            
+
             src_lines = content.splitlines(keepends=False)
-            
-            for i, sl in enumerate(src_lines):
+
+            for exec_line in symbol.exec_lines:
+                i = exec_line - 1
+                if i >= len(src_lines):
+                    continue
+                sl = src_lines[i]
                 if "exec(" not in sl:
                     continue
-                    
+
                 original_exec_line = sl
                 exec_line_idx = i
-                
+
                 # Skip if already patched
                 if "_ns" in original_exec_line:
                     continue
-                
+
                 # Detect inner function name from string definition near exec()
                 inner_name = None
                 for j in range(max(0, exec_line_idx - 15), min(len(src_lines), exec_line_idx + 2)):
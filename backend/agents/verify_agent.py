@@ -4,8 +4,10 @@ RIFT 2026 — Verify Agent
 Re-runs the test suite on the fixed branch to check if fixes resolved the errors.
 """
 import logging
+from typing import Callable
 
-from models import TestOutput
+from models import ErrorInfo, TestOutput
+from services.cancellation import CancelToken
 from services.docker_service import docker_service
 from agents.discover_agent import DiscoverAgent
 
@@ -18,17 +20,25 @@ class VerifyAgent:
     def __init__(self):
         self._discover = DiscoverAgent()
 
-    def run(self, repo_path: str) -> TestOutput:
+    def run(
+        self,
+        repo_path: str,
+        on_error: Callable[[ErrorInfo], None] | None = None,
+        cancel: CancelToken | None = None,
+    ) -> TestOutput:
         """
         Re-run the full test suite on the fixed branch.
 
+        Dependencies are not reinstalled unless a fix changed a dependency
+        manifest (or the prepared environment is gone) — only the tests run.
+
         Returns:
             TestOutput with updated pass/fail counts.
         """
         logger.info(f"Verifying fixes in {repo_path}")
 
         # Re-use discover agent's detection and execution logic
-        output = self._discover.run(repo_path)
+        output = self._discover.run(repo_path, on_error=on_error, reinstall=False, cancel=cancel)
 
         if output.exit_code == 0 and output.failed == 0:
             logger.info("All tests PASSED!")
@@ -0,0 +1,132 @@
+"""
+RIFT 2026 — Benchmark: full vs partial vs partial+sparse clone
+
+Builds a bare repository that stands in for a huge remote: a small
+source tree (src/, tests/) next to a large data/ directory whose binary
+blobs are rewritten over many commits, so most of the history's bytes
+are data the tests never read. It is served through file:// (the same
+pack protocol as a real remote) with uploadpack.allowFilter enabled.
+
+Each clone mode goes through GitService.clone_repo (the full mode
+directly, without the mirror cache) and reports wall time and the size
+of the clone's .git directory. Afterwards a fix is committed and pushed
+from the partial+sparse clone to check that the heal/commit/push path
+still works without full history contents.
+
+Usage (from backend/):
+    python benchmarks/bench_partial_clone.py [--commits 60] [--blob-kb 512] [--blobs 8]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ["RIFT_MIRROR_CACHE"] = "0"  # measure the transfer itself
+
+from services.git_service import GitService  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def git(*args: str, cwd: Path) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd, check=True, capture_output=True,
+    )
+
+
+def build_remote(root: Path, commits: int, blob_kb: int, blobs: int) -> Path:
+    work = root / "work"
+    (work / "src").mkdir(parents=True)
+    (work / "tests").mkdir()
+    (work / "data").mkdir()
+    git("init", "-q", "-b", "main", cwd=work)
+    (work / "requirements.txt").write_text("pytest\n")
+    for n in range(commits):
+        (work / "src" / "calc.py").write_text(f"def add(a, b):\n    return a + b  # rev {n}\n")
+        (work / "tests" / "test_calc.py").write_text(
+            "from src.calc import add\n\n\ndef test_add():\n    assert add(1, 2) == 3\n"
+        )
+        for b in range(blobs):
+            # Incompressible, so every revision costs its full size
+            (work / "data" / f"asset_{b}.bin").write_bytes(os.urandom(blob_kb * 1024))
+        git("add", "-A", cwd=work)
+        git("commit", "-q", "-m", f"revision {n}", cwd=work)
+
+    remote = root / "remote.git"
+    git("clone", "-q", "--bare", str(work), str(remote), cwd=root)
+    git("config", "uploadpack.allowFilter", "true", cwd=remote)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=remote)
+    shutil.rmtree(work)
+    return remote
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commits", type=int, default=60)
+    parser.add_argument("--blob-kb", type=int, default=512, help="size of each data blob")
+    parser.add_argument("--blobs", type=int, default=8, help="data blobs rewritten per commit")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="rift_bench_clone_"))
+    try:
+        print("Building stand-in remote...")
+        remote = build_remote(tmp, args.commits, args.blob_kb, args.blobs)
+        url = remote.resolve().as_uri()  # file:// — the transfer goes through upload-pack
+        print(f"remote: {args.commits} commits, {dir_size(remote) / MB:.1f} MB packed\n")
+
+        service = GitService()
+        print(f"{'mode':<18} {'time':>8} {'.git size':>11} {'worktree files':>15}")
+        results = {}
+        for label, mode, sparse in (
+            ("full", "full", None),
+            ("partial", "partial", None),
+            ("partial + sparse", "partial", ["src", "tests"]),
+        ):
+            dest = tmp / label.replace(" + ", "_")
+            start = time.perf_counter()
+            service.clone_repo(url, str(dest), mode=mode, sparse_paths=sparse)
+            elapsed = time.perf_counter() - start
+            size = dir_size(dest / ".git")
+            files = sum(1 for f in dest.rglob("*") if f.is_file() and ".git" not in f.parts)
+            results[label] = (elapsed, size)
+            print(f"{label:<18} {elapsed:7.2f}s {size / MB:9.1f} MB {files:>15}")
+
+        full_t, full_b = results["full"]
+        for label in ("partial", "partial + sparse"):
+            t, b = results[label]
+            print(f"{label}: {full_b / max(b, 1):.0f}x fewer bytes, {full_t / max(t, 1e-9):.1f}x faster than full")
+
+        # The heal path on the sparse clone: branch, commit a fix, push
+        dest = tmp / "partial_sparse"
+        repo = service.get_repo(str(dest))
+        repo.git.checkout("-b", "BENCH_TEAM_BENCH_LEADER_AI_Fix")
+        calc = dest / "src" / "calc.py"
+        calc.write_text(calc.read_text().replace("a + b", "b + a"))
+        with repo.config_writer() as cw:
+            cw.set_value("user", "name", "bench")
+            cw.set_value("user", "email", "bench@example.com")
+        service.commit_fix(repo, "src/calc.py", "Fix LOGIC error in src/calc.py line 2")
+        pushed = service.push(repo, "BENCH_TEAM_BENCH_LEADER_AI_Fix")
+        missing = subprocess.run(
+            ["git", "rev-list", "--objects", "--all", "--missing=print"],
+            cwd=dest, capture_output=True, text=True,
+        ).stdout.count("\n?")
+        print(f"\ncommit + push from the sparse clone: {'ok' if pushed else 'FAILED'} "
+              f"({missing} blobs still not downloaded)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
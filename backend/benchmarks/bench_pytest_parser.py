@@ -0,0 +1,238 @@
+"""
+RIFT 2026 — Benchmark: streaming pytest output parser vs the regex parser
+
+Writes synthetic console logs of the requested sizes (10MB and 100MB by
+default) and parses each one with
+  - the streaming parser (services/pytest_output.py), fed line by line
+    from the file, and
+  - the previous regex parser (re.split over the whole log, then a
+    re.DOTALL traceback regex as fallback), run in a subprocess under a
+    timeout because it can go quadratic.
+
+Three log shapes:
+  pytest      --tb=short failure sections + short summary (pattern 1);
+              both parsers must report identical failures
+  traceback   plain Python tracebacks, some cut off before their final
+              error line (e.g. a killed run) — the fallback pattern 3 path.
+              The regex's DOTALL (.+) swallows the rest of the log into a
+              single record; the streaming parser reports one per traceback
+  hang        faulthandler / pytest-timeout stack dumps with no error line
+              at all — every "File" line makes the regex scan to the end of
+              the log (quadratic); expect it to hit the timeout
+
+Usage (from backend/):
+    python benchmarks/bench_pytest_parser.py [--sizes 10 100] [--timeout 120]
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.pytest_output import PytestOutputParser  # noqa: E402
+
+MB = 1024 * 1024
+
+
+# ---------- Synthetic logs ----------
+
+def _pytest_section(n: int) -> str:
+    return (
+        f"_____________________________ test_case_{n} _____________________________\n"
+        f"tests/test_mod_{n % 50}.py:{10 + n % 90}: in test_case_{n}\n"
+        f"    assert compute_{n % 7}({n}, 2) == {n + 2}\n"
+        f"src/pkg/module_{n % 13}.py:{20 + n % 40}: in compute_{n % 7}\n"
+        f"    return helper(a) - b\n"
+        f"src/pkg/helpers.py:{5 + n % 30}: in helper\n"
+        f"    return values[a]\n"
+        f"E   IndexError: list index out of range (case {n})\n"
+    )
+
+
+def write_pytest_log(path: Path, size: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("============================= test session starts ==============================\n")
+        written, n = 0, 0
+        # Progress lines, then one failure section per 20 tests
+        while written < size * 0.9:
+            chunk = "".join(
+                f"tests/test_mod_{(n + i) % 50}.py::test_case_{n + i} PASSED   [ 42%]\n"
+                for i in range(19)
+            )
+            chunk += f"tests/test_mod_{n % 50}.py::test_case_{n} FAILED   [ 42%]\n"
+            f.write(chunk)
+            written += len(chunk)
+            n += 20
+        f.write("=================================== FAILURES ===================================\n")
+        sections = n // 20
+        for i in range(sections):
+            f.write(_pytest_section(i * 20))
+        f.write("=========================== short test summary info ============================\n")
+        for i in range(sections):
+            f.write(f"FAILED tests/test_mod_{i % 50}.py::test_case_{i * 20} - IndexError: list index out of range\n")
+        f.write(f"======================== {sections} failed in 12.34s ========================\n")
+
+
+def write_traceback_log(path: Path, size: int, depth: int = 40) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        written, n = 0, 0
+        while written < size:
+            lines = ["Traceback (most recent call last):\n"]
+            for d in range(depth):
+                lines.append(f'  File "/app/src/pkg/mod_{d % 9}.py", line {d + 1}, in f{d}\n')
+                lines.append(f"    return f{d + 1}(x)\n")
+            # every 4th traceback is truncated (process killed mid-print)
+            if n % 4:
+                lines.append(f"RuntimeError: failure #{n}\n")
+            lines.append("log: continuing with next case\n")
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+            n += 1
+
+
+def write_hang_log(path: Path, size: int, depth: int = 40) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        written, n = 0, 0
+        while written < size:
+            lines = ["+++++++++++++++++++ Timeout +++++++++++++++++++\n",
+                     f"Thread 0x{n:012x} (most recent call first):\n"]
+            for d in range(depth):
+                lines.append(f'  File "/app/src/pkg/mod_{d % 9}.py", line {d + 1} in f{d}\n')
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+            n += 1
+
+
+# ---------- Previous regex parser (verbatim logic, raw records) ----------
+
+def legacy_parse(text: str) -> list[tuple[str, int, str, str]]:
+    errors = []
+
+    # Pattern 1: pytest FAILURES block
+    for block in re.split(r'_{5,}\s+(\w+)\s+_{5,}', text):
+        err_match = re.search(r'E\s+(\w+(?:Error|Exception)):\s*(.+)', block)
+        assert_match = None
+        if not err_match:
+            assert_match = re.search(r'E\s+(assert\s+.+)', block)
+        if not err_match and not assert_match:
+            continue
+        if err_match:
+            err_type, err_msg = err_match.group(1), err_match.group(2).strip()
+        else:
+            err_type, err_msg = "AssertionError", assert_match.group(1).strip()
+        frame_refs = re.findall(r'([\w\\/._-]+\.py):(\d+):', block)
+        if not frame_refs:
+            continue
+        file_path, line_num = frame_refs[-1]
+        file_path = file_path.replace("\\", "/")
+        if "site-packages" in file_path or "lib/python" in file_path.lower():
+            continue
+        errors.append((file_path, int(line_num), err_type, err_msg))
+
+    # Pattern 2: Short summary
+    if not errors:
+        for match in re.finditer(
+            r'FAILED\s+([\w/\\._-]+\.py)::\w+\s*-\s*(\w+(?:Error|Exception)):\s*(.+)', text
+        ):
+            errors.append((match.group(1).replace("\\", "/"), 0, match.group(2), match.group(3).strip()))
+
+    # Pattern 3: Generic Python traceback
+    if not errors:
+        for match in re.finditer(
+            r'File\s+"([^"]+)",\s+line\s+(\d+).*?\n\s*(\w+(?:Error|Exception)):\s*(.+)',
+            text, re.DOTALL
+        ):
+            file_path = match.group(1).replace("\\", "/")
+            if "site-packages" in file_path:
+                continue
+            errors.append((file_path, int(match.group(2)), match.group(3), match.group(4).strip()))
+
+    return errors
+
+
+def legacy_worker(log_path: str) -> None:
+    """Subprocess entry point: parse with the regex parser, print JSON."""
+    text = Path(log_path).read_text(encoding="utf-8")
+    start = time.perf_counter()
+    errors = legacy_parse(text)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"elapsed": elapsed, "errors": errors}))
+
+
+def run_legacy(log_path: Path, timeout: float) -> tuple[float | None, list | None]:
+    try:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--legacy-worker", str(log_path)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return None, None
+    if proc.returncode != 0:
+        raise RuntimeError(f"legacy parser failed: {proc.stderr[-2000:]}")
+    data = json.loads(proc.stdout)
+    return data["elapsed"], [tuple(e) for e in data["errors"]]
+
+
+def run_streaming(log_path: Path) -> tuple[float, list]:
+    start = time.perf_counter()
+    parser = PytestOutputParser()
+    with open(log_path, encoding="utf-8") as f:
+        parser.feed_lines(f)
+    failures = parser.close()
+    elapsed = time.perf_counter() - start
+    return elapsed, [(f.file, f.line_number, f.error_type, f.message) for f in failures]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100], help="log sizes in MB")
+    parser.add_argument("--timeout", type=float, default=120, help="regex parser timeout (s)")
+    parser.add_argument("--legacy-worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.legacy_worker:
+        legacy_worker(args.legacy_worker)
+        return
+
+    tmp = Path(tempfile.mkdtemp(prefix="rift_bench_parser_"))
+    try:
+        print(f"{'log':<18} {'streaming':>10} {'regex':>12} {'failures':>10}  match")
+        for size_mb in args.sizes:
+            for shape, writer in (
+                ("pytest", write_pytest_log),
+                ("traceback", write_traceback_log),
+                ("hang", write_hang_log),
+            ):
+                log_path = tmp / f"{shape}_{size_mb}mb.log"
+                writer(log_path, size_mb * MB)
+
+                stream_s, stream_errors = run_streaming(log_path)
+                legacy_s, legacy_errors = run_legacy(log_path, args.timeout)
+
+                legacy_col = f"{legacy_s:10.2f}s" if legacy_s is not None else f">{args.timeout:.0f}s (killed)"
+                if legacy_errors is None:
+                    match = "n/a"
+                elif shape == "pytest":
+                    assert stream_errors == legacy_errors, f"{log_path.name}: parsers disagree"
+                    match = "identical"
+                else:
+                    # pattern 3 now attributes each traceback to its deepest frame
+                    match = f"{len(legacy_errors)} (regex)"
+                label = f"{shape} {os.path.getsize(log_path) / MB:.0f}MB"
+                print(f"{label:<18} {stream_s:9.2f}s {legacy_col:>12} {len(stream_errors):>10}  {match}")
+                log_path.unlink()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
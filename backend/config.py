@@ -15,13 +15,51 @@ if os.environ.get("VERCEL"):
     TEMP_DIR = Path(tempfile.gettempdir())
     CLONE_DIR = TEMP_DIR / "cloned_repos"
     RESULTS_PATH = TEMP_DIR / "results.json"
+    RESULTS_DB = TEMP_DIR / "results" / "runs.db"
+    EVENTS_DIR = TEMP_DIR / "results" / "events"
+    ENV_CACHE_DIR = TEMP_DIR / "env_cache"
+    MIRROR_DIR = TEMP_DIR / "git_mirrors"
 else:
     # Local development default
     CLONE_DIR = BACKEND_DIR / "cloned_repos"
     RESULTS_PATH = PROJECT_ROOT / "results.json"
+    RESULTS_DB = PROJECT_ROOT / "results" / "runs.db"
+    EVENTS_DIR = PROJECT_ROOT / "results" / "events"
+    ENV_CACHE_DIR = BACKEND_DIR / "env_cache"
+    MIRROR_DIR = BACKEND_DIR / "git_mirrors"
 
 # --- Healing Pipeline ---
 MAX_ITERATIONS = 5          # default: 5 as per hackathon spec
+MAX_CONCURRENT_RUNS = int(os.environ.get("RIFT_MAX_CONCURRENT_RUNS", 4))
+
+# --- Run Scheduler ---
+RUN_QUEUE_SIZE = int(os.environ.get("RIFT_RUN_QUEUE_SIZE", 32))   # waiting runs before 429
+MAX_RUNS_PER_TEAM = int(os.environ.get("RIFT_MAX_RUNS_PER_TEAM", 2))  # running at once
+RUN_DURATION_ESTIMATE = 180  # seconds, until real run times are measured (Retry-After)
+# Concurrent pipeline stages across all runs
+STAGE_LIMITS = {
+    "clone": int(os.environ.get("RIFT_CLONE_CONCURRENCY", 2)),
+    "sandbox": int(os.environ.get("RIFT_SANDBOX_CONCURRENCY", 2)),
+    "analysis": int(os.environ.get("RIFT_ANALYSIS_CONCURRENCY", 2)),
+}
+
+# --- Run Workspaces (one checkout dir per run ID) ---
+WORKSPACE_DIR = CLONE_DIR / "runs"
+# tmpfs root used instead when available ("auto"), forced ("1") or never ("0")
+WORKSPACE_TMPFS = os.environ.get("RIFT_WORKSPACE_TMPFS", "auto")
+WORKSPACE_TMPFS_DIR = Path("/dev/shm/rift-workspaces")
+WORKSPACE_TMPFS_MIN_FREE = 4 * 1024 ** 3   # "auto" skips smaller tmpfs mounts
+WORKSPACE_QUOTA_BYTES = int(float(os.environ.get("RIFT_WORKSPACE_QUOTA_GB", 20)) * 1024 ** 3)
+WORKSPACE_TTL_SECONDS = 3600   # finished workspaces are kept this long
+WORKSPACE_GC_INTERVAL = 60     # seconds between background GC passes
+
+# --- Results API ---
+RESULTS_CACHE_SIZE = 256        # serialized run results kept in memory
+RESULTS_GZIP_MIN_BYTES = 1024   # larger result bodies are also kept gzipped
+# SSE: a run nobody is streaming for this long (after a disconnect) is cancelled
+SSE_RECONNECT_GRACE = 30
+SSE_BUFFER_SIZE = 1024  # recent events per run kept in memory for subscribers
+EVENT_LOG_MAX_AGE = 7 * 24 * 3600  # per-run event logs are pruned after this
 
 # --- Scoring ---
 BASE_SCORE = 100
@@ -30,13 +68,48 @@ TIME_BONUS_THRESHOLD = 300  # 5 minutes in seconds
 COMMIT_PENALTY = 2       # -2 per commit over threshold
 COMMIT_THRESHOLD = 20    # penalty kicks in after this many commits
 
+# --- Analysis ---
+COMPILE_CACHE_SIZE = 20000  # compile results cached by content hash
+# Parallel syntax scan: shard files across a process pool on big repos
+SYNTAX_SCAN_WORKERS = int(os.environ.get("RIFT_SCAN_WORKERS", os.cpu_count() or 1))
+SYNTAX_SCAN_CHUNK_SIZE = int(os.environ.get("RIFT_SCAN_CHUNK_SIZE", 64))
+SYNTAX_SCAN_PARALLEL_MIN_FILES = 500  # below this, a serial scan is faster
+SNIPPET_OFFSET_CACHE_SIZE = 256  # files whose mmap line offsets are cached
+SNIPPET_MMAP_MIN_BYTES = 1_000_000  # larger files are sliced via mmap
+
 # --- Docker Sandbox ---
 SANDBOX_IMAGE = "rift-sandbox:latest"
 SANDBOX_TIMEOUT = 120    # seconds per sandbox run
+# Warm containers kept between a run's discover / verify calls (0 disables)
+SANDBOX_POOL_SIZE = int(os.environ.get("RIFT_SANDBOX_POOL_SIZE", 4))
+SANDBOX_POOL_IDLE_SECONDS = 600  # idle containers are removed after this
+
+# --- Dependency Environment Cache ---
+# Installed venvs / node_modules reused across runs, keyed by manifest hash
+ENV_CACHE_ENABLED = os.environ.get("RIFT_ENV_CACHE", "1") != "0"
+ENV_CACHE_MAX_BYTES = int(float(os.environ.get("RIFT_ENV_CACHE_MAX_GB", 10)) * 1024 ** 3)
+ENV_CACHE_STALE_SECONDS = 3600  # unfinished builds older than this are removed
+ENV_MOUNT = "/opt/rift-env"     # where the entry is mounted in the sandbox
+
+# --- Structured Test Reports (written inside the cloned repo) ---
+REPORT_DIR = ".rift"
+JUNIT_REPORT = f"{REPORT_DIR}/junit.xml"
+JEST_REPORT = f"{REPORT_DIR}/jest-report.json"
+# Manifest hash + environment the last dependency install ran against
+INSTALL_STAMP = f"{REPORT_DIR}/install.json"
+# pytest plugin (services/pytest_live.py) copied next to the reports so
+# failures are printed as they happen; loaded with -p, REPORT_DIR on PYTHONPATH
+LIVE_PLUGIN = "rift_live"
+# Warm pytest worker (services/pytest_worker.py) run in place of `python -m
+# pytest`: forks each run from a parent with the dependencies pre-imported
+PYTEST_WORKER = "rift_worker"
+PYTEST_WORKER_ENABLED = os.environ.get("RIFT_PYTEST_WORKER", "1") != "0"
 
 # --- Git Guardrails ---
 PROTECTED_BRANCHES = {"main", "master"}
 COMMIT_PREFIX = "[AI-AGENT]"
+# Bare mirrors (one per repo URL) that clones are made from locally
+MIRROR_CACHE_ENABLED = os.environ.get("RIFT_MIRROR_CACHE", "1") != "0"
 
 # --- Error Categories ---
 ERROR_CATEGORIES = [
@@ -32,8 +32,12 @@ from models import (
     ErrorInfo,
 )
 from crewai_tools import CloneTool, DiscoverTool, AnalyzeTool, HealTool, VerifyTool
+from services.cancellation import CancelToken, RunCancelled
+from services.docker_service import docker_service
+from services.file_index import file_index_service
 from services.results_service import results_service
-from utils import compute_score, format_branch_name, now_iso
+from services.workspace_manager import workspace_manager
+from utils import compute_score, format_branch_name, new_run_id, now_iso
 
 # Direct agent imports — these are the fast, regex-based agents
 from agents.clone_agent import clone_agent
@@ -118,7 +122,9 @@ def create_agents(llm_model: str) -> dict:
 
 # ===================== FAST DIRECT PIPELINE =====================
 
-async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
+async def run_pipeline(
+    request: RunRequest, sse=None, run_id: str | None = None, cancel: CancelToken | None = None,
+) -> RunResult:
     """
     Execute the self-healing pipeline using direct agent calls.
 
@@ -128,6 +134,9 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
     Args:
         request: RunRequest with repo_url, team_name, leader_name
         sse: Optional SSEManager for real-time streaming
+        run_id: Run ID (generated if not given)
+        cancel: Optional CancelToken — checked between stages and each
+            healing step; the result is then saved as CANCELLED
 
     Pipeline:
     1. Clone Agent clones the repo
@@ -146,6 +155,7 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
     total_commits = 0
 
     result = RunResult(
+        run_id=run_id or new_run_id(),
         repo_url=request.repo_url,
         branch_name=branch_name,
         team_name=request.team_name,
@@ -167,6 +177,11 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
         if sse:
             sse.log(msg, msg_type)
 
+    def check_cancelled():
+        if cancel:
+            cancel.check()
+
+    repo_path = None
     try:
         # Register CrewAI agents for hackathon compliance (non-blocking)
         llm_model = _get_llm_config()
@@ -182,9 +197,15 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
         emit_step("Cloning repository", 0, f"Cloning {request.repo_url}...")
         emit_agent("Clone Agent", f"Cloning {request.repo_url}...", "progress")
 
-        repo_path = clone_agent.run(request.repo_url, request.team_name)
+        repo_path = clone_agent.run(
+            request.repo_url, request.team_name,
+            clone_mode=request.clone_mode.value, sparse_paths=request.sparse_paths,
+            run_id=result.run_id, cancel=cancel,
+        )
         logger.info(f"Repo cloned to: {repo_path}")
+        file_index_service.build(repo_path)
         emit_agent("Clone Agent", f"Repository cloned to {repo_path}", "success")
+        check_cancelled()
 
         # ========== STEP 2: DISCOVER & RUN TESTS (direct) ==========
         logger.info("=" * 60)
@@ -193,7 +214,11 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
         emit_step("Discovering tests", 1, "Scanning project for test framework...")
         emit_agent("Discover Agent", "Scanning project type and test framework...", "progress")
 
-        test_output = discover_agent.run(repo_path)
+        # Failures are classified and reported as the suite produces them
+        def emit_live_error(err):
+            emit_log(f"  [live] {err.bug_type}: {err.file}:{err.line_number} — {err.message[:80]}", "error")
+
+        test_output = discover_agent.run(repo_path, on_error=emit_live_error, cancel=cancel)
 
         emit_agent("Discover Agent",
                     f"Found {test_output.total} tests ({test_output.framework}) — "
@@ -225,6 +250,9 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
             result.score = compute_score(0, elapsed, True)
             result.finished_at = now_iso()
             results_service.save(result)
+            file_index_service.drop(repo_path)
+            docker_service.release_sandboxes(repo_path)
+            workspace_manager.release(result.run_id)
             if sse:
                 sse.result(result.model_dump(mode="json"))
                 sse.done()
@@ -240,9 +268,11 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
         current_passed = test_output.passed
         current_failed = test_output.failed
         current_total = test_output.total
+        current_runtime_errors = test_output.runtime_errors
 
         max_iters = getattr(request, 'max_iterations', MAX_ITERATIONS)
         for i in range(1, max_iters + 1):
+            check_cancelled()
             iter_start = time.time()
             logger.info("=" * 60)
             logger.info(f"HEALING ITERATION {i}/{max_iters}")
@@ -253,8 +283,11 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
 
             # --- ANALYZE (direct) ---
             emit_agent("Analyze Agent", f"Scanning for errors (iteration {i})...", "progress")
+            # Only files changed since the last scan are re-read and re-analyzed
+            file_index_service.sync(repo_path)
             error_objs = analyze_agent.run(
-                current_stdout, current_stderr, current_framework, repo_path
+                current_stdout, current_stderr, current_framework, repo_path,
+                runtime_errors=current_runtime_errors, cancel=cancel,
             )
 
             if not error_objs:
@@ -263,7 +296,7 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
                 # Try a broader analysis by combining stdout+stderr
                 error_objs = analyze_agent.run(
                     current_stdout + "\n" + current_stderr, "",
-                    current_framework, repo_path
+                    current_framework, repo_path, cancel=cancel,
                 )
 
             if not error_objs:
@@ -289,6 +322,8 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
                 logger.info(f"  -> {e.bug_type}: {e.file}:{e.line_number} — {e.message[:60]}")
                 emit_log(f"  {e.bug_type}: {e.file}:{e.line_number} — {e.message[:80]}", "info")
 
+            check_cancelled()
+
             # --- HEAL (direct) ---
             emit_step("Generating fixes", 3, f"Applying fixes for {len(error_objs)} errors...")
             emit_agent("Heal Agent", f"Generating fixes for {len(error_objs)} errors...", "progress")
@@ -328,6 +363,8 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
                 # Let's break, but we need to ensure the result is saved.
                 break
 
+            check_cancelled()
+
             # --- Push fixes ---
             emit_step("Pushing to branch", 4, f"Pushing {new_commits} commit(s) to {branch_name}...")
             emit_agent("Heal Agent", f"Pushing {new_commits} commit(s) to {branch_name}...", "progress")
@@ -336,10 +373,11 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
             emit_step("Monitoring CI/CD", 5, f"Re-running tests after fixes (iteration {i})...")
             emit_agent("Verify Agent", "Re-running test suite to verify fixes...", "progress")
 
-            v_output = verify_agent.run(repo_path)
+            v_output = verify_agent.run(repo_path, on_error=emit_live_error, cancel=cancel)
 
             current_stdout = _strip_install_noise(v_output.stdout)
             current_stderr = v_output.stderr
+            current_runtime_errors = v_output.runtime_errors
             current_exit_code = v_output.exit_code
             current_passed = v_output.passed
             current_failed = v_output.failed
@@ -405,6 +443,17 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
         emit_log(f"Pipeline complete: {result.status.value} — Score: {result.score}/120 in {elapsed:.1f}s",
                  "success" if all_passed else "error")
 
+    except RunCancelled:
+        logger.info(f"Run {result.run_id} cancelled")
+        result.status = RunStatus.CANCELLED
+        result.error_message = "Run cancelled"
+        result.finished_at = now_iso()
+        result.iterations = iterations
+        result.fixes = all_fixes
+        result.total_commits = total_commits
+        result.score = 0
+        emit_log("Run cancelled — sandbox stopped, workspace released", "error")
+
     except Exception as e:
         logger.error(f"Pipeline error: {e}", exc_info=True)
         result.status = RunStatus.ERROR
@@ -417,6 +466,10 @@ async def run_pipeline(request: RunRequest, sse=None) -> RunResult:
             sse.error(str(e))
 
     results_service.save(result)
+    if repo_path:
+        file_index_service.drop(repo_path)
+        docker_service.release_sandboxes(repo_path)
+    workspace_manager.release(result.run_id)
 
     if sse:
         sse.result(result.model_dump(mode="json"))
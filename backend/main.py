@@ -4,24 +4,34 @@ RIFT 2026 — FastAPI Application
 Endpoints:
   POST /api/run         — Start the self-healing pipeline (blocking, returns JSON)
   POST /api/run-stream  — Start with SSE streaming for real-time progress
-  GET  /api/results     — Get the latest results.json
+  GET  /api/results     — Get the latest run's results
+  GET  /api/runs        — Run history (paginated, filterable summaries)
+  GET  /api/runs/{id}   — Full results of one run
+  GET  /api/runs/{id}/events — Resume a run's SSE stream (Last-Event-ID)
+  GET  /api/queue       — Runs in progress and waiting (scheduler state)
+  DELETE /api/runs/{id} — Cancel a queued or running run
   GET  /api/health      — Health check
 """
 import asyncio
 import json
 import logging
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
-from models import RunRequest, RunResult
+from config import EVENT_LOG_MAX_AGE, SSE_RECONNECT_GRACE
+from models import RunRequest, RunResult, RunStatus
 from crew_orchestrator import run_pipeline
-from services.results_service import results_service
-from sse_manager import SSEManager
+from services.cancellation import CancelToken
+from services.docker_service import docker_service
+from services.results_service import ResultPayload, results_service
+from services.run_scheduler import QueueFull, run_scheduler
+from sse_manager import SSEManager, event_log_path, format_event, get_live, prune_event_logs, read_event_log
+from utils import new_run_id
 
 # ---------- Logging ----------
 
@@ -34,9 +44,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("rift")
 
-# Thread pool for running sync pipeline code without blocking the event loop
-_executor = ThreadPoolExecutor(max_workers=2)
-
 # ---------- FastAPI App ----------
 
 app = FastAPI(
@@ -53,9 +60,120 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Run-Id", "ETag", "Last-Modified"],
 )
 
 
+# ---------- Helpers ----------
+
+def _submit(request: RunRequest, run_id: str, fn, cancel: CancelToken, on_position=None):
+    """
+    Queue a run on the scheduler (its worker threads keep the sync pipeline
+    off the event loop). A full queue becomes 429 with a Retry-After hint.
+    """
+    try:
+        return run_scheduler.submit(
+            run_id, request.team_name, fn,
+            priority=request.priority, on_position=on_position, cancel=cancel,
+        )
+    except QueueFull as e:
+        logger.warning(f"Run rejected, queue full: {request.repo_url}")
+        raise HTTPException(
+            status_code=429, detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def _not_modified(request: Request, payload: ResultPayload) -> bool:
+    """Whether the client's cached copy (If-None-Match / If-Modified-Since) is current."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison: W/ prefixes are ignored on both sides
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or payload.etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(payload.updated_at) <= since  # HTTP dates have 1s resolution
+    return False
+
+
+def _payload_response(request: Request, payload: ResultPayload) -> Response:
+    """Serve a cached result payload: 304 if unchanged, gzipped if accepted."""
+    headers = {
+        "ETag": payload.etag,
+        "Last-Modified": formatdate(payload.updated_at, usegmt=True),
+        "Cache-Control": "no-cache",  # may be cached, but revalidated every time
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(request, payload):
+        return Response(status_code=304, headers=headers)
+    if payload.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(payload.gzipped, media_type="application/json", headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
+
+
+async def _event_stream(run_id: str, sse: SSEManager | None, after: int = 0):
+    """
+    SSE body: the run's events with an ID above after — from the live hub
+    while the run's stream is open, else replayed from its event log.
+    """
+    if sse is None:
+        for event in read_event_log(run_id, after):
+            yield format_event(event)
+        return
+
+    sub = sse.subscribe(after)
+    finished = False
+    try:
+        while not finished:
+            events = await sub.get(timeout=300)
+            if not events:
+                if sse.finished:
+                    break
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                yield format_event(event)
+                finished = event["event"] == "done"
+    except Exception as e:
+        logger.error(f"SSE error: {e}")
+        yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
+    finally:
+        sub.close()
+        if not finished:
+            _cancel_if_abandoned(run_id, sse)
+
+
+def _cancel_if_abandoned(run_id: str, sse: SSEManager) -> None:
+    """
+    A client disconnected mid-run: cancel the run unless some client
+    (re)subscribes within SSE_RECONNECT_GRACE seconds.
+    """
+    def check():
+        if not sse.finished and sse.subscribers == 0 and run_scheduler.cancel(run_id):
+            logger.info(f"No SSE client for {SSE_RECONNECT_GRACE}s — cancelled run {run_id}")
+
+    asyncio.get_running_loop().call_later(SSE_RECONNECT_GRACE, check)
+
+
+def _sse_response(body, run_id: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+            "X-Run-Id": run_id,
+        },
+    )
+
+
 # ---------- Routes ----------
 
 @app.get("/api/health")
@@ -71,13 +189,19 @@ async def health_check():
 async def start_run(request: RunRequest):
     """Start the pipeline (blocking — no streaming)."""
     logger.info(f"NEW RUN (blocking): {request.repo_url}")
+    run_id = new_run_id()
+    cancel = CancelToken()
+    future = _submit(
+        request, run_id,
+        lambda: asyncio.run(run_pipeline(request, run_id=run_id, cancel=cancel)),
+        cancel,
+    )
     try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            _executor,
-            lambda: asyncio.run(run_pipeline(request))
-        )
-        return result
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        if not future.cancelled():
+            raise
+        raise HTTPException(status_code=409, detail="Run was cancelled before it started")
     except Exception as e:
         logger.error(f"Run failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,65 +211,125 @@ async def start_run(request: RunRequest):
 async def start_run_stream(request: RunRequest):
     """
     Start pipeline with SSE streaming.
-    Pipeline runs in a THREAD so the event loop stays free to yield events.
+    Pipeline runs in a THREAD so the event loop stays free to yield events;
+    while it waits for a free slot, `queue` events report its position.
+    A client that disconnects can resume via /api/runs/{id}/events; the
+    run is cancelled if none does within SSE_RECONNECT_GRACE seconds.
     """
     logger.info(f"NEW RUN (SSE): {request.repo_url}")
 
-    loop = asyncio.get_event_loop()
-    sse = SSEManager()
-    queue = sse.create_queue(loop)
+    run_id = new_run_id()
+    sse = SSEManager(run_id)
+    cancel = CancelToken()
 
     def run_sync():
         """Run the async pipeline from within a thread."""
         try:
-            asyncio.run(run_pipeline(request, sse=sse))
+            asyncio.run(run_pipeline(request, sse=sse, run_id=run_id, cancel=cancel))
         except Exception as e:
             logger.error(f"Pipeline error: {e}", exc_info=True)
             sse.error(str(e))
             sse.done()
 
-    # Run pipeline in thread executor → event loop stays free to yield SSE
-    loop.run_in_executor(_executor, run_sync)
-
-    async def event_generator():
-        while True:
-            try:
-                event = await asyncio.wait_for(queue.get(), timeout=300)
-                event_type = event.get("event", "log")
-                data = event.get("data", "")
-                yield f"event: {event_type}\ndata: {data}\n\n"
-                if event_type == "done":
-                    break
-            except asyncio.TimeoutError:
-                yield f": keepalive\n\n"
-            except Exception as e:
-                logger.error(f"SSE error: {e}")
-                yield f"event: error\ndata: {json.dumps({'message': str(e)})}\n\n"
-                break
+    # Run pipeline on a scheduler thread → event loop stays free to yield SSE
+    try:
+        future = _submit(
+            request, run_id, run_sync, cancel,
+            on_position=lambda pos: sse.queued(run_id, pos),
+        )
+    except HTTPException:
+        sse.discard()  # never started: no event log to keep
+        raise
 
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
-    )
+    def on_finished(f):
+        if f.cancelled():  # removed from the queue before it started
+            sse.error("Run cancelled")
+            sse.done()
+
+    future.add_done_callback(on_finished)
+
+    return _sse_response(_event_stream(run_id, sse), run_id)
+
+
+@app.get("/api/runs/{run_id}/events")
+async def stream_run_events(
+    run_id: str,
+    request: Request,
+    last_event_id: int | None = Query(None, description="Alternative to the Last-Event-ID header"),
+):
+    """
+    Resume (or follow) a run's SSE stream: events after Last-Event-ID are
+    replayed (from memory or the run's event log), then live events follow
+    until done. Any number of clients can follow the same run.
+    """
+    header = request.headers.get("last-event-id", "")
+    after = int(header) if header.isdigit() else (last_event_id or 0)
+    sse = get_live(run_id)
+    if sse is None and not event_log_path(run_id).exists():
+        raise HTTPException(status_code=404, detail=f"No events for run {run_id}.")
+    return _sse_response(_event_stream(run_id, sse, after), run_id)
 
 
 @app.get("/api/results")
-async def get_results():
-    data = results_service.load()
-    if data is None:
+async def get_results(request: Request):
+    payload = results_service.payload()
+    if payload is None:
         raise HTTPException(status_code=404, detail="No results found.")
-    return data
+    return _payload_response(request, payload)
+
+
+@app.get("/api/runs")
+async def list_runs(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    repo_url: str | None = None,
+    team_name: str | None = None,
+    status: RunStatus | None = None,
+):
+    """Run summaries, newest first; follow next_cursor for older runs."""
+    return results_service.list_runs(
+        limit=limit, cursor=cursor, repo_url=repo_url, team_name=team_name,
+        status=status.value if status else None,
+    )
+
+
+@app.get("/api/runs/{run_id}")
+async def get_run(run_id: str, request: Request):
+    payload = results_service.payload(run_id)
+    if payload is not None:
+        return _payload_response(request, payload)
+    position = run_scheduler.position(run_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found.")
+    # Not finished yet — results are stored when the run ends
+    return {"run_id": run_id, "status": RunStatus.RUNNING.value, "queue_position": position}
+
+
+@app.get("/api/queue")
+async def get_queue():
+    return run_scheduler.stats()
+
+
+@app.delete("/api/runs/{run_id}", status_code=202)
+async def cancel_run(run_id: str):
+    """Cancel a run; a running one stops at its next step, sandbox killed."""
+    if not run_scheduler.cancel(run_id):
+        raise HTTPException(status_code=404, detail=f"No queued or running run {run_id}")
+    return {"run_id": run_id, "status": "CANCELLING"}
 
 
 @app.on_event("startup")
 async def on_startup():
     logger.info("RIFT Self-Healing CI/CD backend started")
     logger.info("   Docs: http://localhost:8000/docs")
+    removed = prune_event_logs(EVENT_LOG_MAX_AGE)
+    if removed:
+        logger.info(f"Pruned {removed} old event log(s)")
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    docker_service.shutdown()
 
 
 if __name__ == "__main__":
@@ -153,5 +337,10 @@ if __name__ == "__main__":
     uvicorn.run(
         "main:app", host="0.0.0.0", port=8000,
         reload=True,
-        reload_excludes=["cloned_repos/*", "cloned_repos/**"],
+        # Runtime data under backend/ — installs there write thousands of .py files
+        reload_excludes=[
+            "cloned_repos/*", "cloned_repos/**",
+            "env_cache/*", "env_cache/**",
+            "git_mirrors/*", "git_mirrors/**",
+        ],
     )
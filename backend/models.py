@@ -6,6 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional
+from uuid import uuid4
 
 from pydantic import BaseModel, Field
 
@@ -26,6 +27,12 @@ class RunStatus(str, Enum):
     FAILED = "FAILED"
     RUNNING = "RUNNING"
     ERROR = "ERROR"
+    CANCELLED = "CANCELLED"
+
+
+class CloneMode(str, Enum):
+    FULL = "full"
+    PARTIAL = "partial"
 
 
 class FixStatus(str, Enum):
@@ -42,6 +49,15 @@ class RunRequest(BaseModel):
     team_name: str = Field(..., description="Hackathon team name")
     leader_name: str = Field(..., description="Team leader's name")
     max_iterations: int = Field(default=5, ge=1, le=20, description="Max healing iterations (default: 5)")
+    clone_mode: CloneMode = Field(
+        default=CloneMode.FULL,
+        description="'partial' clones without file contents (fetched on demand) — for huge repos",
+    )
+    sparse_paths: Optional[List[str]] = Field(
+        default=None,
+        description="Partial clones only: directories to check out (root files are always included)",
+    )
+    priority: int = Field(default=0, ge=0, le=10, description="Queued runs with a higher priority start first")
 
 
 # ---------- Fix ----------
@@ -74,6 +90,7 @@ class Iteration(BaseModel):
 # ---------- Run Result ----------
 
 class RunResult(BaseModel):
+    run_id: str = Field(default_factory=lambda: uuid4().hex[:12], description="Unique run ID")
     repo_url: str
     branch_name: str
     team_name: str
@@ -88,6 +105,25 @@ class RunResult(BaseModel):
     error_message: Optional[str] = None
 
 
+# ---------- Structured Test Report ----------
+
+class TestFailure(BaseModel):
+    """One failing test case read from a JUnit XML / jest JSON report."""
+    test_id: str = ""
+    file: str = ""
+    line_number: int = 0
+    error_type: str = ""
+    message: str = ""
+
+
+class TestReport(BaseModel):
+    """Machine-readable test results written by the sandbox run."""
+    passed: int = 0
+    failed: int = 0
+    total: int = 0
+    failures: List[TestFailure] = Field(default_factory=list)
+
+
 # ---------- Test Output ----------
 
 class TestOutput(BaseModel):
@@ -99,6 +135,8 @@ class TestOutput(BaseModel):
     failed: int = 0
     total: int = 0
     framework: str = "unknown"
+    # Runtime errors analyzed while the suite ran (not serialized)
+    runtime_errors: list["ErrorInfo"] | None = Field(default=None, exclude=True)
 
 
 # ---------- Error Info ----------
@@ -110,6 +148,7 @@ class ErrorInfo(BaseModel):
     bug_type: str = Field(default="SYNTAX", description="Error category")
     message: str = Field(default="", description="Error message")
     code_snippet: str = ""
+    occurrences: int = Field(default=1, description="Failures sharing this root cause")
 
     def model_post_init(self, __context) -> None:
         """Sanitize fields after init — handle None from AI agents."""
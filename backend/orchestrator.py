@@ -23,13 +23,19 @@ from agents.discover_agent import discover_agent
 from agents.analyze_agent import analyze_agent
 from agents.heal_agent import heal_agent
 from agents.verify_agent import verify_agent
+from services.cancellation import CancelToken, RunCancelled
+from services.docker_service import docker_service
+from services.file_index import file_index_service
 from services.results_service import results_service
-from utils import compute_score, format_branch_name, now_iso
+from services.workspace_manager import workspace_manager
+from utils import compute_score, format_branch_name, new_run_id, now_iso
 
 logger = logging.getLogger("rift.orchestrator")
 
 
-async def run_pipeline(request: RunRequest) -> RunResult:
+async def run_pipeline(
+    request: RunRequest, run_id: str | None = None, cancel: CancelToken | None = None,
+) -> RunResult:
     """
     Execute the full self-healing CI/CD pipeline.
 
@@ -46,6 +52,9 @@ async def run_pipeline(request: RunRequest) -> RunResult:
         6. Write results.json
         7. Return RunResult
 
+    A cancelled CancelToken stops the run between steps (and kills the
+    running sandbox); the result is then CANCELLED.
+
     Returns:
         RunResult containing all fixes, iterations, score, and status.
     """
@@ -58,6 +67,7 @@ async def run_pipeline(request: RunRequest) -> RunResult:
     total_commits = 0
 
     result = RunResult(
+        run_id=run_id or new_run_id(),
         repo_url=request.repo_url,
         branch_name=branch_name,
         team_name=request.team_name,
@@ -66,20 +76,26 @@ async def run_pipeline(request: RunRequest) -> RunResult:
         started_at=started_at,
     )
 
+    repo_path = None
     try:
         # ========== STEP 1: CLONE ==========
         logger.info("=" * 60)
         logger.info("STEP 1: CLONE")
         logger.info("=" * 60)
 
-        repo_path = clone_agent.run(request.repo_url, request.team_name)
+        repo_path = clone_agent.run(
+            request.repo_url, request.team_name,
+            clone_mode=request.clone_mode.value, sparse_paths=request.sparse_paths,
+            run_id=result.run_id, cancel=cancel,
+        )
+        file_index_service.build(repo_path)
 
         # ========== STEP 2: DISCOVER + RUN TESTS ==========
         logger.info("=" * 60)
         logger.info("STEP 2: DISCOVER & RUN TESTS")
         logger.info("=" * 60)
 
-        test_output = discover_agent.run(repo_path)
+        test_output = discover_agent.run(repo_path, cancel=cancel)
         initial_iteration = Iteration(
             number=0,
             passed=test_output.passed,
@@ -101,6 +117,9 @@ async def run_pipeline(request: RunRequest) -> RunResult:
             result.score = compute_score(0, elapsed, True)
             result.finished_at = now_iso()
             results_service.save(result)
+            file_index_service.drop(repo_path)
+            docker_service.release_sandboxes(repo_path)
+            workspace_manager.release(result.run_id)
             return result
 
         # ========== STEP 3-5: HEALING LOOP ==========
@@ -108,17 +127,22 @@ async def run_pipeline(request: RunRequest) -> RunResult:
 
         max_iters = getattr(request, 'max_iterations', MAX_ITERATIONS)
         for i in range(1, max_iters + 1):
+            if cancel:
+                cancel.check()
             logger.info("=" * 60)
             logger.info(f"HEALING ITERATION {i}/{max_iters}")
             logger.info("=" * 60)
 
             # --- ANALYZE ---
             logger.info(f"[Iteration {i}] ANALYZE: parsing errors...")
+            file_index_service.sync(repo_path)
             errors = analyze_agent.run(
                 current_output.stdout,
                 current_output.stderr,
                 current_output.framework,
                 repo_path,
+                runtime_errors=current_output.runtime_errors,
+                cancel=cancel,
             )
 
             if not errors:
@@ -148,8 +172,10 @@ async def run_pipeline(request: RunRequest) -> RunResult:
             total_commits += new_commits
 
             # --- VERIFY ---
+            if cancel:
+                cancel.check()
             logger.info(f"[Iteration {i}] VERIFY: re-running tests...")
-            current_output = verify_agent.run(repo_path)
+            current_output = verify_agent.run(repo_path, cancel=cancel)
 
             applied_count = sum(1 for f in fixes if f.status == FixStatus.APPLIED)
             iter_result = Iteration(
@@ -199,6 +225,16 @@ async def run_pipeline(request: RunRequest) -> RunResult:
         logger.info(f"Time: {elapsed:.1f}s | Iterations: {len(iterations)}")
         logger.info("=" * 60)
 
+    except RunCancelled:
+        logger.info(f"Run {result.run_id} cancelled")
+        result.status = RunStatus.CANCELLED
+        result.error_message = "Run cancelled"
+        result.finished_at = now_iso()
+        result.iterations = iterations
+        result.fixes = all_fixes
+        result.total_commits = total_commits
+        result.score = 0
+
     except Exception as e:
         logger.error(f"Pipeline error: {e}", exc_info=True)
         result.status = RunStatus.ERROR
@@ -210,4 +246,8 @@ async def run_pipeline(request: RunRequest) -> RunResult:
 
     # Always save results
     results_service.save(result)
+    if repo_path:
+        file_index_service.drop(repo_path)
+        docker_service.release_sandboxes(repo_path)
+    workspace_manager.release(result.run_id)
     return result
@@ -0,0 +1,79 @@
+"""
+RIFT 2026 — Run Cancellation
+
+A CancelToken is created per run and handed down the pipeline. The
+pipeline calls check() between stages (raising RunCancelled), while
+long-running work — a sandbox container, a local process group, a wait
+for a stage slot — registers a callback with on_cancel() that stops it
+the moment cancel() is called.
+"""
+import logging
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Callable
+
+logger = logging.getLogger("rift.cancellation")
+
+
+class RunCancelled(Exception):
+    """Raised inside a run once it has been cancelled."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with kill callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks: list[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Flag the run as cancelled and stop whatever it is running now."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            self._invoke(callback)
+
+    def check(self) -> None:
+        """Raise RunCancelled if the run has been cancelled."""
+        if self._event.is_set():
+            raise RunCancelled("Run cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds; True as soon as the run is cancelled."""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        """Call callback on cancel() while the block runs (at once if already cancelled)."""
+        with self._lock:
+            already = self._event.is_set()
+            if not already:
+                self._callbacks.append(callback)
+        if already:
+            self._invoke(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+    @staticmethod
+    def _invoke(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.warning(f"Cancel callback failed: {e}")
+
+
+def on_cancel(token: CancelToken | None, callback: Callable[[], None]):
+    """token.on_cancel(callback), or a no-op context when there is no token."""
+    return token.on_cancel(callback) if token is not None else nullcontext()
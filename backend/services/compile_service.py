@@ -0,0 +1,206 @@
+"""
+RIFT 2026 — Compile Service
+
+Checks Python sources for syntax errors with the builtin compile(), entirely
+in memory (no .pyc written into the cloned repo's __pycache__).
+
+Results are cached by content hash, so a given file version is compiled at
+most once per process — whether it was first seen by the analyze scan or as
+a heal candidate.
+
+Large scans can be sharded across a process pool (check_entries); results
+come back in input order, so callers see the same output as a serial scan.
+"""
+import hashlib
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from config import (
+    COMPILE_CACHE_SIZE,
+    SYNTAX_SCAN_CHUNK_SIZE,
+    SYNTAX_SCAN_PARALLEL_MIN_FILES,
+    SYNTAX_SCAN_WORKERS,
+)
+
+logger = logging.getLogger("rift.compile_service")
+
+
+class CompileResult(NamedTuple):
+    """Outcome of compiling one source version."""
+    ok: bool
+    lineno: int = 0
+    error_type: str = ""
+    message: str = ""
+
+    @property
+    def is_indentation(self) -> bool:
+        return (
+            self.error_type in ("IndentationError", "TabError")
+            or "indent" in self.message.lower()
+        )
+
+
+OK = CompileResult(ok=True)
+
+
+def compile_source(source: bytes | str, filename: str = "<string>") -> CompileResult:
+    """
+    Compile source the same way py_compile does (bytes honour PEP 263
+    coding cookies), but discard the code object instead of writing a .pyc.
+    """
+    try:
+        compile(source, filename, "exec", dont_inherit=True)
+        return OK
+    except SyntaxError as e:
+        err_type = type(e).__name__
+        return CompileResult(
+            ok=False,
+            lineno=e.lineno or 1,
+            error_type=err_type,
+            message=f"{err_type}: {e.msg}",
+        )
+    except Exception as e:
+        # e.g. ValueError for null bytes — py_compile reported these too
+        err_type = type(e).__name__
+        return CompileResult(
+            ok=False, lineno=1, error_type=err_type, message=f"{err_type}: {e}"
+        )
+
+
+def _compile_item(item: tuple[bytes, str]) -> CompileResult:
+    """Process-pool worker: compile one (source, filename) pair."""
+    source, filename = item
+    return compile_source(source, filename)
+
+
+class CompileService:
+    """Content-hash keyed cache in front of compile_source()."""
+
+    def __init__(
+        self,
+        max_entries: int = COMPILE_CACHE_SIZE,
+        workers: int = SYNTAX_SCAN_WORKERS,
+        chunk_size: int = SYNTAX_SCAN_CHUNK_SIZE,
+        parallel_min_files: int = SYNTAX_SCAN_PARALLEL_MIN_FILES,
+    ):
+        self._cache: OrderedDict[str, CompileResult] = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.parallel_min_files = parallel_min_files
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    def check(
+        self, source: bytes | str, filename: str = "<string>", digest: str | None = None
+    ) -> CompileResult:
+        """Compile source (or return the cached result for this content)."""
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        if digest is None:
+            digest = hashlib.sha1(source).hexdigest()
+
+        cached = self.get_cached(digest)
+        if cached is not None:
+            return cached
+
+        result = compile_source(source, filename)
+        self.store(digest, result)
+        return result
+
+    def check_entry(self, entry) -> CompileResult:
+        """Compile a file-index entry, reusing its content hash."""
+        return self.check(entry.data, str(entry.path), entry.digest)
+
+    def check_entries(self, entries: list) -> list[CompileResult | None]:
+        """
+        Compile many file-index entries, in parallel when the batch is large.
+
+        Returns one result per entry, in the same order (None for entries
+        that could not be read).
+        """
+        results: list[CompileResult | None] = [None] * len(entries)
+        pending: list[tuple[int, str, bytes, str]] = []
+
+        for i, entry in enumerate(entries):
+            try:
+                data, digest = entry.data, entry.digest
+            except Exception:
+                continue  # unreadable — leave as None
+            cached = self.get_cached(digest)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, digest, data, str(entry.path)))
+
+        if not pending:
+            return results
+
+        items = [(data, filename) for _, _, data, filename in pending]
+        compiled = None
+        if self.workers > 1 and len(pending) >= self.parallel_min_files:
+            compiled = self._compile_parallel(items)
+        if compiled is None:
+            compiled = [_compile_item(item) for item in items]
+
+        for (i, digest, _, _), result in zip(pending, compiled):
+            self.store(digest, result)
+            results[i] = result
+        return results
+
+    def _compile_parallel(self, items: list[tuple[bytes, str]]) -> list[CompileResult] | None:
+        """Shard items across the process pool; None means fall back to serial."""
+        try:
+            pool = self._get_pool()
+            logger.info(
+                f"Compiling {len(items)} file(s) on {self.workers} worker(s) "
+                f"(chunk size {self.chunk_size})"
+            )
+            # map() yields in submission order — deterministic output
+            return list(pool.map(_compile_item, items, chunksize=self.chunk_size))
+        except Exception as e:
+            logger.warning(f"Parallel compile failed ({e}), falling back to serial scan")
+            self.shutdown()
+            return None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Lazily start one long-lived pool (worker start-up is paid once)."""
+        with self._pool_lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                # forkserver/spawn: never fork the threaded API server itself
+                method = "forkserver" if "forkserver" in methods else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method),
+                )
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def get_cached(self, digest: str) -> CompileResult | None:
+        with self._lock:
+            result = self._cache.get(digest)
+            if result is not None:
+                self._cache.move_to_end(digest)
+            return result
+
+    def store(self, digest: str, result: CompileResult) -> None:
+        with self._lock:
+            self._cache[digest] = result
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+
+
+# Singleton
+compile_service = CompileService()
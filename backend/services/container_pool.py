@@ -0,0 +1,165 @@
+"""
+RIFT 2026 — Warm Sandbox Container Pool
+
+Keeps sandbox containers running (`sleep infinity`) between the discover
+and verify calls of a run, so each test run is an exec into a warm
+container instead of create → start → wait → logs → remove, and whatever
+the install step left in the container is still there next iteration.
+
+Containers are keyed by their mounts (repo path + dependency environment),
+which are fixed at creation. The pool is bounded: idle containers are
+evicted least-recently-used to make room, reaped after
+SANDBOX_POOL_IDLE_SECONDS, and health-checked on every checkout.
+release(repo_path) removes a run's containers when the run ends.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from config import SANDBOX_POOL_IDLE_SECONDS, SANDBOX_POOL_SIZE
+
+logger = logging.getLogger("rift.container_pool")
+
+# (resolved repo path, env cache key or None)
+PoolKey = tuple[str, str | None]
+
+
+@dataclass
+class PoolSlot:
+    """One pooled container; checked out by at most one sandbox run."""
+    key: PoolKey
+    container: object = None
+    busy: bool = True
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ContainerPool:
+    """Bounded pool of warm sandbox containers."""
+
+    def __init__(self, max_size: int = SANDBOX_POOL_SIZE, idle_seconds: float = SANDBOX_POOL_IDLE_SECONDS):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._slots: list[PoolSlot] = []
+        self._lock = threading.Lock()
+        self._reaper: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def checkout(self, key: PoolKey, create: Callable[[], object]) -> PoolSlot | None:
+        """
+        Check out a warm, healthy container for key, starting one with
+        create() if there is none. Returns None when every slot is busy
+        (the caller falls back to a one-shot container).
+        """
+        while True:
+            evicted = None
+            with self._lock:
+                slot = next((s for s in self._slots if s.key == key and not s.busy), None)
+                if slot is not None:
+                    slot.busy = True
+                else:
+                    if len(self._slots) >= self.max_size:
+                        idle = [s for s in self._slots if not s.busy]
+                        if not idle:
+                            return None
+                        evicted = min(idle, key=lambda s: s.last_used)
+                        self._slots.remove(evicted)
+                    # Reserve the slot before starting the container
+                    slot = PoolSlot(key)
+                    self._slots.append(slot)
+            if evicted is not None:
+                self._remove(evicted)
+
+            if slot.container is None:
+                break
+            if self._healthy(slot):
+                return slot
+            logger.warning(f"Pooled sandbox for {key[0]} is unhealthy — replacing it")
+            self._discard(slot)
+
+        try:
+            slot.container = create()
+        except Exception:
+            with self._lock:
+                self._slots.remove(slot)
+            raise
+        self._ensure_reaper()
+        return slot
+
+    def checkin(self, slot: PoolSlot, healthy: bool = True) -> None:
+        """Return a container; unhealthy ones (timed out, errored) are removed."""
+        if not healthy:
+            self._discard(slot)
+            return
+        with self._lock:
+            slot.busy = False
+            slot.last_used = time.monotonic()
+
+    def is_warm(self, key: PoolKey) -> bool:
+        """Whether a container for key is already running."""
+        with self._lock:
+            return any(s.key == key and s.container is not None for s in self._slots)
+
+    def release(self, repo_path: str) -> None:
+        """Remove the idle containers of a repo (end of its run)."""
+        with self._lock:
+            done = [s for s in self._slots if s.key[0] == repo_path and not s.busy]
+            for slot in done:
+                self._slots.remove(slot)
+        for slot in done:
+            self._remove(slot)
+
+    def close(self) -> None:
+        """Stop the reaper and remove every idle container."""
+        self._stop.set()
+        with self._lock:
+            done = [s for s in self._slots if not s.busy]
+            for slot in done:
+                self._slots.remove(slot)
+        for slot in done:
+            self._remove(slot)
+
+    # ---- Internal helpers ----
+
+    @staticmethod
+    def _healthy(slot: PoolSlot) -> bool:
+        try:
+            slot.container.reload()
+            return slot.container.status == "running"
+        except Exception:
+            return False
+
+    def _discard(self, slot: PoolSlot) -> None:
+        with self._lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+        self._remove(slot)
+
+    @staticmethod
+    def _remove(slot: PoolSlot) -> None:
+        if slot.container is None:
+            return
+        try:
+            slot.container.remove(force=True)
+        except Exception as e:
+            logger.warning(f"Could not remove pooled sandbox: {e}")
+
+    def _ensure_reaper(self) -> None:
+        with self._lock:
+            if self._reaper is not None or self._stop.is_set():
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="rift-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_seconds / 2))
+        while not self._stop.wait(interval):
+            cutoff = time.monotonic() - self.idle_seconds
+            with self._lock:
+                expired = [s for s in self._slots if not s.busy and s.last_used < cutoff]
+                for slot in expired:
+                    self._slots.remove(slot)
+            for slot in expired:
+                logger.info(f"Reaping idle sandbox for {slot.key[0]}")
+                self._remove(slot)
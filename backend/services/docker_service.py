@@ -1,13 +1,19 @@
 """
 RIFT 2026 — Docker Sandbox Service
 
-Runs test commands inside isolated Docker containers.
+Runs test commands inside isolated Docker containers — exec'd into a warm
+pooled container per run (see container_pool) when possible.
 Falls back to local subprocess execution if Docker is unavailable.
 """
+import codecs
+import os
+import signal
 import subprocess
 import shutil
 import logging
+import threading
 from pathlib import Path
+from typing import Callable
 
 logger = logging.getLogger("rift.docker_service")
 
@@ -18,7 +24,60 @@ try:
 except ImportError:
     DOCKER_AVAILABLE = False
 
-from config import SANDBOX_IMAGE, SANDBOX_TIMEOUT
+from config import ENV_MOUNT, REPORT_DIR, SANDBOX_IMAGE, SANDBOX_POOL_SIZE, SANDBOX_TIMEOUT
+from services.cancellation import CancelToken, on_cancel
+from services.container_pool import ContainerPool, PoolKey
+from services.env_cache import EnvHandle
+from services import pytest_worker
+from services.run_scheduler import run_scheduler
+
+# PATH of the sandbox image (python:3.11-slim + node)
+_IMAGE_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+
+def _sandbox_env(repo_root: str) -> dict:
+    """
+    Extra environment for sandbox commands: unbuffered interpreter output
+    (so lines stream while tests run) and the report dir on PYTHONPATH
+    (so pytest can load the live-failure plugin).
+    """
+    report_dir = str(Path(repo_root) / REPORT_DIR)
+    return {"PYTHONUNBUFFERED": "1", "PYTHONPATH": report_dir}
+
+
+def _env_activation(env: EnvHandle, env_dir: str, path: str, bin_dir: str = "bin") -> dict:
+    """
+    Environment variables that put a cached dependency environment first:
+    RIFT_ENV_DIR for the ready marker, plus an activated venv for Python.
+    """
+    activation = {"RIFT_ENV_DIR": env_dir}
+    if env.kind == "python":
+        venv = f"{env_dir}/venv"
+        activation["VIRTUAL_ENV"] = venv
+        activation["PATH"] = f"{venv}/{bin_dir}{os.pathsep}{path}"
+    return activation
+
+
+class _LineSplitter:
+    """Turns a stream of byte chunks into complete decoded lines."""
+
+    def __init__(self, on_line: Callable[[str], None]):
+        self._on_line = on_line
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, chunk: bytes) -> None:
+        text = self._partial + self._decoder.decode(chunk)
+        lines = text.split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._on_line(line.rstrip("\r"))
+
+    def close(self) -> None:
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if text:
+            self._on_line(text.rstrip("\r"))
 
 
 class DockerService:
@@ -26,6 +85,7 @@ class DockerService:
 
     def __init__(self):
         self._client = None
+        self._pool: ContainerPool | None = None
         if DOCKER_AVAILABLE:
             try:
                 self._client = docker.from_env()
@@ -34,16 +94,37 @@ class DockerService:
             except Exception as e:
                 logger.warning(f"Docker unavailable ({e}), using local fallback.")
                 self._client = None
+        if self._client is not None and SANDBOX_POOL_SIZE > 0:
+            self._pool = ContainerPool()
 
     @property
     def is_docker_available(self) -> bool:
         return self._client is not None
 
+    def has_warm_sandbox(self, repo_path: str, env: EnvHandle | None = None) -> bool:
+        """Whether a pooled container (with its installed state) exists for this repo."""
+        return self._pool is not None and self._pool.is_warm(self._pool_key(repo_path, env))
+
+    def release_sandboxes(self, repo_path: str) -> None:
+        """Remove the pooled containers (or local pytest worker) of a finished run."""
+        resolved = str(Path(repo_path).resolve())
+        if self._pool is not None:
+            self._pool.release(resolved)
+        elif self._client is None:
+            pytest_worker.stop(resolved)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+
     def run_sandbox(
         self,
         repo_path: str,
         commands: list[str],
         timeout: int = SANDBOX_TIMEOUT,
+        on_line: Callable[[str], None] | None = None,
+        env: EnvHandle | None = None,
+        cancel: CancelToken | None = None,
     ) -> dict:
         """
         Execute commands in a sandboxed environment.
@@ -52,38 +133,85 @@ class DockerService:
             repo_path: Path to the cloned repo.
             commands: List of shell commands to run sequentially.
             timeout: Max seconds per command.
+            on_line: Optional callback receiving each output line (stdout
+                and stderr, without the newline) while the commands run.
+            env: Optional cached dependency environment (see env_cache) —
+                mounted (Docker) or activated (local) for the commands.
+            cancel: Optional run CancelToken — cancelling kills the
+                container / process group and raises RunCancelled here.
 
         Returns:
             dict with keys: stdout, stderr, exit_code
         """
-        if self.is_docker_available:
-            return self._run_docker(repo_path, commands, timeout)
-        else:
-            return self._run_local(repo_path, commands, timeout)
+        with run_scheduler.stage("sandbox", cancel):
+            if self.is_docker_available:
+                result = self._run_docker(repo_path, commands, timeout, on_line, env, cancel)
+            else:
+                result = self._run_local(repo_path, commands, timeout, on_line, env, cancel)
+        if cancel is not None:
+            cancel.check()
+        return result
+
+    @staticmethod
+    def _pool_key(repo_path: str, env: EnvHandle | None) -> PoolKey:
+        return (str(Path(repo_path).resolve()), env.key if env else None)
 
     def _run_docker(
-        self, repo_path: str, commands: list[str], timeout: int
+        self, repo_path: str, commands: list[str], timeout: int,
+        on_line: Callable[[str], None] | None = None,
+        env: EnvHandle | None = None,
+        cancel: CancelToken | None = None,
     ) -> dict:
-        """Run inside Docker container."""
+        """Run inside Docker: exec into a warm pooled container, else a one-shot one."""
         combined_cmd = " && ".join(commands)
+        volumes = {
+            str(Path(repo_path).resolve()): {
+                "bind": "/workspace",
+                "mode": "rw",
+            }
+        }
+        environment = _sandbox_env("/workspace")
+        if env is not None:
+            volumes[str(env.path.resolve())] = {"bind": ENV_MOUNT, "mode": "rw"}
+            if env.kind == "node":
+                volumes[str(env.node_modules.resolve())] = {
+                    "bind": "/workspace/node_modules",
+                    "mode": "rw",
+                }
+            environment.update(_env_activation(env, ENV_MOUNT, _IMAGE_PATH))
+
+        if self._pool is not None:
+            try:
+                slot = self._pool.checkout(
+                    self._pool_key(repo_path, env),
+                    lambda: self._start_container("sleep infinity", volumes, environment, init=True),
+                )
+            except Exception as e:
+                logger.warning(f"Could not start pooled sandbox ({e}), using a one-shot container")
+                slot = None
+            if slot is not None:
+                # An exec cannot be killed on its own — cancelling kills the container
+                with on_cancel(cancel, slot.container.kill):
+                    result = self._exec(slot.container, combined_cmd, timeout, on_line)
+                healthy = result["exit_code"] != -1 and not (cancel and cancel.cancelled)
+                self._pool.checkin(slot, healthy=healthy)
+                return result
+
         try:
-            container = self._client.containers.run(
-                image=SANDBOX_IMAGE,
-                command=f"/bin/bash -c '{combined_cmd}'",
-                volumes={
-                    str(Path(repo_path).resolve()): {
-                        "bind": "/workspace",
-                        "mode": "rw",
-                    }
-                },
-                working_dir="/workspace",
-                detach=True,
-                mem_limit="512m",
-                cpu_period=100000,
-                cpu_quota=50000,  # 50% CPU
-                network_mode="bridge",
+            # argv list: the commands' own quotes must not meet a shell-split wrapper
+            container = self._start_container(
+                ["/bin/bash", "-c", combined_cmd], volumes, environment
             )
-            result = container.wait(timeout=timeout)
+            streamer = None
+            if on_line is not None:
+                streamer = threading.Thread(
+                    target=self._stream_logs, args=(container, on_line), daemon=True
+                )
+                streamer.start()
+            with on_cancel(cancel, container.kill):
+                result = container.wait(timeout=timeout)
+            if streamer is not None:
+                streamer.join(timeout=10)  # the log stream ends with the container
             stdout = container.logs(stdout=True, stderr=False).decode("utf-8", errors="replace")
             stderr = container.logs(stdout=False, stderr=True).decode("utf-8", errors="replace")
             exit_code = result.get("StatusCode", -1)
@@ -103,8 +231,94 @@ class DockerService:
                 "exit_code": -1,
             }
 
+    def _start_container(self, command: str | list[str], volumes: dict, environment: dict, **kwargs):
+        return self._client.containers.run(
+            image=SANDBOX_IMAGE,
+            command=command,
+            volumes=volumes,
+            working_dir="/workspace",
+            detach=True,
+            mem_limit="512m",
+            cpu_period=100000,
+            cpu_quota=50000,  # 50% CPU
+            network_mode="bridge",
+            environment=environment,
+            **kwargs,
+        )
+
+    def _exec(
+        self, container, combined_cmd: str, timeout: int,
+        on_line: Callable[[str], None] | None = None,
+    ) -> dict:
+        """Run the commands in a running container; exit_code -1 on timeout or error."""
+        api = self._client.api
+        stdout: list[bytes] = []
+        stderr: list[bytes] = []
+        splitters = (_LineSplitter(on_line), _LineSplitter(on_line)) if on_line else None
+        failure: list[Exception] = []
+
+        def pump(exec_id: str) -> None:
+            try:
+                for out_chunk, err_chunk in api.exec_start(exec_id, stream=True, demux=True):
+                    if out_chunk:
+                        stdout.append(out_chunk)
+                        if splitters:
+                            splitters[0].feed(out_chunk)
+                    if err_chunk:
+                        stderr.append(err_chunk)
+                        if splitters:
+                            splitters[1].feed(err_chunk)
+            except Exception as e:
+                failure.append(e)
+            finally:
+                if splitters:
+                    splitters[0].close()
+                    splitters[1].close()
+
+        try:
+            exec_id = api.exec_create(
+                container.id, ["/bin/bash", "-c", combined_cmd], workdir="/workspace"
+            )["Id"]
+            reader = threading.Thread(target=pump, args=(exec_id,), daemon=True)
+            reader.start()
+            reader.join(timeout)
+            if reader.is_alive():
+                # The caller discards the container, which kills the exec
+                raise TimeoutError(f"Command timed out after {timeout}s")
+            if failure:
+                raise failure[0]
+            exit_code = api.exec_inspect(exec_id).get("ExitCode")
+        except Exception as e:
+            logger.error(f"Docker exec failed: {e}")
+            return {
+                "stdout": b"".join(stdout).decode("utf-8", errors="replace"),
+                "stderr": str(e),
+                "exit_code": -1,
+            }
+
+        return {
+            "stdout": b"".join(stdout).decode("utf-8", errors="replace"),
+            "stderr": b"".join(stderr).decode("utf-8", errors="replace"),
+            "exit_code": exit_code if exit_code is not None else -1,
+        }
+
+    @staticmethod
+    def _stream_logs(container, on_line: Callable[[str], None]) -> None:
+        """Follow the container's combined output and hand it over line by line."""
+        splitter = _LineSplitter(on_line)
+        try:
+            for chunk in container.logs(stream=True, follow=True, stdout=True, stderr=True):
+                splitter.feed(chunk)
+        except Exception as e:
+            logger.warning(f"Log streaming stopped: {e}")
+        finally:
+            splitter.close()
+
     def _run_local(
-        self, repo_path: str, commands: list[str], timeout: int
+        self, repo_path: str, commands: list[str], timeout: int,
+        on_line: Callable[[str], None] | None = None,
+        env: EnvHandle | None = None,
+        cancel: CancelToken | None = None,
     ) -> dict:
         """Fallback: run locally via subprocess."""
         import platform
@@ -122,6 +336,25 @@ class DockerService:
         # Use the current Python interpreter to avoid PATH conflicts
         # (e.g., MSYS2's python.exe intercepting the command on Windows)
         python_exe = sys.executable
+
+        cmd_env = {**os.environ, **_sandbox_env(resolved_path)}
+        if os.environ.get("PYTHONPATH"):
+            cmd_env["PYTHONPATH"] += os.pathsep + os.environ["PYTHONPATH"]
+
+        node_modules_link = None
+        if env is not None:
+            bin_dir = "Scripts" if os.name == "nt" else "bin"
+            cmd_env.update(_env_activation(
+                env, str(env.path.resolve()), os.environ.get("PATH", ""), bin_dir
+            ))
+            if env.kind == "python":
+                python_exe = str(env.venv.resolve() / bin_dir / Path(sys.executable).name)
+            elif env.kind == "node":
+                node_modules_link = Path(resolved_path) / "node_modules"
+                if not node_modules_link.exists():
+                    node_modules_link.symlink_to(env.node_modules.resolve(), target_is_directory=True)
+                else:
+                    node_modules_link = None
         logger.info(f"Using Python executable: {python_exe}")
 
         all_stdout = []
@@ -129,6 +362,8 @@ class DockerService:
         last_exit_code = 0
 
         for cmd in commands:
+            if cancel is not None and cancel.cancelled:
+                break
             # Replace generic 'python' with the actual interpreter path
             if cmd.startswith("python -m ") or cmd.startswith("python "):
                 cmd = cmd.replace("python ", f'"{python_exe}" ', 1)
@@ -143,14 +378,20 @@ class DockerService:
 
             try:
                 logger.info(f"Running: {cmd} (in {resolved_path})")
-                result = subprocess.run(
-                    cmd,
-                    shell=True,
-                    cwd=resolved_path,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
-                )
+                if on_line is not None or cancel is not None:
+                    result = self._run_local_streaming(
+                        cmd, resolved_path, timeout, cmd_env, on_line, cancel
+                    )
+                else:
+                    result = subprocess.run(
+                        cmd,
+                        shell=True,
+                        cwd=resolved_path,
+                        capture_output=True,
+                        text=True,
+                        timeout=timeout,
+                        env=cmd_env,
+                    )
                 all_stdout.append(result.stdout)
                 all_stderr.append(result.stderr)
                 last_exit_code = result.returncode
@@ -169,12 +410,85 @@ class DockerService:
                 last_exit_code = -1
                 break
 
+        if node_modules_link is not None:
+            node_modules_link.unlink(missing_ok=True)
+
         return {
             "stdout": "\n".join(all_stdout),
             "stderr": "\n".join(all_stderr),
             "exit_code": last_exit_code,
         }
 
+    @staticmethod
+    def _run_local_streaming(
+        cmd: str, cwd: str, timeout: int, env: dict,
+        on_line: Callable[[str], None] | None = None,
+        cancel: CancelToken | None = None,
+    ) -> subprocess.CompletedProcess:
+        """
+        subprocess.run() equivalent that also reports output line by line.
+        The command gets its own process group, so a timeout or cancel
+        kills the shell together with everything it started.
+        """
+        proc = subprocess.Popen(
+            cmd,
+            shell=True,
+            cwd=cwd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            start_new_session=os.name != "nt",
+        )
+
+        def kill() -> None:
+            if os.name != "nt":
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                    return
+                except ProcessLookupError:
+                    return
+                except OSError:
+                    pass
+            proc.kill()
+        captured: dict[str, list[str]] = {"stdout": [], "stderr": []}
+        lock = threading.Lock()  # one callback at a time across both pipes
+
+        def pump(pipe, sink: list[str]) -> None:
+            def emit(line: str) -> None:
+                sink.append(line)
+                if on_line is not None:
+                    with lock:
+                        on_line(line)
+            splitter = _LineSplitter(emit)
+            for chunk in iter(lambda: pipe.read1(65536), b""):
+                splitter.feed(chunk)
+            splitter.close()
+            pipe.close()
+
+        pumps = [
+            threading.Thread(target=pump, args=(proc.stdout, captured["stdout"]), daemon=True),
+            threading.Thread(target=pump, args=(proc.stderr, captured["stderr"]), daemon=True),
+        ]
+        for t in pumps:
+            t.start()
+        try:
+            with on_cancel(cancel, kill):
+                proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill()
+            proc.wait()
+            raise
+        finally:
+            for t in pumps:
+                t.join(timeout=5)
+
+        def joined(lines: list[str]) -> str:
+            return "".join(f"{line}\n" for line in lines)
+
+        return subprocess.CompletedProcess(
+            cmd, proc.returncode, joined(captured["stdout"]), joined(captured["stderr"])
+        )
+
 
 # Singleton
 docker_service = DockerService()
@@ -0,0 +1,277 @@
+"""
+RIFT 2026 — Dependency Environment Cache
+
+Keeps installed dependency environments between runs, keyed by the hash of
+the repo's dependency manifests (requirements*.txt, pyproject.toml,
+package-lock.json, ...) plus the interpreter they were built for:
+
+  <ENV_CACHE_DIR>/<key>/venv/          Python (--system-site-packages, so the
+                                       sandbox's own pytest stays visible)
+  <ENV_CACHE_DIR>/<key>/node_modules/  Node
+
+The sandbox mounts the entry (Docker) or activates it via PATH (local), and
+DiscoverAgent skips the install step when the entry is ready. An entry
+becomes ready when its install command succeeds (the command chain ends
+by touching $RIFT_ENV_DIR/.ready). The cache is LRU-evicted down to
+ENV_CACHE_MAX_BYTES after every run.
+
+A local run that installs the project itself in editable mode points the
+shared venv at its own workspace, so it checks the entry out exclusively
+(acquire(exclusive=True)): concurrent runs of the same repo wait for it
+instead of importing each other's checkouts.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import (
+    ENV_CACHE_DIR,
+    ENV_CACHE_ENABLED,
+    ENV_CACHE_MAX_BYTES,
+    ENV_CACHE_STALE_SECONDS,
+    SANDBOX_IMAGE,
+)
+from services.cancellation import CancelToken, RunCancelled
+from utils import dir_size
+
+logger = logging.getLogger("rift.env_cache")
+
+# Files whose content determines the installed environment
+PYTHON_MANIFESTS = (
+    "requirements*.txt", "requirements/*.txt", "pyproject.toml", "setup.py",
+    "setup.cfg", "Pipfile", "Pipfile.lock", "poetry.lock",
+)
+NODE_MANIFESTS = (
+    "package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+)
+
+READY_MARKER = ".ready"
+SIZE_FILE = ".size"
+
+
+@dataclass
+class EnvHandle:
+    """A cache entry checked out by one run."""
+    key: str
+    kind: str          # "python" | "node"
+    path: Path
+    ready: bool        # dependencies already installed
+    exclusive: bool = False  # holds the entry's lease (see acquire)
+
+    @property
+    def venv(self) -> Path:
+        return self.path / "venv"
+
+    @property
+    def node_modules(self) -> Path:
+        return self.path / "node_modules"
+
+    def ready_command(self) -> str:
+        """Shell command appended (with &&) to a successful install."""
+        if self.kind == "node":
+            return (
+                'node -e "require(\\"fs\\").writeFileSync('
+                'process.env.RIFT_ENV_DIR + \\"/' + READY_MARKER + '\\", \\"\\")"'
+            )
+        return (
+            'python -c "import os, pathlib; '
+            'pathlib.Path(os.environ[\\"RIFT_ENV_DIR\\"], \\"' + READY_MARKER + '\\").touch()"'
+        )
+
+
+class EnvCache:
+    """Manifest-hash keyed, size-bounded LRU cache of installed environments."""
+
+    def __init__(self, root: Path = ENV_CACHE_DIR, max_bytes: int = ENV_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._in_use: dict[str, int] = {}
+        self._leases: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # ---- Keys ----
+
+    def manifest_hash(self, repo_path: str, project_type: str) -> str | None:
+        """Hash of the manifests that define the environment (None if none)."""
+        patterns = NODE_MANIFESTS if project_type == "node" else PYTHON_MANIFESTS
+        root = Path(repo_path)
+        files = sorted({p for pattern in patterns for p in root.glob(pattern) if p.is_file()})
+        if not files:
+            return None
+        h = hashlib.sha256()
+        for f in files:
+            h.update(f.relative_to(root).as_posix().encode())
+            h.update(b"\0")
+            h.update(f.read_bytes())
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _key(self, manifest_hash: str, project_type: str, docker: bool) -> str:
+        # Environments are only valid for the interpreter they were built with
+        runtime = SANDBOX_IMAGE if docker else f"{sys.executable}|{sys.version}"
+        h = hashlib.sha256(f"{project_type}|{runtime}|{manifest_hash}".encode())
+        return f"{project_type}-{h.hexdigest()[:24]}"
+
+    # ---- Checkout ----
+
+    def acquire(
+        self, repo_path: str, project_type: str, docker: bool,
+        exclusive: bool = False, cancel: CancelToken | None = None,
+    ) -> EnvHandle | None:
+        """
+        Check out the cache entry for this repo's manifests. Returns None when
+        caching is disabled, there are no manifests, or another run is
+        still building the same entry (that run installs it; this one
+        installs into its own container as before).
+
+        exclusive: wait until no other exclusive holder uses the entry and
+        keep it until release(); the wait stops with RunCancelled if
+        cancel fires.
+        """
+        if not ENV_CACHE_ENABLED or project_type not in ("python", "node"):
+            return None
+        try:
+            manifest_hash = self.manifest_hash(repo_path, project_type)
+        except OSError as e:
+            logger.warning(f"Could not hash manifests: {e}")
+            return None
+        if manifest_hash is None:
+            return None
+        if project_type == "node" and not docker and os.path.lexists(Path(repo_path) / "node_modules"):
+            # Local runs link node_modules into the repo; never shadow a real one
+            return None
+
+        key = self._key(manifest_hash, project_type, docker)
+        path = self.root / key
+        with self._lock:
+            ready = (path / READY_MARKER).exists()
+            if not ready and self._in_use.get(key):
+                logger.info(f"Env {key} is being built by another run — not sharing it")
+                return None
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+
+        handle = EnvHandle(key=key, kind=project_type, path=path, ready=ready)
+        if exclusive:
+            try:
+                self._lease(handle, cancel)
+            except BaseException:
+                self.release(handle)
+                raise
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+            if project_type == "node":
+                handle.node_modules.mkdir(exist_ok=True)
+            elif not ready and not docker:
+                self._create_local_venv(handle)
+            os.utime(path)  # LRU clock
+        except Exception as e:
+            logger.warning(f"Could not prepare env {key}: {e}")
+            self.release(handle)
+            return None
+
+        logger.info(f"Env {key}: {'cache hit' if ready else 'cache miss, will install'}")
+        return handle
+
+    def _lease(self, handle: EnvHandle, cancel: CancelToken | None) -> None:
+        with self._lock:
+            lease = self._leases.setdefault(handle.key, threading.Lock())
+        start = time.monotonic()
+        while not lease.acquire(timeout=0.2):
+            if cancel is not None and cancel.cancelled:
+                raise RunCancelled("Run cancelled")
+        handle.exclusive = True
+        waited = time.monotonic() - start
+        if waited > 1:
+            logger.info(f"Waited {waited:.1f}s for exclusive use of env {handle.key}")
+
+    def _create_local_venv(self, handle: EnvHandle) -> None:
+        """
+        Create the local venv (kept as-is after a failed install; pip picks
+        up where it stopped). The backend's own site-packages are appended
+        via a .pth file, so tools installed there (pytest) stay importable
+        even when the backend itself runs from a venv.
+        """
+        import site
+        import sysconfig
+        import venv
+
+        if handle.venv.exists():
+            return
+        venv.EnvBuilder(system_site_packages=True, with_pip=True, symlinks=os.name != "nt").create(
+            str(handle.venv)
+        )
+        scheme = "venv" if "venv" in sysconfig.get_scheme_names() else (
+            "nt" if os.name == "nt" else "posix_prefix"
+        )
+        purelib = sysconfig.get_path(
+            "purelib", scheme, vars={"base": str(handle.venv), "platbase": str(handle.venv)}
+        )
+        parents = [p for p in site.getsitepackages() if os.path.isdir(p)]
+        Path(purelib, "rift_parent.pth").write_text("\n".join(parents) + "\n")
+
+    def release(self, handle: EnvHandle) -> None:
+        """Return an entry after a run; records its size and evicts LRU entries."""
+        if handle.exclusive:
+            handle.exclusive = False
+            self._leases[handle.key].release()
+        with self._lock:
+            count = self._in_use.get(handle.key, 0) - 1
+            if count > 0:
+                self._in_use[handle.key] = count
+            else:
+                self._in_use.pop(handle.key, None)
+
+        if not handle.ready and (handle.path / READY_MARKER).exists():
+            try:
+                size = dir_size(handle.path)
+                (handle.path / SIZE_FILE).write_text(str(size))
+                logger.info(f"Env {handle.key} cached ({size / 1e6:.0f} MB)")
+            except OSError as e:
+                logger.warning(f"Could not size env {handle.key}: {e}")
+        self.evict()
+
+    # ---- Eviction ----
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits max_bytes."""
+        if not self.root.exists():
+            return
+        entries = []
+        now = time.time()
+        with self._lock:
+            in_use = set(self._in_use)
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name in in_use:
+                continue
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if not (path / READY_MARKER).exists():
+                # Failed or abandoned build
+                if now - mtime > ENV_CACHE_STALE_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+                continue
+            try:
+                size = int((path / SIZE_FILE).read_text())
+            except (OSError, ValueError):
+                size = dir_size(path)
+            entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.info(f"Evicting env {path.name} ({size / 1e6:.0f} MB)")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+# Singleton
+env_cache = EnvCache()
@@ -0,0 +1,292 @@
+"""
+RIFT 2026 — Repository File Index
+
+One index per run: a single tree walk that every agent reads from instead of
+running its own Path.rglob and re-reading files from disk.
+
+Each entry lazily loads the raw bytes, decoded text, line offsets and a
+content hash, and keeps them until the heal step writes the file (the heal
+agent calls refresh() for exactly the paths it touched). Before each healing
+iteration the orchestrator also calls sync(), which refreshes anything else
+that changed since the last scan according to git diff --name-only.
+"""
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+from services.git_service import git_service
+
+logger = logging.getLogger("rift.file_index")
+
+# Directories never indexed (same rules the agents used with rglob)
+SKIP_DIRS = {"__pycache__", "venv", ".venv", "node_modules", ".git"}
+
+
+def is_skipped(rel_parts: tuple[str, ...]) -> bool:
+    """True if any path component is hidden or a vendored/cache directory."""
+    return any(p.startswith(".") or p in SKIP_DIRS for p in rel_parts)
+
+
+class FileEntry:
+    """A single indexed file. Content is read on first access and cached."""
+
+    __slots__ = ("rel_path", "path", "_data", "_text", "_line_offsets", "_digest")
+
+    def __init__(self, rel_path: str, path: Path):
+        self.rel_path = rel_path
+        self.path = path
+        self._data: bytes | None = None
+        self._text: str | None = None
+        self._line_offsets: list[int] | None = None
+        self._digest: str | None = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def suffix(self) -> str:
+        return self.path.suffix
+
+    @property
+    def is_loaded(self) -> bool:
+        """True once the content has been read into memory."""
+        return self._data is not None
+
+    @property
+    def size(self) -> int:
+        """Size in bytes (from disk until the content is loaded)."""
+        if self._data is not None:
+            return len(self._data)
+        return self.path.stat().st_size
+
+    @property
+    def data(self) -> bytes:
+        """Raw file bytes."""
+        if self._data is None:
+            self._data = self.path.read_bytes()
+        return self._data
+
+    @property
+    def text(self) -> str:
+        """Decoded text with universal newlines (same as Path.read_text)."""
+        if self._text is None:
+            text = self.data.decode("utf-8", errors="replace")
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            self._text = text
+        return self._text
+
+    @property
+    def digest(self) -> str:
+        """SHA-1 of the raw bytes — identifies this content version."""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.data).hexdigest()
+        return self._digest
+
+    @property
+    def line_offsets(self) -> list[int]:
+        """Start offset (into .text) of every line."""
+        if self._line_offsets is None:
+            text = self.text
+            offsets = [0]
+            find = text.find
+            pos = find("\n")
+            while pos != -1:
+                offsets.append(pos + 1)
+                pos = find("\n", pos + 1)
+            if offsets[-1] == len(text) and len(offsets) > 1:
+                offsets.pop()  # trailing newline does not start a new line
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def line_count(self) -> int:
+        if not self.text:
+            return 0
+        return len(self.line_offsets)
+
+    def line(self, line_num: int) -> str:
+        """Return 1-based line without its newline ('' if out of range)."""
+        offsets = self.line_offsets
+        if line_num < 1 or line_num > self.line_count:
+            return ""
+        start = offsets[line_num - 1]
+        end = offsets[line_num] if line_num < len(offsets) else len(self.text)
+        return self.text[start:end].rstrip("\n")
+
+    def lines(self, keepends: bool = False) -> list[str]:
+        return self.text.splitlines(keepends=keepends)
+
+
+class RepoFileIndex:
+    """File list + lazily cached contents for one cloned repository."""
+
+    def __init__(self, repo_path: str):
+        self.root = Path(repo_path)
+        self._entries: dict[str, FileEntry] = {}
+        self._lock = threading.Lock()
+        # Bumped whenever the set of files changes (not on content edits)
+        self.layout_version = 0
+        # Bumped on every refresh that may have changed content
+        self.content_version = 0
+        # Commit the index was last synced against (see FileIndexService.sync)
+        self.synced_commit: str | None = None
+        self.rescan()
+
+    def rescan(self) -> None:
+        """Walk the tree once, pruning skipped directories."""
+        entries: dict[str, FileEntry] = {}
+        root = str(self.root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS
+            )
+            rel_dir = os.path.relpath(dirpath, root)
+            for fname in filenames:
+                if fname.startswith("."):
+                    continue
+                rel = fname if rel_dir == "." else f"{rel_dir}/{fname}"
+                rel = rel.replace("\\", "/")
+                entries[rel] = FileEntry(rel, Path(dirpath) / fname)
+        with self._lock:
+            self._entries = dict(sorted(entries.items()))
+            self.layout_version += 1
+            self.content_version += 1
+        logger.info(f"Indexed {len(entries)} file(s) under {self.root}")
+
+    # ---- Lookups ----
+
+    def files(self, *suffixes: str) -> list[FileEntry]:
+        """All entries (sorted by path), optionally filtered by suffix."""
+        with self._lock:
+            entries = list(self._entries.values())
+        if not suffixes:
+            return entries
+        return [e for e in entries if e.rel_path.endswith(suffixes)]
+
+    def count(self, *suffixes: str) -> int:
+        return len(self.files(*suffixes))
+
+    def relpath(self, path) -> str | None:
+        """Repo-relative, forward-slash path for an absolute or relative path."""
+        p = Path(path)
+        if p.is_absolute():
+            try:
+                p = p.relative_to(self.root)
+            except ValueError:
+                try:
+                    p = p.resolve().relative_to(self.root.resolve())
+                except ValueError:
+                    return None
+        return str(p).replace("\\", "/")
+
+    def get(self, path) -> FileEntry | None:
+        rel = self.relpath(path)
+        if rel is None:
+            return None
+        with self._lock:
+            return self._entries.get(rel)
+
+    def exists(self, path) -> bool:
+        return self.get(path) is not None
+
+    def read_text(self, path) -> str | None:
+        """Indexed text, falling back to disk for paths outside the index."""
+        entry = self.get(path)
+        try:
+            if entry is not None:
+                return entry.text
+            p = Path(path)
+            if not p.is_absolute():
+                p = self.root / p
+            return p.read_text(encoding="utf-8", errors="replace")
+        except Exception:
+            return None
+
+    # ---- Updates ----
+
+    def refresh(self, paths) -> None:
+        """Drop cached content for the given paths and pick up adds/removes."""
+        layout_changed = False
+        with self._lock:
+            for path in paths:
+                rel = self.relpath(path)
+                if rel is None or is_skipped(tuple(rel.split("/"))):
+                    continue
+                full = self.root / rel
+                if full.is_file():
+                    if rel not in self._entries:
+                        layout_changed = True
+                    self._entries[rel] = FileEntry(rel, full)
+                elif self._entries.pop(rel, None) is not None:
+                    layout_changed = True
+            if layout_changed:
+                self._entries = dict(sorted(self._entries.items()))
+                self.layout_version += 1
+            self.content_version += 1
+
+
+class FileIndexService:
+    """Holds one RepoFileIndex per repo path for the lifetime of a run."""
+
+    def __init__(self):
+        self._indexes: dict[str, RepoFileIndex] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(repo_path: str) -> str:
+        return str(Path(repo_path).resolve())
+
+    def build(self, repo_path: str) -> RepoFileIndex:
+        """(Re)build the index for a freshly cloned repo."""
+        index = RepoFileIndex(repo_path)
+        index.synced_commit = git_service.head_sha(repo_path)
+        with self._lock:
+            self._indexes[self._key(repo_path)] = index
+        return index
+
+    def get(self, repo_path: str) -> RepoFileIndex:
+        """Return the run's index, building it on first use."""
+        key = self._key(repo_path)
+        with self._lock:
+            index = self._indexes.get(key)
+        if index is None:
+            index = self.build(repo_path)
+        return index
+
+    def refresh(self, repo_path: str, paths) -> None:
+        """Re-read only the files the heal step wrote."""
+        self.get(repo_path).refresh(paths)
+
+    def sync(self, repo_path: str) -> RepoFileIndex:
+        """
+        Refresh every file changed since the last sync, detected with
+        git diff --name-only against the last synced commit (plus untracked
+        files). Falls back to a full rescan when git can't answer.
+        """
+        index = self.get(repo_path)
+        head = git_service.head_sha(repo_path)
+        if index.synced_commit is None or head is None:
+            index.rescan()
+        else:
+            try:
+                changed = git_service.changed_paths(repo_path, index.synced_commit)
+            except Exception as e:
+                logger.warning(f"git diff failed ({e}), rescanning {repo_path}")
+                index.rescan()
+            else:
+                index.refresh(changed)
+                logger.info(f"Index sync: {len(changed)} changed path(s) since {index.synced_commit[:8]}")
+        index.synced_commit = head
+        return index
+
+    def drop(self, repo_path: str) -> None:
+        with self._lock:
+            self._indexes.pop(self._key(repo_path), None)
+
+
+# Singleton
+file_index_service = FileIndexService()
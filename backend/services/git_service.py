@@ -1,15 +1,21 @@
 """
 RIFT 2026 — Git Service
 
-Handles branch creation, committing with [AI-AGENT] prefix, and pushing.
+Handles cloning (through a local bare-mirror cache), branch creation,
+committing with [AI-AGENT] prefix, and pushing.
 Enforces guardrails: no push to main/master.
 """
+import hashlib
 import logging
+import os
+import posixpath
+import shutil
+import threading
 from pathlib import Path
 
 from git import Repo, GitCommandError
 
-from config import COMMIT_PREFIX, PROTECTED_BRANCHES
+from config import COMMIT_PREFIX, MIRROR_CACHE_ENABLED, MIRROR_DIR, PROTECTED_BRANCHES
 from utils import format_branch_name
 
 logger = logging.getLogger("rift.git_service")
@@ -18,21 +24,111 @@ logger = logging.getLogger("rift.git_service")
 class GitService:
     """Git operations with hackathon guardrails enforced."""
 
-    def clone_repo(self, repo_url: str, dest_path: str) -> Repo:
-        """Clone a repository to dest_path (shallow, single-branch for speed)."""
-        logger.info(f"Cloning {repo_url} → {dest_path} (shallow)")
-        repo = Repo.clone_from(
-            repo_url, dest_path,
-            depth=1,
-            single_branch=True,
+    def __init__(self):
+        self._mirror_locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def clone_repo(
+        self,
+        repo_url: str,
+        dest_path: str,
+        mode: str = "full",
+        sparse_paths: list[str] | None = None,
+    ) -> Repo:
+        """
+        Clone a repository to dest_path with full history.
+
+        The objects come from a bare mirror of repo_url kept in MIRROR_DIR:
+        the first run creates it, later runs only fetch what changed, and
+        the working tree is a plain local clone of the mirror (objects
+        hardlinked when on the same filesystem, copied otherwise). The
+        clone is self-contained — no alternates pointing into MIRROR_DIR —
+        so git still works inside the sandbox, where only the checkout is
+        mounted. origin then points back at repo_url for pushing.
+        Falls back to a direct clone if the mirror cannot be used.
+
+        mode="partial" skips the mirror and makes a blobless clone instead
+        (see _partial_clone).
+        """
+        if mode == "partial":
+            return self._partial_clone(repo_url, dest_path, sparse_paths)
+
+        if MIRROR_CACHE_ENABLED:
+            try:
+                mirror = self._update_mirror(repo_url)
+                logger.info(f"Cloning {repo_url} → {dest_path} (from mirror {mirror.name})")
+                repo = Repo.clone_from(str(mirror), dest_path)
+                repo.remote("origin").set_url(repo_url)
+                return repo
+            except GitCommandError as e:
+                logger.warning(f"Mirror clone failed ({e}), cloning directly")
+                if Path(dest_path).exists():
+                    shutil.rmtree(dest_path, ignore_errors=True)
+
+        logger.info(f"Cloning {repo_url} → {dest_path}")
+        return Repo.clone_from(repo_url, dest_path)
+
+    def _partial_clone(
+        self, repo_url: str, dest_path: str, sparse_paths: list[str] | None
+    ) -> Repo:
+        """
+        Clone all commits and trees but no file contents (--filter=blob:none);
+        git fetches blobs from origin as the checkout or later commands need
+        them. With sparse_paths only those directories (plus root files such
+        as requirements.txt) are checked out, so only their blobs are ever
+        downloaded. Committing and pushing work as in a full clone.
+        """
+        sparse = [posixpath.normpath(p.strip()).strip("/") for p in sparse_paths or []]
+        sparse = [p for p in sparse if p != "." and not p.startswith("..")]
+        logger.info(
+            f"Cloning {repo_url} → {dest_path} (partial"
+            f"{', sparse: ' + ', '.join(sparse) if sparse else ''})"
         )
-        # Unshallow so we can create branches and push
-        try:
-            repo.git.fetch('--unshallow')
-        except GitCommandError:
-            pass  # Already unshallowed or not needed
+        repo = Repo.clone_from(repo_url, dest_path, filter="blob:none", no_checkout=bool(sparse))
+        if sparse:
+            repo.git.sparse_checkout("init", "--cone")
+            repo.git.sparse_checkout("set", *sparse)
+            repo.git.checkout(repo.head.reference.name)
         return repo
 
+    # ---- Mirror cache ----
+
+    def _mirror_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._mirror_locks.setdefault(key, threading.Lock())
+
+    def _update_mirror(self, repo_url: str) -> Path:
+        """Create or incrementally fetch the bare mirror of repo_url."""
+        key = hashlib.sha256(repo_url.encode()).hexdigest()[:16]
+        mirror_path = MIRROR_DIR / f"{key}.git"
+        with self._mirror_lock(key):
+            created = not mirror_path.exists()
+            if not created:
+                mirror = Repo(mirror_path)
+                logger.info(f"Updating mirror {mirror_path.name}")
+            else:
+                MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+                tmp_path = MIRROR_DIR / f"{key}.git.tmp-{os.getpid()}"
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                mirror = Repo.init(tmp_path, bare=True)
+                with mirror.config_writer() as cw:
+                    cw.set_value('remote "origin"', "url", repo_url)
+                    # Branches and tags only (no refs/pull/* etc.)
+                    cw.set_value('remote "origin"', "fetch", "+refs/heads/*:refs/heads/*")
+                    cw.add_value('remote "origin"', "fetch", "+refs/tags/*:refs/tags/*")
+                logger.info(f"Creating mirror {mirror_path.name} for {repo_url}")
+
+            mirror.git.fetch("--prune", "origin")
+            # Follow the remote's default branch, so clones check it out
+            for line in mirror.git.ls_remote("--symref", "origin", "HEAD").splitlines():
+                if line.startswith("ref: ") and line.endswith("\tHEAD"):
+                    mirror.git.symbolic_ref("HEAD", line[5:-5])
+                    break
+
+            if created:
+                os.replace(mirror.git_dir, mirror_path)
+        return mirror_path
+
     def create_branch(
         self, repo: Repo, team_name: str, leader_name: str
     ) -> str:
@@ -107,6 +203,24 @@ class GitService:
         """Return the active branch name."""
         return repo.active_branch.name
 
+    def head_sha(self, repo_path: str) -> str | None:
+        """Return the HEAD commit SHA, or None if unavailable."""
+        try:
+            return self.get_repo(repo_path).head.commit.hexsha
+        except Exception:
+            return None
+
+    def changed_paths(self, repo_path: str, since: str) -> list[str]:
+        """
+        Paths that differ between commit `since` and the working tree
+        (git diff --name-only), plus untracked files.
+        """
+        repo = self.get_repo(repo_path)
+        diff = repo.git.diff("--name-only", since)
+        paths = [p for p in diff.splitlines() if p.strip()]
+        paths.extend(repo.untracked_files)
+        return paths
+
 
 # Singleton
 git_service = GitService()
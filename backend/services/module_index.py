@@ -0,0 +1,211 @@
+"""
+RIFT 2026 — Module Resolution Index
+
+Maps dotted Python module names to repo-relative files, built once per run
+from the file index instead of guessing two paths under the repo root.
+
+Import roots (the repo's equivalent of sys.path entries), in priority order:
+  1. package dirs / pythonpath declared in pyproject.toml, setup.cfg,
+     pytest.ini or tox.ini
+  2. the repo root itself
+  3. src/ (the conventional src layout), when it is not itself a package
+
+Directories without __init__.py are treated as namespace packages, so
+nested and src/ layouts resolve the same way the interpreter would.
+The index is rebuilt only when the file layout or a config file changes.
+"""
+import configparser
+import logging
+import threading
+from weakref import WeakKeyDictionary
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+from services.file_index import RepoFileIndex, file_index_service
+
+logger = logging.getLogger("rift.module_index")
+
+CONFIG_FILES = ("pyproject.toml", "setup.cfg", "pytest.ini", "tox.ini")
+
+
+def _norm_dir(path: str) -> str:
+    """Repo-relative directory with forward slashes ('' for the root)."""
+    path = path.strip().replace("\\", "/").strip("/")
+    while path.startswith("./"):
+        path = path[2:]
+    return "" if path in ("", ".") else path
+
+
+class ModuleIndex:
+    """O(1) module name → file lookups for one layout of a repo."""
+
+    def __init__(self, index: RepoFileIndex):
+        self.roots = self._find_roots(index)
+        # dotted name -> rel path of the module file (or package __init__.py)
+        self._modules: dict[str, str] = {}
+        # dotted name of every package dir, including namespace packages
+        self._packages: set[str] = set()
+        self._build(index)
+        logger.info(
+            f"Module index: {len(self._modules)} module(s) under roots "
+            f"{[r or '.' for r in self.roots]}"
+        )
+
+    # ---- Lookups ----
+
+    def resolve(self, module_name: str) -> str | None:
+        """Repo-relative file for a module, or None (unknown / namespace-only)."""
+        return self._modules.get(module_name)
+
+    def is_package(self, module_name: str) -> bool:
+        return module_name in self._packages
+
+    # ---- Build ----
+
+    def _build(self, index: RepoFileIndex) -> None:
+        py_files = [e.rel_path for e in index.files(".py")]
+        for root in self.roots:
+            prefix = f"{root}/" if root else ""
+            found: dict[str, str] = {}
+            for rel in py_files:
+                if not rel.startswith(prefix):
+                    continue
+                parts = rel[len(prefix):][:-3].split("/")
+                if not all(p.isidentifier() for p in parts):
+                    continue
+                if parts[-1] == "__init__":
+                    parts = parts[:-1]
+                    if not parts:
+                        continue
+                    # A regular package shadows a same-named module file
+                    found[".".join(parts)] = rel
+                else:
+                    found.setdefault(".".join(parts), rel)
+                for i in range(1, len(parts)):
+                    self._packages.add(".".join(parts[:i]))
+            # Earlier roots win, like earlier sys.path entries
+            for name, rel in found.items():
+                self._modules.setdefault(name, rel)
+
+    def _find_roots(self, index: RepoFileIndex) -> list[str]:
+        roots: list[str] = []
+        for config in CONFIG_FILES:
+            entry = index.get(config)
+            if entry is None:
+                continue
+            try:
+                if config == "pyproject.toml":
+                    found = self._pyproject_roots(entry.text)
+                else:
+                    found = self._ini_roots(entry.text, config)
+            except Exception as e:
+                logger.warning(f"Could not read import roots from {config}: {e}")
+                continue
+            roots.extend(found)
+
+        roots.append("")
+        if not index.exists("src/__init__.py"):
+            roots.append("src")
+
+        # De-duplicate, keep order, drop dirs that hold no Python files
+        py_files = [e.rel_path for e in index.files(".py")]
+        unique: list[str] = []
+        for root in (_norm_dir(r) for r in roots):
+            if root in unique:
+                continue
+            if root and not any(rel.startswith(f"{root}/") for rel in py_files):
+                continue
+            unique.append(root)
+        return unique
+
+    @staticmethod
+    def _pyproject_roots(text: str) -> list[str]:
+        if tomllib is None:
+            return []
+        data = tomllib.loads(text)
+        tool = data.get("tool", {})
+        roots: list[str] = []
+
+        # setuptools: package-dir = {"" = "src"} and packages.find.where
+        setuptools = tool.get("setuptools", {})
+        package_dir = setuptools.get("package-dir", {})
+        if isinstance(package_dir, dict) and "" in package_dir:
+            roots.append(package_dir[""])
+        packages = setuptools.get("packages", {})
+        if isinstance(packages, dict):
+            roots.extend(packages.get("find", {}).get("where", []))
+
+        # poetry: packages = [{ include = "pkg", from = "src" }]
+        for pkg in tool.get("poetry", {}).get("packages", []):
+            if isinstance(pkg, dict) and "from" in pkg:
+                roots.append(pkg["from"])
+
+        # hatch: packages = ["src/pkg"] — the root is the parent dir
+        wheel = tool.get("hatch", {}).get("build", {}).get("targets", {}).get("wheel", {})
+        for pkg in wheel.get("packages", []):
+            roots.append(pkg.rstrip("/").rpartition("/")[0])
+
+        # pytest: pythonpath = ["src", "."]
+        pythonpath = tool.get("pytest", {}).get("ini_options", {}).get("pythonpath", [])
+        if isinstance(pythonpath, str):
+            pythonpath = pythonpath.split()
+        roots.extend(pythonpath)
+        return [r for r in roots if isinstance(r, str)]
+
+    @staticmethod
+    def _ini_roots(text: str, config: str) -> list[str]:
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read_string(text)
+        roots: list[str] = []
+
+        if config == "setup.cfg":
+            # [options] package_dir = \n    =src
+            for line in parser.get("options", "package_dir", fallback="").splitlines():
+                key, sep, value = line.partition("=")
+                if sep and not key.strip():
+                    roots.append(value)
+            roots.extend(parser.get("options.packages.find", "where", fallback="").split())
+
+        for section in ("pytest", "tool:pytest"):
+            roots.extend(parser.get(section, "pythonpath", fallback="").split())
+        return roots
+
+
+class ModuleIndexService:
+    """Caches one ModuleIndex per file index, rebuilt when the layout changes."""
+
+    def __init__(self):
+        # file index -> (layout key, ModuleIndex)
+        self._cache: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _layout_key(index: RepoFileIndex) -> tuple:
+        configs = []
+        for config in CONFIG_FILES:
+            entry = index.get(config)
+            configs.append(entry.digest if entry is not None else None)
+        return (index.layout_version, *configs)
+
+    def get(self, repo_path: str) -> ModuleIndex:
+        index = file_index_service.get(repo_path)
+        key = self._layout_key(index)
+        with self._lock:
+            cached = self._cache.get(index)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        modules = ModuleIndex(index)
+        with self._lock:
+            self._cache[index] = (key, modules)
+        return modules
+
+    def resolve(self, repo_path: str, module_name: str) -> str | None:
+        """Repo-relative file path for a dotted module name, or None."""
+        return self.get(repo_path).resolve(module_name)
+
+
+# Singleton
+module_index_service = ModuleIndexService()
@@ -0,0 +1,50 @@
+"""
+RIFT 2026 — Live failure reporting pytest plugin
+
+Copied into the cloned repo's report dir and loaded in the sandbox with
+`-p rift_live` (report dir on PYTHONPATH). It only imports pytest, since
+it runs inside the sandbox's interpreter, not the backend's.
+
+pytest prints failure sections only at the end of the session. This
+plugin prints each one — same header, same --tb formatted body — as soon
+as the test (or collection) fails, so the streaming parser can analyze
+failures while later tests are still running. The end-of-session copies
+are identical and are dropped by the parser.
+"""
+import pytest
+
+_config = None
+
+
+def pytest_configure(config):
+    global _config
+    _config = config
+
+
+def _print_section(header: str, body: str) -> None:
+    reporter = _config.pluginmanager.getplugin("terminalreporter") if _config else None
+    if reporter is None or not body:
+        return
+    reporter.write_sep("_", header)
+    reporter.write_line(body)
+    # Closing banner: lets a line-based reader finish the section now
+    # instead of at the next test's (still incomplete) progress line
+    reporter.write_sep("=", "live failure end")
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_logreport(report):
+    if not report.failed:
+        return
+    # Same headlines as pytest's FAILURES / ERRORS summary sections
+    if report.when == "call":
+        header = report.head_line or "test session"
+    else:
+        header = f"ERROR at {report.when} of {report.head_line}"
+    _print_section(header, report.longreprtext)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collectreport(report):
+    if report.failed:
+        _print_section(f"ERROR collecting {report.head_line}", report.longreprtext)
@@ -0,0 +1,228 @@
+"""
+RIFT 2026 — Streaming pytest Output Parser
+
+Single-pass, line-oriented state machine over pytest / plain-traceback
+console output. Text can be fed in arbitrary chunks (feed) or as an
+iterable of lines (feed_lines), so a multi-megabyte log never has to be
+split, re-joined or searched more than once.
+
+Every line is examined a bounded number of times with anchored patterns
+(no DOTALL spans across lines), so parsing is O(total output size).
+
+Three record kinds are collected in the same pass; close() returns the
+first non-empty kind, in the order the regex parser used:
+  1. pytest failure sections  (____ test ____ … E   XError: msg)
+  2. short summary lines      (FAILED path.py::test - XError: msg)
+  3. plain Python tracebacks  (File "x.py", line N … XError: msg),
+     attributed to the deepest non-library frame of *each* traceback
+"""
+import re
+from typing import Callable, Iterable
+
+from models import TestFailure
+
+# "____ test_name ____" — one per failure / collection error
+_SECTION = re.compile(r'_{3,} (.+?) _{3,}$')
+# "==== short test summary info ====" etc. — ends the current section
+_BANNER = re.compile(r'={3,}( .*)? ={3,}$')
+_E_ERROR = re.compile(r'E\s+(\w+(?:Error|Exception)):\s*(.+)')
+_E_ASSERT = re.compile(r'E\s+(assert\s+.+)')
+_SUMMARY = re.compile(
+    r'FAILED\s+([\w/\\._-]+\.py)::\S+\s*-\s*(\w+(?:Error|Exception)):\s*(.+)'
+)
+_TB_FRAME = re.compile(r'\s*File "([^"]+)", line (\d+)')
+_TB_ERROR = re.compile(r'\s*(\w+(?:Error|Exception)):\s*(.+)')
+
+# Characters allowed in a "path.py:N:" frame reference (besides alphanumerics)
+_PATH_CHARS = frozenset("\\/._-")
+
+
+def is_library(path: str) -> bool:
+    return "site-packages" in path or "lib/python" in path.replace("\\", "/").lower()
+
+
+def _last_frame_ref(line: str) -> tuple[str, int] | None:
+    """
+    Last "path.py:N:" reference in a line. Scans each ".py:" occurrence
+    once forwards (digits) and backwards (path chars, stopping at the
+    previous ':'), so the cost is linear in the line length.
+    """
+    found = None
+    pos = line.find(".py:")
+    while pos != -1:
+        digits_start = pos + 4
+        end = digits_start
+        while end < len(line) and line[end].isdigit():
+            end += 1
+        if end > digits_start and end < len(line) and line[end] == ":":
+            start = pos
+            while start > 0 and (line[start - 1].isalnum() or line[start - 1] in _PATH_CHARS):
+                start -= 1
+            if start < pos:
+                found = (line[start:pos + 3], int(line[digits_start:end]))
+        pos = line.find(".py:", pos + 4)
+    return found
+
+
+class PytestOutputParser:
+    """
+    Incremental parser; feed() text, then close() for the failures.
+
+    on_failure, if given, is called with each record as soon as it is
+    complete (a section at its closing boundary, a summary or traceback at
+    its error line) — before close() decides which kind wins.
+    """
+
+    def __init__(self, on_failure: Callable[[TestFailure], None] | None = None):
+        self._on_failure = on_failure
+        self._partial: list[str] = []
+        # Pattern 1: current section state
+        self._section_name = ""
+        self._section_error: tuple[str, str] | None = None
+        self._section_assert: str | None = None
+        self._section_frame: tuple[str, int] | None = None
+        self.sections: list[TestFailure] = []
+        # Sections already seen — the live plugin prints each one twice
+        self._section_keys: set[tuple] = set()
+        # Pattern 2
+        self.summary: list[TestFailure] = []
+        # Pattern 3: deepest repo frame of the traceback being read
+        self._tb_frame: tuple[str, int] | None = None
+        self.tracebacks: list[TestFailure] = []
+        self._closed = False
+
+    # ---- Input ----
+
+    def feed(self, data: str) -> None:
+        """Consume a chunk of output (may end mid-line)."""
+        if not data:
+            return
+        if "\n" not in data:
+            self._partial.append(data)
+            return
+        lines = data.split("\n")
+        lines[0] = "".join(self._partial) + lines[0]
+        tail = lines.pop()
+        self._partial = [tail] if tail else []
+        for line in lines:
+            self.feed_line(line)
+
+    def feed_lines(self, lines: Iterable[str]) -> None:
+        """Consume complete lines (e.g. a file object or a generator)."""
+        for line in lines:
+            self.feed_line(line)
+
+    def feed_line(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+
+        # Section boundaries (a live-plugin header may follow "collecting ...")
+        if line.endswith("_"):
+            start = line.find("___")
+            m = _SECTION.match(line, start) if start != -1 else None
+            if m:
+                self._end_section()
+                self._section_name = m.group(1)
+                return
+        if line.startswith("="):
+            if _BANNER.match(line):
+                self._end_section()
+                self._section_name = ""
+                return
+
+        # Pattern 1 body: first E error / assert line, last frame reference
+        if line.startswith("E"):
+            if self._section_error is None:
+                m = _E_ERROR.match(line)
+                if m:
+                    self._section_error = (m.group(1), m.group(2).strip())
+                elif self._section_assert is None:
+                    m = _E_ASSERT.match(line)
+                    if m:
+                        self._section_assert = m.group(1).strip()
+        if ".py:" in line:
+            ref = _last_frame_ref(line)
+            if ref:
+                self._section_frame = ref
+
+        # Pattern 2: short test summary
+        if line.startswith("FAILED"):
+            m = _SUMMARY.match(line)
+            if m:
+                self._emit(self.summary, TestFailure(
+                    test_id=line.split()[1],
+                    file=m.group(1).replace("\\", "/"),
+                    line_number=0,
+                    error_type=m.group(2),
+                    message=m.group(3).strip(),
+                ))
+
+        # Pattern 3: plain tracebacks
+        stripped = line.lstrip()
+        if stripped.startswith("Traceback (most recent call last)"):
+            self._tb_frame = None
+        elif stripped.startswith("File \""):
+            m = _TB_FRAME.match(line)
+            if m and not is_library(m.group(1)):
+                self._tb_frame = (m.group(1).replace("\\", "/"), int(m.group(2)))
+        elif self._tb_frame is not None and ("Error" in stripped or "Exception" in stripped):
+            m = _TB_ERROR.match(line)
+            if m:
+                self._emit(self.tracebacks, TestFailure(
+                    file=self._tb_frame[0],
+                    line_number=self._tb_frame[1],
+                    error_type=m.group(1),
+                    message=m.group(2).strip(),
+                ))
+                self._tb_frame = None
+
+    # ---- Output ----
+
+    def _end_section(self) -> None:
+        name = self._section_name
+        error, assertion, frame = self._section_error, self._section_assert, self._section_frame
+        self._section_error = self._section_assert = self._section_frame = None
+        if frame is None or (error is None and assertion is None):
+            return
+        file_path = frame[0].replace("\\", "/")
+        if is_library(file_path):
+            return
+        if error is not None:
+            err_type, err_msg = error
+        else:
+            err_type, err_msg = "AssertionError", assertion
+        key = (name, file_path, frame[1], err_type, err_msg)
+        if key in self._section_keys:
+            return
+        self._section_keys.add(key)
+        self._emit(self.sections, TestFailure(
+            test_id=name,
+            file=file_path,
+            line_number=frame[1],
+            error_type=err_type,
+            message=err_msg,
+        ))
+
+    def _emit(self, records: list[TestFailure], failure: TestFailure) -> None:
+        records.append(failure)
+        if self._on_failure is not None:
+            self._on_failure(failure)
+
+    def close(self) -> list[TestFailure]:
+        """Flush the last partial line / section and return the failures."""
+        if not self._closed:
+            if self._partial:
+                self.feed_line("".join(self._partial))
+                self._partial = []
+            self._end_section()
+            self._closed = True
+        return self.sections or self.summary or self.tracebacks
+
+
+def parse_pytest_output(output: str | Iterable[str]) -> list[TestFailure]:
+    """Parse a whole log (string) or a stream of lines in one pass."""
+    parser = PytestOutputParser()
+    if isinstance(output, str):
+        parser.feed(output)
+    else:
+        parser.feed_lines(output)
+    return parser.close()
@@ -0,0 +1,293 @@
+"""
+RIFT 2026 — Warm pytest worker
+
+Copied into the cloned repo's report dir and run in the sandbox in place
+of `python -m pytest` (same arguments). Only the standard library is
+imported at module level, since it runs inside the sandbox's interpreter.
+
+  python .rift/rift_worker.py <pytest args>
+
+The first call runs pytest in-process and then starts a background server
+that imports pytest, its plugins and the third-party modules the repo's
+code imports — but none of the repo's own modules. Later calls connect to
+the server over a unix socket; it forks a child per run, so every run
+gets fresh project modules (including the files the heal step just
+changed) on top of already-imported dependencies. The child's output is
+streamed back and the client exits with pytest's exit code, sent as a
+trailer line after the output.
+
+The server restarts when the interpreter or the dependency install stamp
+changes, and exits after RIFT_WORKER_IDLE seconds without requests.
+Without fork / unix sockets (Windows) every call just runs pytest.
+"""
+import ast
+import hashlib
+import json
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+
+EXIT_TRAILER = b"\x00rift-worker-exit "
+RESTART = b"\x00rift-worker-restart\n"
+INSTALL_STAMP = os.path.join(".rift", "install.json")
+SKIP_DIRS = {".git", ".rift", "node_modules", "__pycache__", ".venv", "venv", ".tox", "site-packages"}
+
+SUPPORTED = hasattr(os, "fork") and hasattr(socket, "AF_UNIX")
+
+
+def socket_path(root: str) -> str:
+    digest = hashlib.sha256(os.path.realpath(root).encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"rift-worker-{digest}.sock")
+
+
+def env_stamp(root: str) -> str:
+    """Changes whenever the interpreter or the installed dependencies change."""
+    try:
+        st = os.stat(os.path.join(root, INSTALL_STAMP))
+        with open(os.path.join(root, INSTALL_STAMP), "rb") as f:
+            install = hashlib.sha256(f.read()).hexdigest() + str(st.st_mtime_ns)
+    except OSError:
+        install = ""
+    return f"{sys.executable}|{install}"
+
+
+# ---------- Client ----------
+
+def run_direct(args: list[str]) -> int:
+    import pytest
+
+    sys.path.insert(0, os.getcwd())  # as `python -m pytest` does
+    return int(pytest.main(args))
+
+
+def spawn_server(root: str) -> None:
+    log = open(os.path.join(root, ".rift", "worker.log"), "ab")
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", root],
+        cwd=root,
+        stdin=subprocess.DEVNULL,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,  # outlives this call, not tied to its pipes
+    )
+    log.close()
+
+
+def run_client(args: list[str]) -> int:
+    root = os.getcwd()
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(socket_path(root))
+    except OSError:
+        code = run_direct(args)
+        spawn_server(root)
+        return code
+
+    request = {"args": args, "cwd": root, "env": dict(os.environ), "stamp": env_stamp(root)}
+    conn.sendall(json.dumps(request).encode() + b"\n")
+    out = sys.stdout.buffer
+    with conn, conn.makefile("rb") as reader:
+        for line in reader:
+            if line == RESTART:
+                conn.close()
+                code = run_direct(args)
+                spawn_server(root)
+                return code
+            end = line.find(EXIT_TRAILER)
+            if end != -1:
+                out.write(line[:end])
+                out.flush()
+                return int(line[end + len(EXIT_TRAILER):])
+            out.write(line)
+            out.flush()
+    print("rift worker: connection lost before the run finished", file=sys.stderr)
+    return 1
+
+
+def stop(root: str) -> None:
+    """Ask a running server for this repo to exit (no-op if none)."""
+    if not SUPPORTED:
+        return
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(2)
+            conn.connect(socket_path(root))
+            conn.sendall(b'{"stop": true}\n')
+            conn.recv(1)
+    except OSError:
+        pass
+
+
+# ---------- Server ----------
+
+def _local_names(root: str) -> set[str]:
+    """Every module / package name defined in the repo (never pre-imported)."""
+    names = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        names.update(d for d in dirnames)
+        names.update(f[:-3] for f in filenames if f.endswith(".py"))
+    return names
+
+
+def _imported_names(root: str) -> set[str]:
+    """Top-level names of the absolute imports in the repo's code."""
+    names = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            if not filename.endswith(".py"):
+                continue
+            try:
+                with open(os.path.join(dirpath, filename), "rb") as f:
+                    tree = ast.parse(f.read())
+            except (OSError, SyntaxError, ValueError):
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(a.name.split(".")[0] for a in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.add(node.module.split(".")[0])
+    return names
+
+
+def preimport(root: str) -> list[str]:
+    """Import pytest, its plugins and the repo's third-party dependencies."""
+    import importlib
+    import importlib.metadata
+    import importlib.util
+
+    import pytest  # noqa: F401
+
+    for ep in importlib.metadata.entry_points(group="pytest11"):
+        try:
+            ep.load()
+        except Exception:
+            pass
+
+    real_root = os.path.realpath(root)
+    loaded = []
+    for name in sorted(_imported_names(root) - _local_names(root)):
+        try:
+            spec = importlib.util.find_spec(name)
+            origin = spec and (spec.origin or next(iter(spec.submodule_search_locations or []), None))
+            if not origin or os.path.realpath(origin).startswith(real_root + os.sep):
+                continue
+            importlib.import_module(name)
+            loaded.append(name)
+        except BaseException:
+            continue
+    return loaded
+
+
+def _run_child(conn: socket.socket, request: dict) -> None:
+    """Forked child: run pytest with output going to the connection."""
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.path.insert(0, request["cwd"])
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(conn.fileno(), 1)
+        os.dup2(conn.fileno(), 2)
+        sys.stdout.reconfigure(line_buffering=True)
+        sys.stderr.reconfigure(line_buffering=True)
+        import pytest
+        # Plugin modules were imported by the parent, so pytest cannot
+        # assert-rewrite them; that is expected here, not worth a warning
+        args = ["-W", "ignore::pytest.PytestAssertRewriteWarning", *request["args"]]
+        code = int(pytest.main(args))
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 3  # pytest's INTERNAL_ERROR
+    os._exit(code)
+
+
+def _wait_child(pid: int, conn: socket.socket) -> int:
+    """Wait for the child; kill it if the client disconnects."""
+    while True:
+        done, status = os.waitpid(pid, os.WNOHANG)
+        if done:
+            return os.waitstatus_to_exitcode(status)
+        readable, _, _ = select.select([conn], [], [], 0.2)
+        if readable:
+            try:
+                gone = conn.recv(1, socket.MSG_PEEK) == b""
+            except OSError:
+                gone = True
+            if gone:
+                os.kill(pid, signal.SIGKILL)
+
+
+def serve(root: str) -> None:
+    path = socket_path(root)
+    stamp = env_stamp(root)
+    sys.path.pop(0)  # the report dir — keep the repo itself off sys.path
+    loaded = preimport(root)
+    print(f"rift worker: {len(loaded)} module(s) pre-imported: {' '.join(loaded)}", flush=True)
+
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    inode = os.stat(path).st_ino
+    server.listen()
+    server.settimeout(float(os.environ.get("RIFT_WORKER_IDLE", 600)))
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            conn.settimeout(None)
+            with conn:
+                line = conn.makefile("rb").readline()
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                if request.get("stop"):
+                    break
+                if request.get("stamp") != stamp or not os.path.isdir(request.get("cwd", "")):
+                    conn.sendall(RESTART)
+                    break
+                sys.stdout.flush()
+                pid = os.fork()
+                if pid == 0:
+                    server.close()
+                    _run_child(conn, request)
+                code = _wait_child(pid, conn)
+                try:
+                    conn.sendall(EXIT_TRAILER + str(code).encode() + b"\n")
+                except OSError:
+                    pass
+    finally:
+        server.close()
+        try:
+            if os.stat(path).st_ino == inode:  # not yet replaced by a new server
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def main(argv: list[str]) -> int:
+    if argv[:1] == ["--serve"]:
+        serve(argv[1])
+        return 0
+    if not SUPPORTED:
+        return run_direct(argv)
+    return run_client(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,37 +1,287 @@
 """
 RIFT 2026 — Results Service
 
-Reads/writes results.json to the project root.
+Stores every run's result as one row of an SQLite database (RESULTS_DB),
+so concurrent runs never overwrite each other and past runs stay
+queryable. The summary fields are columns of `runs`, indexed for the
+usual filters (repo URL, team, status — each newest first); the full
+RunResult is kept as JSON in a separate `run_results` table, so listing
+runs never reads a result's pages and a result is only read when a
+single run is requested.
+
+The latest result is still exported to results.json (temp file + rename,
+so readers never see a half-written file) for tools that read it
+directly. A results.json left by an older version is imported into an
+empty database.
+
+For the API, the serialized result of recently saved / requested runs is
+kept in memory (RESULTS_CACHE_SIZE, LRU) as a ResultPayload: the JSON
+bytes, a gzipped copy when large, and a version (the row's update time)
+that the endpoints turn into ETag / Last-Modified headers. A dashboard
+polling an unchanged run is answered from memory, usually with a 304.
 """
+import gzip
 import json
 import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 
-from config import RESULTS_PATH
+from config import RESULTS_CACHE_SIZE, RESULTS_DB, RESULTS_GZIP_MIN_BYTES, RESULTS_PATH
 from models import RunResult
 
 logger = logging.getLogger("rift.results_service")
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        TEXT PRIMARY KEY,
+    repo_url      TEXT NOT NULL,
+    team_name     TEXT NOT NULL,
+    leader_name   TEXT NOT NULL,
+    branch_name   TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    score         INTEGER NOT NULL,
+    total_commits INTEGER NOT NULL,
+    started_at    TEXT NOT NULL,
+    finished_at   TEXT,
+    updated_at    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_results (
+    run_id TEXT PRIMARY KEY REFERENCES runs (run_id),
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_time   ON runs (started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_repo   ON runs (repo_url, started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_team   ON runs (team_name, started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_status ON runs (status, started_at DESC, run_id DESC);
+CREATE INDEX IF NOT EXISTS runs_by_update ON runs (updated_at DESC);
+"""
+
+# Columns returned by list_runs (everything but the full result JSON)
+SUMMARY_COLUMNS = (
+    "run_id", "repo_url", "team_name", "leader_name", "branch_name",
+    "status", "score", "total_commits", "started_at", "finished_at",
+)
+
+
+@dataclass(frozen=True)
+class ResultPayload:
+    """A run's result, serialized once and served as-is."""
+    run_id: str
+    body: bytes            # compact JSON
+    gzipped: bytes | None  # body gzip-compressed, if at least RESULTS_GZIP_MIN_BYTES
+    updated_at: float      # time.time() of the save
+
+    @property
+    def version(self) -> int:
+        """Changes on every save of the run (microsecond update time)."""
+        return int(self.updated_at * 1_000_000)
+
+    @property
+    def etag(self) -> str:
+        # Weak: the same version is served both plain and gzipped
+        return f'W/"{self.run_id}-{self.version}"'
+
 
 class ResultsService:
-    """Persists RunResult as results.json."""
+    """Persists RunResults in SQLite (plus the latest as results.json)."""
+
+    def __init__(self, db_path: Path = RESULTS_DB):
+        self.db_path = db_path
+        self._local = threading.local()   # one connection per thread
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._payloads: OrderedDict[str, ResultPayload] = OrderedDict()
+        self._latest: str | None = None   # run ID of the last saved result
+        self._cache_lock = threading.Lock()
 
-    def save(self, result: RunResult) -> Path:
-        """Write RunResult to results.json in project root."""
+    def save(self, result: RunResult) -> None:
+        """Insert or update the run's row and export it as results.json."""
         data = result.model_dump(mode="json")
-        RESULTS_PATH.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        logger.info(f"Results saved to {RESULTS_PATH}")
-        return RESULTS_PATH
+        row = {name: data[name] for name in SUMMARY_COLUMNS}
+        row["status"] = result.status.value
+        row["updated_at"] = time.time()
+        text = json.dumps(data, separators=(",", ":"))
+        columns = ", ".join(row)
+        updates = ", ".join(f"{name} = excluded.{name}" for name in row if name != "run_id")
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT INTO runs ({columns}) VALUES ({', '.join('?' * len(row))}) "
+                f"ON CONFLICT (run_id) DO UPDATE SET {updates}",
+                tuple(row.values()),
+            )
+            conn.execute(
+                "INSERT INTO run_results (run_id, result) VALUES (?, ?) "
+                "ON CONFLICT (run_id) DO UPDATE SET result = excluded.result",
+                (result.run_id, text),
+            )
+        payload = self._make_payload(result.run_id, text, row["updated_at"])
+        with self._cache_lock:
+            self._remember(payload)
+            self._latest = result.run_id
+        self._write_atomic(RESULTS_PATH, json.dumps(data, indent=2))
+        logger.info(f"Results saved for run {result.run_id}")
 
-    def load(self) -> dict | None:
-        """Load results.json. Returns None if not found."""
-        if not RESULTS_PATH.exists():
-            return None
+    def load(self, run_id: str | None = None) -> dict | None:
+        """Full result of one run (the latest if run_id is None). None if not found."""
+        payload = self.payload(run_id)
+        return json.loads(payload.body) if payload else None
+
+    def payload(self, run_id: str | None = None) -> ResultPayload | None:
+        """Serialized result of one run (the latest if run_id is None), from memory if cached."""
+        with self._cache_lock:
+            key = run_id or self._latest
+            if key is not None and key in self._payloads:
+                self._payloads.move_to_end(key)
+                return self._payloads[key]
+
+        query = "SELECT run_id, result, updated_at FROM runs JOIN run_results USING (run_id)"
+        if run_id:
+            query, args = query + " WHERE run_id = ?", (run_id,)
+        else:
+            query, args = query + " ORDER BY updated_at DESC LIMIT 1", ()
         try:
-            return json.loads(RESULTS_PATH.read_text(encoding="utf-8"))
-        except Exception as e:
+            row = self._conn().execute(query, args).fetchone()
+        except sqlite3.Error as e:
             logger.error(f"Failed to load results: {e}")
             return None
+        if row is None:
+            return None
+
+        payload = self._make_payload(*row)
+        with self._cache_lock:
+            current = self._payloads.get(payload.run_id)
+            if current is not None and current.updated_at >= payload.updated_at:
+                return current  # saved again while we were reading
+            self._remember(payload)
+            if run_id is None and self._latest is None:
+                self._latest = payload.run_id
+        return payload
+
+    def list_runs(
+        self,
+        limit: int = 20,
+        cursor: str | None = None,
+        repo_url: str | None = None,
+        team_name: str | None = None,
+        status: str | None = None,
+    ) -> dict:
+        """
+        One page of run summaries, newest first.
+
+        Pages are keyset-paginated: pass the returned next_cursor to get
+        the following page (None on the last page). Every filter matches
+        an index, so a page costs the same no matter how deep it is.
+        """
+        where, args = [], []
+        for column, value in (("repo_url", repo_url), ("team_name", team_name), ("status", status)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if cursor:
+            started_at, _, run_id = cursor.rpartition("|")
+            where.append("(started_at, run_id) < (?, ?)")
+            args.extend([started_at, run_id])
+        query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM runs"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY started_at DESC, run_id DESC LIMIT ?"
+        args.append(limit + 1)  # one extra row tells whether there is a next page
+
+        rows = self._conn().execute(query, args).fetchall()
+        runs = [dict(zip(SUMMARY_COLUMNS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = runs[-1]
+            next_cursor = f"{last['started_at']}|{last['run_id']}"
+        return {"runs": runs, "next_cursor": next_cursor}
+
+    # ---- Internal helpers ----
+
+    @staticmethod
+    def _make_payload(run_id: str, text: str, updated_at: float) -> ResultPayload:
+        body = text.encode("utf-8")
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= RESULTS_GZIP_MIN_BYTES else None
+        return ResultPayload(run_id, body, gzipped, updated_at)
+
+    def _remember(self, payload: ResultPayload) -> None:
+        """Cache a payload (LRU). Caller holds _cache_lock."""
+        self._payloads[payload.run_id] = payload
+        self._payloads.move_to_end(payload.run_id)
+        while len(self._payloads) > RESULTS_CACHE_SIZE:
+            self._payloads.popitem(last=False)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")  # readers don't block the writer
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._ensure_schema(conn)
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._migrate(conn)
+            with conn:
+                conn.executescript(_SCHEMA)
+            self._initialized = True
+            self._import_legacy(conn)
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        """Move result JSON out of `runs` in a database created with it inline."""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(runs)")]
+        if "result" not in columns:
+            return
+        logger.info("Moving run results into their own table")
+        summary = ", ".join(c for c in columns if c != "result")
+        conn.executescript(f"""
+            BEGIN;
+            ALTER TABLE runs RENAME TO runs_inline;
+            {"".join(f"DROP INDEX {name};" for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'runs' AND sql IS NOT NULL"
+            ))}
+            {_SCHEMA}
+            INSERT INTO runs ({summary}) SELECT {summary} FROM runs_inline;
+            INSERT INTO run_results (run_id, result) SELECT run_id, result FROM runs_inline;
+            DROP TABLE runs_inline;
+            COMMIT;
+        """)
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """Import the results.json of a pre-database version into an empty store."""
+        if conn.execute("SELECT 1 FROM runs LIMIT 1").fetchone() or not RESULTS_PATH.exists():
+            return
+        try:
+            result = RunResult.model_validate_json(RESULTS_PATH.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"Could not import {RESULTS_PATH}: {e}")
+            return
+        self.save(result)
+        logger.info(f"Imported {RESULTS_PATH} as run {result.run_id}")
+
+    @staticmethod
+    def _write_atomic(path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
 
 
 # Singleton
@@ -0,0 +1,275 @@
+"""
+RIFT 2026 — Run Scheduler
+
+Admits pipeline runs into a bounded queue and starts them on a fixed set
+of MAX_CONCURRENT_RUNS worker threads. The next run to start is picked by:
+
+  1. priority (higher first)
+  2. the team with the fewest runs in progress, then the team served
+     least recently — so one team's burst of requests cannot starve others
+  3. submission order
+
+A team never has more than MAX_RUNS_PER_TEAM runs in progress. When
+RUN_QUEUE_SIZE runs are already waiting, submit() raises QueueFull with an
+estimated wait for the Retry-After header.
+
+Independently of how many runs are in progress, stage(name) bounds how many
+run the same expensive stage at once (STAGE_LIMITS: clone, sandbox,
+analysis), so e.g. four runs do not all hit the network or the CPU-heavy
+scan at the same moment.
+
+cancel(run_id) drops a queued run (its future is cancelled) or cancels a
+running run's CancelToken, which the pipeline checks between stages.
+"""
+import itertools
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from config import (
+    MAX_CONCURRENT_RUNS,
+    MAX_RUNS_PER_TEAM,
+    RUN_DURATION_ESTIMATE,
+    RUN_QUEUE_SIZE,
+    STAGE_LIMITS,
+)
+from services.cancellation import CancelToken, RunCancelled
+
+logger = logging.getLogger("rift.run_scheduler")
+
+
+class QueueFull(Exception):
+    """The run queue is full; retry after retry_after seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Run queue is full — retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Job:
+    run_id: str
+    team: str
+    priority: int
+    fn: Callable[[], Any]
+    on_position: Callable[[int], None] | None
+    seq: int
+    cancel: CancelToken = field(default_factory=CancelToken)
+    future: Future = field(default_factory=Future)
+    position: int | None = None  # last position reported
+
+
+class RunScheduler:
+    """Priority queue with per-team fairness in front of a worker pool."""
+
+    def __init__(
+        self,
+        workers: int = MAX_CONCURRENT_RUNS,
+        max_queue: int = RUN_QUEUE_SIZE,
+        per_team: int = MAX_RUNS_PER_TEAM,
+        stage_limits: dict[str, int] = STAGE_LIMITS,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.per_team = max(1, per_team)
+        self._waiting: list[_Job] = []
+        self._running: dict[str, _Job] = {}
+        self._team_running: dict[str, int] = {}
+        self._team_served: dict[str, int] = {}   # team -> start counter of its last run
+        self._starts = itertools.count(1)
+        self._seq = itertools.count()
+        self._avg_duration = float(RUN_DURATION_ESTIMATE)
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stages = {name: threading.BoundedSemaphore(max(1, n)) for name, n in stage_limits.items()}
+
+    # ---- Public API ----
+
+    def submit(
+        self,
+        run_id: str,
+        team: str,
+        fn: Callable[[], Any],
+        priority: int = 0,
+        on_position: Callable[[int], None] | None = None,
+        cancel: CancelToken | None = None,
+    ) -> Future:
+        """
+        Queue fn() as a run. on_position receives the run's place in the
+        queue (1 = next) whenever it changes, and 0 when the run starts.
+        cancel is the token fn() watches; cancel(run_id) triggers it.
+
+        Raises:
+            QueueFull: RUN_QUEUE_SIZE runs are already waiting.
+        """
+        team = team.strip().upper()
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                raise QueueFull(self._retry_after())
+            job = _Job(run_id, team, priority, fn, on_position, next(self._seq))
+            if cancel is not None:
+                job.cancel = cancel
+            self._waiting.append(job)
+            self._ensure_workers()
+            self._cond.notify()
+        logger.info(f"Run {run_id} queued (team {team}, priority {priority})")
+        self._report_positions()
+        return job.future
+
+    def cancel(self, run_id: str) -> bool:
+        """
+        Cancel a run: a queued one is removed (its future cancelled), a
+        running one has its CancelToken triggered. False if unknown.
+        """
+        with self._cond:
+            job = self._running.get(run_id)
+            queued = next((j for j in self._waiting if j.run_id == run_id), None)
+            if queued is not None:
+                self._waiting.remove(queued)
+                job = queued
+        if job is None:
+            return False
+        logger.info(f"Cancelling run {run_id} ({'queued' if queued else 'running'})")
+        job.cancel.cancel()
+        if queued is not None:
+            job.future.cancel()
+            self._report_positions()
+        return True
+
+    def position(self, run_id: str) -> int | None:
+        """1-based queue position, 0 if running, None if unknown / finished."""
+        with self._cond:
+            if run_id in self._running:
+                return 0
+            for i, job in enumerate(self._ordered(), start=1):
+                if job.run_id == run_id:
+                    return i
+        return None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "running": len(self._running),
+                "queued": len(self._waiting),
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "avg_run_seconds": round(self._avg_duration, 1),
+                "queue": [
+                    {"run_id": j.run_id, "team": j.team, "priority": j.priority}
+                    for j in self._ordered()
+                ],
+            }
+
+    @contextmanager
+    def stage(self, name: str, cancel: CancelToken | None = None):
+        """
+        Hold one of the STAGE_LIMITS slots for name while the block runs.
+        Waiting for the slot stops with RunCancelled if cancel fires.
+        """
+        sem = self._stages.get(name)
+        if sem is None:
+            yield
+            return
+        start = time.monotonic()
+        while not sem.acquire(timeout=0.2):
+            if cancel is not None and cancel.cancelled:
+                raise RunCancelled("Run cancelled")
+        waited = time.monotonic() - start
+        if waited > 1:
+            logger.info(f"Waited {waited:.1f}s for a free {name} slot")
+        try:
+            yield
+        finally:
+            sem.release()
+
+    # ---- Internal helpers ----
+
+    def _ordered(self) -> list[_Job]:
+        """Waiting jobs in the order they would start. Caller holds the lock."""
+        return sorted(self._waiting, key=lambda j: (
+            -j.priority,
+            self._team_running.get(j.team, 0),
+            self._team_served.get(j.team, 0),
+            j.seq,
+        ))
+
+    def _next(self) -> _Job | None:
+        """First waiting job whose team is under its cap. Caller holds the lock."""
+        for job in self._ordered():
+            if self._team_running.get(job.team, 0) < self.per_team:
+                return job
+        return None
+
+    def _retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up. Caller holds the lock."""
+        # A queued run starts whenever any running one finishes
+        return max(1, math.ceil(self._avg_duration / self.workers))
+
+    def _ensure_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            t = threading.Thread(
+                target=self._worker, name=f"rift-run-{len(self._threads)}", daemon=True,
+            )
+            self._threads.append(t)
+            t.start()
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next()
+                self._waiting.remove(job)
+                self._running[job.run_id] = job
+                self._team_running[job.team] = self._team_running.get(job.team, 0) + 1
+                self._team_served[job.team] = next(self._starts)
+            self._report_positions()
+
+            if job.future.set_running_or_notify_cancel():
+                start = time.monotonic()
+                try:
+                    job.future.set_result(job.fn())
+                except BaseException as e:
+                    job.future.set_exception(e)
+                duration = time.monotonic() - start
+            else:
+                duration = None
+
+            with self._cond:
+                del self._running[job.run_id]
+                self._team_running[job.team] -= 1
+                if duration is not None:
+                    self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+                # The team cap may have been holding back another worker's pick
+                self._cond.notify_all()
+            self._report_positions()
+
+    def _report_positions(self) -> None:
+        """Send each job its position if it changed (callbacks run unlocked)."""
+        updates = []
+        with self._cond:
+            for job in self._running.values():
+                if job.position != 0:
+                    job.position = 0
+                    updates.append((job, 0))
+            for i, job in enumerate(self._ordered(), start=1):
+                if job.position != i:
+                    job.position = i
+                    updates.append((job, i))
+        for job, position in updates:
+            if job.on_position is None:
+                continue
+            try:
+                job.on_position(position)
+            except Exception as e:
+                logger.warning(f"Queue position callback failed for {job.run_id}: {e}")
+
+
+# Singleton
+run_scheduler = RunScheduler()
@@ -0,0 +1,134 @@
+"""
+RIFT 2026 — Snippet Service
+
+Builds the ">>> N: line" context windows attached to every ErrorInfo.
+
+Line-start offsets are computed once per file version and reused, so each
+snippet is an O(context) slice instead of a full read + splitlines:
+  - indexed files use the FileEntry offsets (dropped when heal refreshes it)
+  - large or non-indexed files are scanned through mmap, with byte offsets
+    cached by (path, mtime, size) in a small LRU
+"""
+import logging
+import mmap
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from config import SNIPPET_MMAP_MIN_BYTES, SNIPPET_OFFSET_CACHE_SIZE
+from services.file_index import file_index_service
+
+logger = logging.getLogger("rift.snippets")
+
+
+class _MappedLines:
+    """Byte offsets of every line start in a file, read through mmap."""
+
+    __slots__ = ("path", "offsets", "size")
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self.size = size
+        offsets = [0]
+        if size:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                find = mm.find
+                pos = find(b"\n")
+                while pos != -1:
+                    offsets.append(pos + 1)
+                    pos = find(b"\n", pos + 1)
+        if len(offsets) > 1 and offsets[-1] == size:
+            offsets.pop()  # trailing newline does not start a new line
+        self.offsets = offsets
+
+    @property
+    def line_count(self) -> int:
+        return len(self.offsets) if self.size else 0
+
+    def read_lines(self, first: int, last: int) -> list[str]:
+        """1-based inclusive line range, decoded, without line endings."""
+        start = self.offsets[first - 1]
+        end = self.offsets[last] if last < len(self.offsets) else self.size
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunk = mm[start:end]
+        return [
+            line.rstrip(b"\r").decode("utf-8", errors="replace")
+            for line in chunk.split(b"\n")[: last - first + 1]
+        ]
+
+
+class SnippetService:
+    """Context windows around a line, with per-file-version offset caching."""
+
+    def __init__(self, max_files: int = SNIPPET_OFFSET_CACHE_SIZE):
+        self._mapped: OrderedDict[tuple, _MappedLines] = OrderedDict()
+        self._max_files = max_files
+        self._lock = threading.Lock()
+
+    def snippet(self, repo_path: str, file_path: str, line_num: int, context: int = 3) -> str:
+        """Source lines around line_num, the error line marked with '>>>'."""
+        try:
+            fetched = self._lines(repo_path, file_path, line_num, context)
+        except Exception:
+            return ""
+        if not fetched:
+            return ""
+        first, lines = fetched
+        result = []
+        for i, text in enumerate(lines, start=first):
+            marker = ">>>" if i == line_num else "   "
+            result.append(f"{marker} {i}: {text}")
+        return "\n".join(result)
+
+    def _lines(self, repo_path: str, file_path: str, line_num: int, context: int):
+        """(first line number, lines) for the window, or None."""
+        index = file_index_service.get(repo_path)
+        entry = index.get(file_path)
+
+        # Indexed and small (or already in memory): use the entry's offsets
+        if entry is not None and (entry.is_loaded or entry.size < SNIPPET_MMAP_MIN_BYTES):
+            count = entry.line_count
+            first, last = self._window(count, line_num, context)
+            if first > last:
+                return None
+            return first, [entry.line(i) for i in range(first, last + 1)]
+
+        # Large or outside the index: mmap-scanned offsets
+        path = entry.path if entry is not None else Path(file_path)
+        if not path.is_absolute():
+            path = index.root / path
+        mapped = self._mapped_lines(path)
+        if mapped is None:
+            return None
+        first, last = self._window(mapped.line_count, line_num, context)
+        if first > last:
+            return None
+        return first, mapped.read_lines(first, last)
+
+    @staticmethod
+    def _window(count: int, line_num: int, context: int) -> tuple[int, int]:
+        """1-based inclusive range [line - context, line + context], clamped."""
+        return max(1, line_num - context), min(count, line_num + context)
+
+    def _mapped_lines(self, path: Path) -> _MappedLines | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            mapped = self._mapped.get(key)
+            if mapped is not None:
+                self._mapped.move_to_end(key)
+                return mapped
+
+        mapped = _MappedLines(path, stat.st_size)
+        with self._lock:
+            self._mapped[key] = mapped
+            while len(self._mapped) > self._max_files:
+                self._mapped.popitem(last=False)
+        return mapped
+
+
+# Singleton
+snippet_service = SnippetService()
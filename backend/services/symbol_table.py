@@ -0,0 +1,168 @@
+"""
+RIFT 2026 — Repo-wide Symbol Table
+
+Function and class definitions for every .py file in the run's file index,
+read from the AST instead of regex-scanning each file per error.
+
+Each Symbol records where the definition starts and ends (AST end
+positions, not indentation guesses), where its body starts, and — for
+functions — the lines of exec() calls made directly in its body.
+
+Per-file symbols are cached by content hash; the table is re-assembled only
+when the index content version changes (i.e. after the heal step writes),
+so a healing iteration parses each changed file once.
+"""
+import ast
+import logging
+import threading
+from typing import NamedTuple
+from weakref import WeakKeyDictionary
+
+from services.file_index import RepoFileIndex, file_index_service
+
+logger = logging.getLogger("rift.symbol_table")
+
+
+class Symbol(NamedTuple):
+    """One def/class in the repo (line numbers are 1-based, inclusive)."""
+    name: str
+    qualname: str
+    kind: str              # "function" | "class"
+    file: str              # repo-relative path
+    lineno: int            # the def/class line (after decorators)
+    end_lineno: int
+    body_lineno: int       # first statement of the body
+    top_level: bool
+    exec_lines: tuple[int, ...] = ()
+
+
+def _exec_lines(func: ast.AST) -> tuple[int, ...]:
+    """Lines of exec(...) calls in a function body, excluding nested defs."""
+    lines = []
+    stack = list(ast.iter_child_nodes(func))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "exec"
+        ):
+            lines.append(node.lineno)
+        stack.extend(ast.iter_child_nodes(node))
+    return tuple(sorted(lines))
+
+
+def extract_symbols(tree: ast.AST, rel_path: str) -> list[Symbol]:
+    """All function/class definitions in a parsed module, in line order."""
+    symbols: list[Symbol] = []
+    stack = [(node, "") for node in reversed(tree.body)]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            qualname = f"{prefix}.{node.name}" if prefix else node.name
+            is_func = not isinstance(node, ast.ClassDef)
+            symbols.append(Symbol(
+                name=node.name,
+                qualname=qualname,
+                kind="function" if is_func else "class",
+                file=rel_path,
+                lineno=node.lineno,
+                end_lineno=node.end_lineno or node.lineno,
+                body_lineno=node.body[0].lineno,
+                top_level=not prefix,
+                exec_lines=_exec_lines(node) if is_func else (),
+            ))
+            children, prefix = node.body, qualname
+        else:
+            # Definitions nested in if/try/with/for blocks keep the same scope
+            children = [
+                child for child in ast.iter_child_nodes(node) if isinstance(child, ast.stmt)
+            ]
+        stack.extend((child, prefix) for child in reversed(children))
+    symbols.sort(key=lambda s: s.lineno)
+    return symbols
+
+
+class SymbolTable:
+    """Definitions across one content version of a repo."""
+
+    def __init__(self, by_file: dict[str, list[Symbol]]):
+        self._by_file = by_file
+        self._by_name: dict[str, list[Symbol]] = {}
+        for symbols in by_file.values():  # index order = sorted paths
+            for sym in symbols:
+                self._by_name.setdefault(sym.name, []).append(sym)
+
+    def lookup(
+        self, name: str, kind: str | None = None, top_level: bool | None = None
+    ) -> list[Symbol]:
+        """Definitions of name, in file then line order."""
+        return [
+            s for s in self._by_name.get(name, ())
+            if (kind is None or s.kind == kind)
+            and (top_level is None or s.top_level == top_level)
+        ]
+
+    def in_file(self, rel_path: str) -> list[Symbol]:
+        return self._by_file.get(rel_path, [])
+
+    def functions_with_exec(self) -> list[Symbol]:
+        """Functions that call exec() directly, in file then line order."""
+        return [
+            s for symbols in self._by_file.values() for s in symbols if s.exec_lines
+        ]
+
+
+class SymbolTableService:
+    """One SymbolTable per file index, rebuilt when its content version moves."""
+
+    def __init__(self):
+        # file index -> (content_version, SymbolTable)
+        self._tables: WeakKeyDictionary = WeakKeyDictionary()
+        # file index -> {rel_path: (digest, symbols)}
+        self._files: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, repo_path: str) -> SymbolTable:
+        index = file_index_service.get(repo_path)
+        with self._lock:
+            cached = self._tables.get(index)
+            if cached is not None and cached[0] == index.content_version:
+                return cached[1]
+        version = index.content_version
+        table = SymbolTable(self._collect(index))
+        with self._lock:
+            self._tables[index] = (version, table)
+        return table
+
+    def _collect(self, index: RepoFileIndex) -> dict[str, list[Symbol]]:
+        with self._lock:
+            previous = self._files.get(index, {})
+        current: dict[str, tuple[str, list[Symbol]]] = {}
+        parsed = 0
+        for entry in index.files(".py"):
+            try:
+                digest = entry.digest
+            except Exception:
+                continue
+            cached = previous.get(entry.rel_path)
+            if cached is not None and cached[0] == digest:
+                current[entry.rel_path] = cached
+                continue
+            try:
+                tree = ast.parse(entry.data, filename=str(entry.path))
+                symbols = extract_symbols(tree, entry.rel_path)
+            except Exception:
+                symbols = []  # unparsable — nothing to look up until it's fixed
+            current[entry.rel_path] = (digest, symbols)
+            parsed += 1
+        with self._lock:
+            self._files[index] = current
+        logger.info(f"Symbol table: parsed {parsed} of {len(current)} file(s)")
+        return {rel: symbols for rel, (_, symbols) in current.items()}
+
+
+# Singleton
+symbol_table_service = SymbolTableService()
@@ -0,0 +1,198 @@
+"""
+RIFT 2026 — Test Report Service
+
+Reads the machine-readable reports the sandbox test commands write
+(pytest --junitxml, jest --json) so the agents get exact counts and
+per-test failure records without regex-scanning megabytes of console text.
+
+Callers fall back to their console-output regexes when no report exists.
+"""
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from config import JEST_REPORT, JUNIT_REPORT, LIVE_PLUGIN, PYTEST_WORKER, REPORT_DIR
+from models import TestFailure, TestReport
+from services.pytest_output import is_library
+
+logger = logging.getLogger("rift.test_reports")
+
+# "path.py:N:" frames in a pytest --tb=short failure body
+_PY_FRAME = re.compile(r'([\w\\/._-]+\.py):(\d+):')
+_PY_ERROR = re.compile(r'^E\s+(\w+(?:Error|Exception)):\s*(.+)', re.MULTILINE)
+_PY_ASSERT = re.compile(r'^E\s+(assert\s+.+)', re.MULTILINE)
+# First non-node_modules "file.js:N:C" frame in a jest failure message
+_JS_FRAME = re.compile(r'([\w/\\._-]+\.(?:js|ts|jsx|tsx)):(\d+):\d+')
+_JS_ERROR = re.compile(r'^\s*(\w*(?:Error|Exception))(?::\s*(.*))?$', re.MULTILINE)
+
+
+class TestReportService:
+    """Locates, clears and parses structured test reports in a repo."""
+
+    def clear(self, repo_path: str) -> None:
+        """
+        Remove stale reports before a run, make sure the dir exists and
+        install the live-failure pytest plugin and the warm pytest worker
+        next to them.
+        """
+        report_dir = Path(repo_path) / REPORT_DIR
+        report_dir.mkdir(exist_ok=True)
+        for rel in (JUNIT_REPORT, JEST_REPORT):
+            try:
+                (Path(repo_path) / rel).unlink()
+            except FileNotFoundError:
+                pass
+        for src, name in (("pytest_live.py", LIVE_PLUGIN), ("pytest_worker.py", PYTEST_WORKER)):
+            src_bytes = Path(__file__).with_name(src).read_bytes()
+            target = report_dir / f"{name}.py"
+            # Unchanged files keep their mtime (and the sandbox its bytecode)
+            if not target.exists() or target.read_bytes() != src_bytes:
+                target.write_bytes(src_bytes)
+
+    def load(self, repo_path: str, framework: str) -> TestReport | None:
+        """Parse the report for this framework, or None if unavailable."""
+        try:
+            if framework in ("pytest", "unknown"):
+                path = Path(repo_path) / JUNIT_REPORT
+                if path.exists():
+                    return self._load_junit(path)
+            elif framework == "jest":
+                path = Path(repo_path) / JEST_REPORT
+                if path.exists():
+                    return self._load_jest(path)
+        except Exception as e:
+            logger.warning(f"Could not parse {framework} report: {e}")
+        return None
+
+    # ---- JUnit XML (pytest) ----
+
+    def _load_junit(self, path: Path) -> TestReport:
+        """Stream <testcase> elements with iterparse (constant memory)."""
+        report = TestReport()
+        for _, elem in ET.iterparse(str(path), events=("end",)):
+            if elem.tag != "testcase":
+                continue
+
+            outcome = None
+            for child in elem:
+                if child.tag in ("failure", "error", "skipped"):
+                    outcome = child
+                    break
+
+            if outcome is None:
+                report.passed += 1
+            elif outcome.tag != "skipped":
+                report.failed += 1
+                report.failures.append(self._junit_failure(elem, outcome, path.parent.parent))
+            elem.clear()
+
+        report.total = report.passed + report.failed
+        logger.info(
+            f"JUnit report: {report.passed} passed, {report.failed} failed "
+            f"({len(report.failures)} failure record(s))"
+        )
+        return report
+
+    def _junit_failure(self, case: ET.Element, outcome: ET.Element, repo_root: Path) -> TestFailure:
+        classname = case.get("classname", "")
+        name = case.get("name", "")
+        test_file = (case.get("file") or "").replace("\\", "/")
+        body = outcome.text or ""
+        message = outcome.get("message", "")
+
+        # Location: deepest repo frame in the traceback (a failure raised
+        # inside a library points at the repo code that called it), else
+        # the test definition
+        frames = [
+            (f.replace("\\", "/"), int(n)) for f, n in _PY_FRAME.findall(body)
+            if self._in_repo(f, repo_root)
+        ]
+        if frames:
+            file_path, line_num = frames[-1]
+        else:
+            # xunit1 "line" is 0-based
+            file_path, line_num = test_file, int(case.get("line", -1)) + 1
+
+        err_match = _PY_ERROR.search(body)
+        if err_match:
+            err_type, err_msg = err_match.group(1), err_match.group(2).strip()
+        else:
+            assert_match = _PY_ASSERT.search(body)
+            if assert_match:
+                err_type, err_msg = "AssertionError", assert_match.group(1).strip()
+            else:
+                first = message.splitlines()[0] if message else ""
+                err_type, _, err_msg = first.partition(": ")
+                if not err_msg:
+                    err_type, err_msg = "AssertionError", first
+
+        return TestFailure(
+            test_id=f"{classname}::{name}" if classname else name,
+            file=file_path,
+            line_number=line_num,
+            error_type=err_type,
+            message=err_msg,
+        )
+
+    @staticmethod
+    def _in_repo(frame_path: str, repo_root: Path) -> bool:
+        """Whether a traceback path is repo code (not site-packages / the stdlib)."""
+        if is_library(frame_path):
+            return False
+        path = Path(frame_path)
+        if not path.is_absolute():
+            return ".." not in path.parts
+        # Absolute: the host checkout, or its /workspace mount in Docker
+        return path.is_relative_to(repo_root.resolve()) or path.is_relative_to("/workspace")
+
+    # ---- jest --json ----
+
+    def _load_jest(self, path: Path) -> TestReport:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        report = TestReport(
+            passed=int(data.get("numPassedTests", 0)),
+            failed=int(data.get("numFailedTests", 0)),
+            total=int(data.get("numTotalTests", 0)),
+        )
+        for suite in data.get("testResults", []):
+            suite_file = str(suite.get("name", "")).replace("\\", "/")
+            for case in suite.get("assertionResults", []):
+                if case.get("status") != "failed":
+                    continue
+                text = "\n".join(case.get("failureMessages") or [])
+                report.failures.append(self._jest_failure(suite_file, case, text))
+            # Suite-level failure (e.g. module failed to load) with no cases
+            if suite.get("status") == "failed" and not suite.get("assertionResults"):
+                report.failures.append(
+                    self._jest_failure(suite_file, {}, suite.get("message", ""))
+                )
+        return report
+
+    def _jest_failure(self, suite_file: str, case: dict, text: str) -> TestFailure:
+        file_path = suite_file
+        line_num = int((case.get("location") or {}).get("line") or 0)
+        for frame_file, frame_line in _JS_FRAME.findall(text):
+            if "node_modules" not in frame_file:
+                file_path, line_num = frame_file.replace("\\", "/"), int(frame_line)
+                break
+
+        err_match = _JS_ERROR.search(text)
+        if err_match:
+            err_type, err_msg = err_match.group(1), (err_match.group(2) or "").strip()
+        else:
+            err_type = "Error"
+            err_msg = text.strip().splitlines()[0] if text.strip() else "Test failure"
+
+        return TestFailure(
+            test_id=case.get("fullName", "") or suite_file,
+            file=file_path,
+            line_number=line_num,
+            error_type=err_type,
+            message=err_msg,
+        )
+
+
+# Singleton
+test_report_service = TestReportService()
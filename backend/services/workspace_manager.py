@@ -0,0 +1,178 @@
+"""
+RIFT 2026 — Run Workspace Manager
+
+Gives every pipeline run its own directory, keyed by run ID, so concurrent
+runs (even for the same team) never share or delete each other's
+checkout. Workspaces live on tmpfs when a large enough one is available,
+otherwise under CLONE_DIR.
+
+Finished workspaces are kept for WORKSPACE_TTL_SECONDS (for inspection),
+then removed by a background thread, which also evicts the least recently
+finished ones whenever the total size exceeds WORKSPACE_QUOTA_BYTES —
+cleanup never runs on the request path. allocate() refuses new runs only
+while the *active* workspaces alone are over quota.
+"""
+import logging
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import (
+    WORKSPACE_DIR,
+    WORKSPACE_GC_INTERVAL,
+    WORKSPACE_QUOTA_BYTES,
+    WORKSPACE_TMPFS,
+    WORKSPACE_TMPFS_DIR,
+    WORKSPACE_TMPFS_MIN_FREE,
+    WORKSPACE_TTL_SECONDS,
+)
+from utils import dir_size
+
+logger = logging.getLogger("rift.workspace_manager")
+
+
+@dataclass
+class Workspace:
+    run_id: str
+    path: Path
+    active: bool = True
+    last_used: float = 0.0   # time.time() of allocation / release
+    size: int = 0            # bytes, refreshed by the GC thread
+
+
+def _is_tmpfs(path: Path) -> bool:
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = {line.split()[1]: line.split()[2] for line in f if len(line.split()) > 2}
+    except OSError:
+        return False
+    # Longest mount point that contains path
+    current = path
+    while True:
+        if str(current) in mounts:
+            return mounts[str(current)] == "tmpfs"
+        if current.parent == current:
+            return False
+        current = current.parent
+
+
+def _pick_root() -> Path:
+    if WORKSPACE_TMPFS != "0" and WORKSPACE_TMPFS_DIR.parent.is_dir():
+        parent = WORKSPACE_TMPFS_DIR.parent
+        try:
+            free = shutil.disk_usage(parent).free
+        except OSError:
+            free = 0
+        if WORKSPACE_TMPFS == "1" or (_is_tmpfs(parent) and free >= WORKSPACE_TMPFS_MIN_FREE):
+            return WORKSPACE_TMPFS_DIR
+    return WORKSPACE_DIR
+
+
+class WorkspaceManager:
+    """Allocates per-run directories and garbage-collects finished ones."""
+
+    def __init__(self, root: Path | None = None):
+        self.root = root or _pick_root()
+        self._workspaces: dict[str, Workspace] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._gc_thread: threading.Thread | None = None
+        self._adopt_existing()
+
+    def allocate(self, run_id: str) -> Path:
+        """Create (and register) the workspace directory for a run."""
+        with self._lock:
+            active = sum(w.size for w in self._workspaces.values() if w.active)
+            if active >= WORKSPACE_QUOTA_BYTES:
+                raise RuntimeError(
+                    f"Workspace quota exceeded ({active / 1e9:.1f} GB in active runs) — "
+                    "retry when a run finishes."
+                )
+            path = self.root / run_id
+            self._workspaces[run_id] = Workspace(run_id, path, last_used=time.time())
+        path.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Workspace for run {run_id}: {path}")
+        self._ensure_gc()
+        return path
+
+    def release(self, run_id: str) -> None:
+        """Mark a run's workspace finished; the GC thread removes it later."""
+        with self._lock:
+            ws = self._workspaces.get(run_id)
+            if ws is None:
+                return
+            ws.active = False
+            ws.last_used = time.time()
+        self._wake.set()
+
+    def usage(self) -> dict:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "active": sum(1 for w in self._workspaces.values() if w.active),
+                "finished": sum(1 for w in self._workspaces.values() if not w.active),
+                "bytes": sum(w.size for w in self._workspaces.values()),
+                "quota_bytes": WORKSPACE_QUOTA_BYTES,
+            }
+
+    # ---- Garbage collection ----
+
+    def collect(self) -> None:
+        """One GC pass: refresh sizes, drop expired, then LRU-evict over quota."""
+        with self._lock:
+            workspaces = list(self._workspaces.values())
+        for ws in workspaces:
+            ws.size = dir_size(ws.path)
+
+        now = time.time()
+        finished = sorted((w for w in workspaces if not w.active), key=lambda w: w.last_used)
+        total = sum(w.size for w in workspaces)
+        for ws in finished:
+            expired = now - ws.last_used > WORKSPACE_TTL_SECONDS
+            if not expired and total <= WORKSPACE_QUOTA_BYTES:
+                continue
+            with self._lock:
+                # Re-allocated meanwhile (same run ID)? Leave it alone
+                if self._workspaces.get(ws.run_id) is not ws or ws.active:
+                    continue
+                del self._workspaces[ws.run_id]
+            logger.info(
+                f"Removing workspace {ws.run_id} ({ws.size / 1e6:.0f} MB, "
+                f"{'expired' if expired else 'over quota'})"
+            )
+            shutil.rmtree(ws.path, ignore_errors=True)
+            total -= ws.size
+
+    def _adopt_existing(self) -> None:
+        """Workspaces left by a previous process count as finished."""
+        if not self.root.is_dir():
+            return
+        for path in self.root.iterdir():
+            if path.is_dir():
+                try:
+                    mtime = path.stat().st_mtime
+                except OSError:
+                    continue
+                self._workspaces[path.name] = Workspace(path.name, path, active=False, last_used=mtime)
+
+    def _ensure_gc(self) -> None:
+        with self._lock:
+            if self._gc_thread is not None:
+                return
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="rift-workspace-gc", daemon=True)
+            self._gc_thread.start()
+
+    def _gc_loop(self) -> None:
+        while True:
+            self._wake.wait(WORKSPACE_GC_INTERVAL)
+            self._wake.clear()
+            try:
+                self.collect()
+            except Exception as e:
+                logger.warning(f"Workspace GC failed: {e}")
+
+
+# Singleton
+workspace_manager = WorkspaceManager()
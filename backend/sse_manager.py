@@ -1,44 +1,195 @@
 """
 RIFT 2026 — SSE Event Manager
 
-Provides a global event queue for streaming pipeline progress
-to the frontend via Server-Sent Events (SSE).
+Provides per-run event streams for pipeline progress, delivered to the
+frontend via Server-Sent Events (SSE).
 
-Uses asyncio.Queue with thread-safe put from sync agent code.
+Each run's SSEManager is a broadcast hub: the producer (the sync agent
+code) writes every event once — it gets a monotonic ID (the SSE `id:`
+field), is appended to the run's JSONL event log
+(EVENTS_DIR/<run_id>.jsonl) and to a ring buffer of the last
+SSE_BUFFER_SIZE events. Any number of subscribers (browser streams,
+metrics consumers) read from the ring through their own Subscription,
+which is nothing but a cursor, so:
+
+  - the producer never waits for a subscriber and holds no per-subscriber
+    queue; it only wakes the subscribers that are waiting
+  - a subscriber that falls further behind than the ring catches up from
+    the event log, so a slow consumer loses nothing and slows no one
+
+A client that reconnects with Last-Event-ID simply subscribes from that
+ID; after the run the log alone serves the whole stream.
 """
 import asyncio
+import itertools
 import json
 import logging
-from typing import Optional
+import threading
+import time
+from collections import deque
+from typing import Iterator, Optional
+
+from config import EVENTS_DIR, SSE_BUFFER_SIZE
 
 logger = logging.getLogger("rift.sse_manager")
 
+# Runs whose stream is still open, by run ID
+_live: dict[str, "SSEManager"] = {}
+_live_lock = threading.Lock()
+
+
+class Subscription:
+    """One subscriber's cursor into a run's event stream."""
+
+    def __init__(self, hub: "SSEManager", after: int = 0):
+        self._hub = hub
+        self.cursor = after   # ID of the last event handed out
+        self._wakeup: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
+
+    async def get(self, timeout: float) -> list[dict]:
+        """Events after the cursor, waiting up to timeout seconds ([] if none came)."""
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None or self._wakeup[0] is not loop:
+            self._wakeup = (loop, asyncio.Event())
+        deadline = loop.time() + timeout
+        while True:
+            self._wakeup[1].clear()
+            events = self._hub._read(self, wait=True)
+            if events or self._hub.finished:
+                return events
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            try:
+                await asyncio.wait_for(self._wakeup[1].wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_sync(self, timeout: float) -> list[dict]:
+        """Blocking get() for consumers running in their own thread."""
+        return self._hub._read_sync(self, timeout)
+
+    def close(self) -> None:
+        self._hub._unsubscribe(self)
+
 
 class SSEManager:
-    """Manages a per-run asyncio queue for SSE events."""
+    """Broadcast hub for one run's events: IDs, event log, ring buffer, subscribers."""
 
-    def __init__(self):
-        self._queue: Optional[asyncio.Queue] = None
-        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    def __init__(self, run_id: str | None = None, buffer_size: int = SSE_BUFFER_SIZE):
+        self.run_id = run_id
+        self._ring: deque[dict] = deque(maxlen=buffer_size)
+        self._subscriptions: set[Subscription] = set()
+        self._waiting: set[Subscription] = set()   # async subscribers to wake
+        self._cond = threading.Condition()          # sync subscribers wait on it
+        self._next_id = 1
+        self._finished = False
+        self._log = None
+        if run_id:
+            EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+            self._log = open(event_log_path(run_id), "a", encoding="utf-8")
+            with _live_lock:
+                _live[run_id] = self
 
-    def create_queue(self, loop: asyncio.AbstractEventLoop) -> asyncio.Queue:
-        """Create a fresh event queue for a new run."""
-        self._queue = asyncio.Queue()
-        self._loop = loop
-        return self._queue
+    def subscribe(self, after: int = 0) -> Subscription:
+        """New subscriber receiving the events with an ID greater than after."""
+        sub = Subscription(self, after)
+        with self._cond:
+            self._subscriptions.add(sub)
+        return sub
+
+    @property
+    def subscribers(self) -> int:
+        with self._cond:
+            return len(self._subscriptions)
 
     @property
-    def queue(self) -> Optional[asyncio.Queue]:
-        return self._queue
+    def finished(self) -> bool:
+        """True once the `done` event has been emitted."""
+        return self._finished
 
     def emit(self, event_type: str, data: dict | str):
-        """Push an event into the queue (thread-safe)."""
-        if self._queue is None or self._loop is None:
-            return
+        """Publish an event to every subscriber (thread-safe, never blocks on them)."""
         payload = data if isinstance(data, str) else json.dumps(data)
-        event = {"event": event_type, "data": payload}
-        # Thread-safe: schedule put_nowait on the event loop from any thread
-        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        with self._cond:
+            if self._finished:
+                return
+            event = {"id": self._next_id, "event": event_type, "data": payload}
+            self._next_id += 1
+            if self._log is not None:
+                # Logged first: a subscriber that falls out of the ring
+                # catches up from the log
+                self._log.write(json.dumps(event) + "\n")
+                self._log.flush()
+            self._ring.append(event)
+            if event_type == "done":
+                self._close()
+            waiting, self._waiting = self._waiting, set()
+            self._cond.notify_all()
+        for sub in waiting:
+            loop, wakeup = sub._wakeup
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # that subscriber's event loop is gone
+
+    def discard(self) -> None:
+        """Close the stream without a `done` event and delete its log."""
+        with self._cond:
+            if not self._finished:
+                self._close()
+            self._cond.notify_all()
+        if self.run_id:
+            event_log_path(self.run_id).unlink(missing_ok=True)
+
+    # ---- Subscription internals ----
+
+    def _read(self, sub: Subscription, wait: bool = False) -> list[dict]:
+        """Events after sub's cursor (advancing it); with wait, register for a wakeup if none."""
+        with self._cond:
+            first = self._ring[0]["id"] if self._ring else self._next_id
+            if sub.cursor + 1 >= first:
+                events = list(itertools.islice(self._ring, sub.cursor + 1 - first, None))
+                if events:
+                    sub.cursor = events[-1]["id"]
+                elif wait and not self._finished:
+                    self._waiting.add(sub)
+                return events
+        # Fell behind the ring: the missed events are in the log
+        missed = list(itertools.takewhile(
+            lambda e: e["id"] < first, read_event_log(self.run_id, sub.cursor)
+        )) if self.run_id else []
+        if len(missed) != first - 1 - sub.cursor:
+            # No (complete) log to catch up from — skip ahead, say so
+            logger.warning(f"SSE subscriber lagged: events {sub.cursor + 1}-{first - 1} skipped")
+            missed = []
+        sub.cursor = first - 1
+        return missed + self._read(sub, wait)
+
+    def _read_sync(self, sub: Subscription, timeout: float) -> list[dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self._read(sub)  # log catch-up happens outside the lock
+            remaining = deadline - time.monotonic()
+            if events or self._finished or remaining <= 0:
+                return events
+            with self._cond:
+                if self._next_id - 1 == sub.cursor and not self._finished:
+                    self._cond.wait(remaining)
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._cond:
+            self._subscriptions.discard(sub)
+            self._waiting.discard(sub)
+
+    def _close(self) -> None:
+        """End of stream (caller holds _cond)."""
+        self._finished = True
+        if self._log is not None:
+            self._log.close()
+        with _live_lock:
+            if _live.get(self.run_id) is self:
+                del _live[self.run_id]
 
     # Convenience methods
     def step(self, step_name: str, step_index: int, message: str = ""):
@@ -66,6 +217,14 @@ class SSEManager:
             "new_fixes": new_fixes or [],
         })
 
+    def queued(self, run_id: str, position: int):
+        """Queue position of the run (1 = next to start, 0 = started)."""
+        self.emit("queue", {
+            "run_id": run_id,
+            "position": position,
+            "message": f"Queued — position {position}" if position else "Run started",
+        })
+
     def log(self, message: str, msg_type: str = "info"):
         self.emit("log", {"message": message, "type": msg_type})
 
@@ -77,3 +236,52 @@ class SSEManager:
 
     def done(self):
         self.emit("done", {"message": "Pipeline complete"})
+
+
+# ---------- Event log ----------
+
+def event_log_path(run_id: str):
+    return EVENTS_DIR / f"{run_id}.jsonl"
+
+
+def get_live(run_id: str) -> Optional[SSEManager]:
+    """The run's SSEManager while its stream is open, else None."""
+    with _live_lock:
+        return _live.get(run_id)
+
+
+def read_event_log(run_id: str, after: int = 0) -> Iterator[dict]:
+    """Logged events of a run with an ID greater than after, in order."""
+    try:
+        f = open(event_log_path(run_id), encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                break  # a line still being written
+            if event["id"] > after:
+                yield event
+
+
+def format_event(event: dict) -> str:
+    """An event in SSE wire format."""
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {event['data']}\n\n"
+
+
+def prune_event_logs(max_age: float) -> int:
+    """Remove event logs not written to for max_age seconds; returns how many."""
+    if not EVENTS_DIR.is_dir():
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in EVENTS_DIR.glob("*.jsonl"):
+        try:
+            if path.stat().st_mtime < cutoff and get_live(path.stem) is None:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    return removed
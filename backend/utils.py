@@ -1,7 +1,9 @@
 """
 RIFT 2026 — Utility Helpers
 """
+import os
 import re
+import uuid
 from datetime import datetime
 
 from config import (
@@ -72,3 +74,28 @@ def now_iso() -> str:
 def format_commit_message(bug_type: str, file: str, line: int) -> str:
     """Generate a commit message with the required [AI-AGENT] prefix."""
     return f"[AI-AGENT] Fix {bug_type} in {file}:{line}"
+
+
+def new_run_id() -> str:
+    """Short unique ID for a pipeline run (workspace dir name, result file)."""
+    return uuid.uuid4().hex[:12]
+
+
+def dir_size(path) -> int:
+    """Total size in bytes of the files under path (symlinks not followed)."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
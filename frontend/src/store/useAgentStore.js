@@ -72,25 +72,17 @@ const useAgentStore = create((set, get) => ({
 
     addLog('Pipeline started — connecting to backend...', 'info', 'System');
 
-    try {
-      const response = await fetch(`${BACKEND}/api/run-stream`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          repo_url: repoUrl,
-          team_name: teamName || 'RIFT_Team',
-          leader_name: leaderName || 'Agent',
-          max_iterations: get().maxIterations,
-        }),
-      });
-
-      if (!response.ok) {
-        throw new Error(`Backend returned ${response.status}`);
-      }
+    // Position in the run's event stream, so a dropped connection resumes
+    // where it left off instead of starting over
+    let runId = null;
+    let lastEventId = 0;
+    let finished = false;
 
+    const readStream = async (response) => {
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
       let buffer = '';
+      let eventType = 'log';
 
       while (true) {
         const { done, value } = await reader.read();
@@ -100,14 +92,18 @@ const useAgentStore = create((set, get) => ({
         const lines = buffer.split('\n');
         buffer = lines.pop(); // Keep incomplete line in buffer
 
-        let eventType = 'log';
         for (const line of lines) {
+          if (line.startsWith('id: ')) {
+            lastEventId = Number(line.slice(4)) || lastEventId;
+            continue;
+          }
           if (line.startsWith('event: ')) {
             eventType = line.slice(7).trim();
             continue;
           }
           if (line.startsWith('data: ')) {
             const rawData = line.slice(6);
+            if (eventType === 'done') finished = true;
             try {
               const data = JSON.parse(rawData);
               handleSSEEvent(eventType, data, set, get, addLog);
@@ -122,12 +118,68 @@ const useAgentStore = create((set, get) => ({
           }
         }
       }
+    };
+
+    try {
+      const response = await fetch(`${BACKEND}/api/run-stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          repo_url: repoUrl,
+          team_name: teamName || 'RIFT_Team',
+          leader_name: leaderName || 'Agent',
+          max_iterations: get().maxIterations,
+        }),
+      });
+
+      if (response.status === 429) {
+        // Run queue is full — no point in the blocking fallback either
+        const retryAfter = response.headers.get('Retry-After');
+        const message = `Server busy — try again in ${retryAfter || 'a few'} seconds`;
+        set({ error: message, isRunning: false, currentStep: -1 });
+        addLog(message, 'error', 'System');
+        return;
+      }
+
+      if (!response.ok) {
+        throw new Error(`Backend returned ${response.status}`);
+      }
+
+      runId = response.headers.get('X-Run-Id');
+      try {
+        await readStream(response);
+      } catch (err) {
+        console.error('SSE stream error:', err);
+      }
+
+      // Stream dropped before the run finished: resume from the last event
+      for (let attempt = 1; !finished && runId && attempt <= 5; attempt++) {
+        addLog(`Connection lost — reconnecting (attempt ${attempt})...`, 'info', 'System');
+        await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+        try {
+          const res = await fetch(`${BACKEND}/api/runs/${runId}/events`, {
+            headers: { 'Last-Event-ID': String(lastEventId) },
+          });
+          if (res.ok) await readStream(res);
+        } catch (err) {
+          console.error('SSE resume error:', err);
+        }
+      }
+      if (!finished && runId) {
+        throw new Error('Lost connection to the run');
+      }
 
     } catch (err) {
       console.error('SSE stream error:', err);
       set({ error: err.message });
       addLog(`Connection error: ${err.message}`, 'error', 'System');
 
+      // The run exists on the server — starting a second one would not help
+      if (runId) {
+        set({ isRunning: false, currentStep: -1 });
+        return;
+      }
+
       // Fallback: try blocking POST
       try {
         addLog('Falling back to blocking API call...', 'info', 'System');